@@ -1,65 +1,157 @@
+import hashlib
 import os
-import tempfile
+import re
+import time
 import pandas as pd
 import streamlit as st
-import re
-import json
+from dotenv import load_dotenv
+
+# TA_BUDDY_* settings are read when the modules below are imported
+load_dotenv()
 
-from functions3 import (
-    file_to_md, flatten_tables, read_text_from_md,
-    extract_location, score_location, extract_email, extract_contact_number,
-    gemini_email, gemini_cover_letter
+from utils import llm_cache
+from rate_limiter import limiter
+from instrumentation import format_json, format_prometheus, metrics
+from text_cache import text_cache
+from conversion_pool import DEFAULT_WORKERS
+from keyword_matcher import DEFAULT_THRESHOLD, SENTENCE_MODEL_PATH
+from ranking import RankingEngine
+from similarity import add_semantic_similarity
+from candidate_store import CandidateStore
+from results_export import EXPORT_FORMATS, available_formats, excel_bytes, export_frame, frame_signature
+from functions3 import file_to_text
+from pipeline import (
+    MAX_PARALLEL_RESUMES, call_token_usage, extract_jd_keywords, generate_letters, iter_process, score_rows,
+    process_roles, role_column, role_shortlist,
 )
 
-from utils import llm_model  # Ensure you have this (Gemini chat model) in your utils.py
+# Columns shown in the live table while a batch is processing
+LIVE_COLUMNS = ["Resume File", "Candidate Location", "email_id", "contact_number", "weighted_score", "Error"]
 
 st.set_page_config(page_title="Talent Acquisition Buddy", layout="wide")
 st.title("📄 Talent Acquisition Buddy ")
 
-# ----------- Helper functions ------------
-
-def extract_keywords_from_text(text, model_name="Gemini Flash"):
-    prompt = f"""
-You are an expert at extracting short, self-explanatory keywords from documents.
-
-Extract a comma-separated list of contextually meaningful and **self-explanatory** keywords from the following text. 
-Each keyword should be as short as possible but fully clear in meaning and context (e.g. "bachelor degree in computer science", "master degree in physics", "certification in data science", "Python", "Machine Learning", "AWS"). 
-Expand all short forms and abbreviations to their full forms.
-Avoid unnecessary length, full sentences, or vague terms.
-
-Return ONLY the JSON below (no extra words):
-
-{{
-  "keywords": [ ... ]
-}}
-
-TEXT:
-{text}
-"""
-    from langchain_core.prompts import ChatPromptTemplate
-    chain = ChatPromptTemplate.from_template("{prompt}") | llm_model
-    response = chain.invoke({"prompt": prompt})
-    output = response.content.strip()
-    json_match = re.search(r"\{[\s\S]*\}", output)
-    keywords = []
-    if json_match:
-        try:
-            out = json.loads(json_match.group())
-            keywords = [kw.strip().lower() for kw in out.get("keywords", []) if kw.strip()]
-        except Exception:
-            pass
-    if not keywords:
-        keywords = [w.strip().lower() for w in output.split(",") if w.strip()]
-    keywords = list(set(keywords))
-    keywords.sort()
-    return keywords
-
-def compute_weighted_score(resume_kw, high_kw, med_kw, low_kw):
-    resume_kw_set = set(k.strip().lower() for k in resume_kw)
-    a = len(resume_kw_set & set(k.strip().lower() for k in high_kw))
-    b = len(resume_kw_set & set(k.strip().lower() for k in med_kw))
-    c = len(resume_kw_set & set(k.strip().lower() for k in low_kw))
-    return a*3 + b*2 + c*1
+# ---------- Sidebar: caches ----------
+@st.cache_data(ttl=30, show_spinner=False)
+def text_cache_size():
+    # Scanning a large cache directory on every rerun is slow; refreshed every 30 s
+    stats = text_cache.stats()
+    return stats["entries"], stats["bytes"]
+
+def render_cache_stats():
+    stats = text_cache.stats(include_size=False)
+    st.sidebar.subheader("Conversion cache")
+    st.sidebar.write(
+        f"Hits: {stats['hits']} | Misses: {stats['misses']} | "
+        f"Hit rate: {stats['hit_rate']:.0%}"
+    )
+    entries, size = text_cache_size()
+    st.sidebar.caption(f"{entries} documents, {size / 1024 / 1024:.1f} MB")
+    llm_stats = llm_cache.stats()
+    st.sidebar.subheader("Gemini response cache")
+    st.sidebar.write(
+        f"Hits: {llm_stats['hits']} | Misses: {llm_stats['misses']} | "
+        f"Hit rate: {llm_stats['hit_rate']:.0%}"
+    )
+    # Shared by every session of this server process
+    limits = limiter.stats()
+    st.sidebar.caption(
+        f"Rate limiter: {limits['in_flight']}/{limits['concurrency_limit']} requests in flight"
+    )
+
+# ---------- Sidebar: last batch metrics ----------
+def render_batch_metrics():
+    snapshot = st.session_state.get("batch_metrics")
+    if not snapshot:
+        return
+    st.sidebar.subheader("Last batch")
+    stages = pd.DataFrame(
+        [
+            {
+                "Stage": name,
+                "Runs": stage["count"],
+                "Total (s)": round(stage["seconds"], 2),
+                "Mean (ms)": round(stage["seconds"] * 1000 / stage["count"], 1) if stage["count"] else 0,
+                "Max (ms)": round(stage["max_seconds"] * 1000, 1),
+            }
+            for name, stage in snapshot["stages"].items()
+        ]
+    )
+    if not stages.empty:
+        st.sidebar.dataframe(stages.sort_values("Total (s)", ascending=False), hide_index=True)
+
+    def total(name, **labels):
+        return sum(c["value"] for c in snapshot["counters"]
+                   if c["name"] == name and all(c["labels"].get(k) == v for k, v in labels.items()))
+
+    st.sidebar.write(
+        f"Gemini calls: {total('llm_calls', cache='miss')} "
+        f"(+{total('llm_calls', cache='hit')} from cache) | Retries: {total('llm_retries')}"
+    )
+    st.sidebar.write(
+        f"Tokens in: {total('llm_tokens', direction='input'):,} | "
+        f"out: {total('llm_tokens', direction='output'):,}"
+    )
+    degraded = total("conversion_degraded")
+    if degraded:
+        st.sidebar.write(f"Oversized documents read as text only: {degraded}")
+    lookups = total("location_lookups")
+    if lookups:
+        st.sidebar.write(
+            f"Locations: {total('location_lookups', method='gazetteer')} found locally, "
+            f"{total('location_lookups', method='llm')} sent to Gemini "
+            f"({total('location_lookups', method='llm') / lookups:.0%} fallback)"
+        )
+    st.sidebar.download_button("Metrics (JSON)", format_json(snapshot), file_name="batch_metrics.json")
+    st.sidebar.download_button("Metrics (Prometheus)", format_prometheus(snapshot), file_name="batch_metrics.prom")
+
+# ---------- Shared resources ----------
+@st.cache_resource
+def shared_candidate_store():
+    # One store per server process; its postings cache is shared by every session
+    return CandidateStore()
+
+# ---------- Cached stages ----------
+def content_key(*parts):
+    """Short hash of strings or bytes, used as an explicit cache or widget key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_document_text(key, _source):
+    # Keyed by the content hash of the upload; the upload object itself is not hashed
+    return file_to_text(_source)
+
+@st.cache_data(max_entries=8, show_spinner="Preparing the download...")
+def export_bytes(signature, fmt, _sheets):
+    # Keyed by the content signature of the tables and the format
+    if fmt == "Excel":
+        return excel_bytes(_sheets)
+    return export_frame(_sheets[0][1], fmt)
+
+def render_export(sheets, file_stem, key):
+    """
+    Format picker and download button for (sheet name, DataFrame) pairs. The
+    file is only built, in memory, when asked for and then reused until the
+    tables change.
+    """
+    formats = available_formats() if len(sheets) == 1 else ["Excel"]
+    col_format, col_button = st.columns([1, 3])
+    fmt = col_format.selectbox("Export format", formats, key=f"{key}_format")
+    signature = content_key(*(name + frame_signature(frame) for name, frame in sheets))
+    ready = st.session_state.get(f"{key}_ready") == (signature, fmt)
+    if not ready and col_button.button("Prepare download", key=f"{key}_prepare"):
+        st.session_state[f"{key}_ready"] = (signature, fmt)
+        ready = True
+    if ready:
+        extension, mime = EXPORT_FORMATS[fmt]
+        col_button.download_button(
+            f"📥 Download {fmt}", export_bytes(signature, fmt, sheets),
+            file_name=file_stem + extension, mime=mime, key=f"{key}_download",
+        )
 
 # ---------- Session state ----------
 if "jd_keywords" not in st.session_state:
@@ -76,6 +168,164 @@ if "interim_results" not in st.session_state:
     st.session_state["interim_results"] = None
 if "loc_done" not in st.session_state:
     st.session_state["loc_done"] = False
+if "ranking_engine" not in st.session_state:
+    st.session_state["ranking_engine"] = None
+if "resume_artifacts" not in st.session_state:
+    st.session_state["resume_artifacts"] = {}
+if "location_overrides" not in st.session_state:
+    st.session_state["location_overrides"] = {}
+if "interim_rows" not in st.session_state:
+    st.session_state["interim_rows"] = {}
+if "batch_metrics" not in st.session_state:
+    st.session_state["batch_metrics"] = None
+if "processing" not in st.session_state:
+    st.session_state["processing"] = False
+
+def rows_to_frame(rows):
+    """Completed result rows (index -> row) as a DataFrame in upload order."""
+    return pd.DataFrame([rows[i] for i in sorted(rows)])
+
+def current_jd_text():
+    return cached_document_text(content_key(jd.getvalue()), jd)
+
+def fill_letters(df, letters):
+    """Writes generated letters (artifact key -> (cover, email)) into a results frame."""
+    for key, (cover, email) in letters.items():
+        mask = df["Artifact Key"] == key
+        df.loc[mask, "Cover Letter"] = cover
+        df.loc[mask, "Email"] = email
+    return df
+
+def top_candidate_keys(df, n):
+    ranked = df[df["Error"] == ""].sort_values("weighted_score", ascending=False, kind="stable")
+    return list(ranked["Artifact Key"].head(int(n)))
+
+# A batch that was interrupted (browser reload, widget click) keeps its completed rows
+if st.session_state["processing"]:
+    st.session_state["processing"] = False
+    st.session_state["interim_results"] = rows_to_frame(st.session_state["interim_rows"])
+    st.session_state["ranking_engine"] = None
+    st.warning(
+        f"Processing was interrupted; {len(st.session_state['interim_rows'])} completed "
+        "resume(s) were kept. Press the process button again to finish the rest."
+    )
+
+# ---------- Multiple job descriptions ----------
+def sheet_names(names):
+    """Unique Excel sheet names (at most 31 characters, no []:*?/\\)."""
+    used = set()
+    result = []
+    for name in names:
+        base = re.sub(r"[\[\]:*?/\\]", "_", name)[:31] or "Sheet"
+        sheet, n = base, 1
+        while sheet.lower() in used:
+            n += 1
+            sheet = f"{base[:31 - len(str(n)) - 1]}~{n}"
+        used.add(sheet.lower())
+        result.append(sheet)
+    return result
+
+def render_multi_role_mode():
+    """One resume pool ranked against several JDs, each with its own priorities."""
+    if "role_keywords" not in st.session_state:
+        st.session_state["role_keywords"] = {}
+    if "role_results" not in st.session_state:
+        st.session_state["role_results"] = None
+
+    st.header("Upload Files")
+    pool = st.file_uploader(
+        "Upload the resume pool (PDF/DOCX)", type=["pdf", "docx"], accept_multiple_files=True, key="roles_resumes",
+    )
+    jds = st.file_uploader(
+        "Upload the Job Descriptions, one per role (PDF/DOCX)", type=["pdf", "docx"],
+        accept_multiple_files=True, key="roles_jds",
+    )
+    if not jds:
+        return
+    role_keywords = st.session_state["role_keywords"]
+    missing = [j for j in jds if j.name not in role_keywords]
+    if missing:
+        with st.spinner(f"Extracting keywords from {len(missing)} job description(s) using Gemini..."):
+            for j in missing:
+                role_keywords[j.name] = extract_jd_keywords(j)
+
+    st.subheader("Keyword priorities per role")
+    roles = []
+    for j in jds:
+        keywords = role_keywords[j.name]
+        with st.expander(j.name):
+            high = st.multiselect("HIGH priority", keywords, key=f"role_high_{j.name}")
+            medium = st.multiselect(
+                "MEDIUM priority", [k for k in keywords if k not in high], key=f"role_medium_{j.name}",
+            )
+            low = [k for k in keywords if k not in high and k not in medium]
+            st.write("**Low Priority:**", low)
+        roles.append({"name": os.path.splitext(j.name)[0], "high": high, "medium": medium, "low": low})
+
+    match_modes = {
+        "Exact": "exact",
+        "Fuzzy (character n-grams)": "fuzzy",
+        "Local phrase match in the resume text (no Gemini keyword call)": "phrase",
+    }
+    if SENTENCE_MODEL_PATH:
+        match_modes["Semantic (local sentence-transformers model)"] = "semantic"
+    match_label = st.selectbox("Keyword matching", list(match_modes), key="roles_match_mode")
+    match_threshold = DEFAULT_THRESHOLD
+    if match_modes[match_label] in ("fuzzy", "semantic"):
+        match_threshold = st.slider(
+            "Minimum keyword similarity", min_value=0.3, max_value=1.0,
+            value=DEFAULT_THRESHOLD, step=0.05, key="roles_match_threshold",
+        )
+    shortlist_n = st.number_input("Shortlist size per role", min_value=1, max_value=10000, value=20,
+                                  key="roles_top_n")
+    if st.button("Rank the pool against every role") and pool:
+        with metrics.scope() as batch_metrics:
+            with st.spinner(f"Processing {len(pool)} resume(s) once for {len(roles)} role(s)..."):
+                rows, matrix = process_roles(
+                    pool, roles,
+                    combined=True,
+                    match_mode=match_modes[match_label],
+                    match_threshold=match_threshold,
+                    artifacts=st.session_state["resume_artifacts"],
+                    candidate_store=shared_candidate_store(),
+                )
+        st.session_state["batch_metrics"] = batch_metrics.snapshot()
+        st.session_state["role_results"] = (rows, matrix, roles)
+
+    if st.session_state["role_results"] is None:
+        return
+    rows, matrix, roles = st.session_state["role_results"]
+    summary = pd.DataFrame(rows)
+    columns = ["Resume File", "Best Role", "Best Role Score"] + [role_column(r["name"]) for r in roles] + [
+        "Candidate Location", "email_id", "contact_number", "Resume_Keywords", "Error",
+    ]
+    summary = summary[columns].sort_values("Best Role Score", ascending=False, kind="stable")
+    st.subheader("🔎 Best-fitting role per candidate")
+    st.dataframe(summary, hide_index=True)
+
+    shortlist_columns = ["Resume File", "weighted_score", "Candidate Location", "Location Score", "email_id",
+                         "contact_number", "Resume_Keywords"]
+    shortlists = [
+        pd.DataFrame(role_shortlist(rows, matrix, j, int(shortlist_n)), columns=shortlist_columns)
+        for j in range(len(roles))
+    ]
+    for role, shortlist in zip(roles, shortlists):
+        with st.expander(f"Shortlist: {role['name']}"):
+            st.dataframe(shortlist, hide_index=True)
+
+    st.markdown("**Shortlists workbook** (one sheet per role)")
+    names = sheet_names(["Best Fit"] + [r["name"] for r in roles])
+    render_export(list(zip(names, [summary] + shortlists)), "role_shortlists", "roles_export")
+
+mode = st.radio(
+    "Mode", ["One job description", "Several job descriptions (shared resume pool)"],
+    horizontal=True, key="app_mode",
+)
+if mode != "One job description":
+    render_multi_role_mode()
+    render_cache_stats()
+    render_batch_metrics()
+    st.stop()
 
 # ---------- User Inputs ------------
 st.header("Upload Files for Batch 1")
@@ -89,30 +339,23 @@ resumes = st.file_uploader(
 days_available = []
 if resumes:
     st.markdown("**Enter Days after which each candidate is available:**")
-    for r in resumes:
-        day_val = st.number_input(
-            f"Days for {r.name}",
-            min_value=1,
-            max_value=365,
-            value=1,
-            step=1,
-            key=f"day_{r.name}",
-        )
-        days_available.append(day_val)
+    # One grid instead of a widget per resume; its key follows the uploaded files
+    days_frame = st.data_editor(
+        pd.DataFrame({"Resume": [r.name for r in resumes], "Days Available": 1}),
+        column_config={
+            "Days Available": st.column_config.NumberColumn(min_value=1, max_value=365, step=1, required=True),
+        },
+        disabled=["Resume"],
+        hide_index=True,
+        key="days_" + content_key(*(r.name for r in resumes)),
+    )
+    days_available = [int(d) for d in days_frame["Days Available"].fillna(1)]
 
 jd = st.file_uploader("Upload Job Description (PDF/DOCX)", type=["pdf", "docx"], key="batch1_jd")
 # Removed LLM choice, default to Gemini
 
 # ---------- JD Keyword Extraction & Priority Setting ----------
 
-def extract_jd_keywords(jd_file):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        jd_md_path = file_to_md(jd_file, tmpdir)
-        jd_flat_md_path = flatten_tables(jd_md_path, tmpdir)
-        jd_text = read_text_from_md(jd_flat_md_path)
-        keywords = extract_keywords_from_text(jd_text)
-        return keywords
-
 if jd and st.session_state["jd_keywords"] is None:
     st.info("Extracting keywords from job description using Gemini...")
     st.session_state["jd_keywords"] = extract_jd_keywords(jd)
@@ -155,65 +398,181 @@ if st.session_state["set_priority_step"] == 3:
     if st.button("Proceed to Resume Processing"):
         st.session_state["set_priority_step"] = 4
 
+# ---------- Candidate store search ----------
+if st.session_state["set_priority_step"] >= 3:
+    store = shared_candidate_store()
+    stored = len(store)
+    if stored:
+        with st.expander(f"🗄️ Search {stored} previously processed candidate(s)"):
+            st.caption("Matches these priorities against every stored resume, without uploading or calling Gemini.")
+            search_n = st.number_input("Candidates to show", min_value=1, max_value=5000, value=50, key="store_top_n")
+            if st.button("Search candidate store"):
+                st.session_state["store_results"] = pd.DataFrame(store.search(
+                    st.session_state["high_priority"], st.session_state["medium_priority"],
+                    st.session_state["priority_keywords"], limit=search_n,
+                ))
+            store_results = st.session_state.get("store_results")
+            if store_results is not None:
+                if store_results.empty:
+                    st.info("No stored candidate matches these keywords.")
+                else:
+                    st.dataframe(store_results.drop(columns=["Content Hash"]))
+
 # ---------- Main Pipeline ----------
-def process(resume_files, jd_file, days_available_list,
-            high_priority, medium_priority, low_priority, tmpdir):
-    if not resume_files or not jd_file:
-        return []
-    all_results = []
-    jd_md_path = file_to_md(jd_file, tmpdir)
-    jd_flat_md_path = flatten_tables(jd_md_path, tmpdir)
-    jd_text = read_text_from_md(jd_flat_md_path)
-    for i, res in enumerate(resume_files):
-        res_md_path = file_to_md(res, tmpdir)
-        res_flat_md_path = flatten_tables(res_md_path, tmpdir)
-        res_text = read_text_from_md(res_flat_md_path)
-
-        # NO embeddings, cosine, projection, etc.
-        # LLM cover letter & email (always Gemini)
-        cover = gemini_cover_letter(res_text, jd_text)
-        email = gemini_email(res_text, jd_text)
-        
-        location = extract_location(res_text, "Gemini Flash")
-        loc_score = score_location(location)
-        email_id = extract_email(res_text)
-        contact_number = extract_contact_number(res_text)
-        resume_keywords = extract_keywords_from_text(res_text)
-        weighted_score = compute_weighted_score(
-            resume_keywords,
-            high_priority,
-            medium_priority,
-            low_priority
+if st.session_state["set_priority_step"] == 4:
+    max_parallel = st.number_input(
+        "Resumes to process in parallel",
+        min_value=1,
+        max_value=32,
+        value=MAX_PARALLEL_RESUMES,
+        step=1,
+        key="max_parallel",
+    )
+    convert_workers = st.number_input(
+        "Conversion worker processes",
+        min_value=1,
+        max_value=64,
+        value=DEFAULT_WORKERS,
+        step=1,
+        key="convert_workers",
+    )
+    regenerate_letters = st.checkbox(
+        "Regenerate cover letters and emails (ignore cached responses)",
+        value=False,
+        key="regenerate_letters",
+    )
+    combined_extraction = st.checkbox(
+        "Use a single structured Gemini call per resume (fewer input tokens)",
+        value=True,
+        key="combined_extraction",
+    )
+    letter_modes = {
+        "For every candidate": "all",
+        "Only for the top N candidates after scoring": "top",
+        "On demand (from the results table)": "lazy",
+    }
+    letter_label = st.radio("Cover letters & outreach emails", list(letter_modes), key="letter_mode")
+    letter_mode = letter_modes[letter_label]
+    top_n = 10
+    if letter_mode == "top":
+        top_n = st.number_input("N", min_value=1, max_value=1000, value=10, step=1, key="letters_top_n")
+    match_modes = {
+        "Exact": "exact",
+        "Fuzzy (character n-grams)": "fuzzy",
+        "Local phrase match in the resume text (no Gemini keyword call)": "phrase",
+    }
+    if SENTENCE_MODEL_PATH:
+        match_modes["Semantic (local sentence-transformers model)"] = "semantic"
+    match_label = st.selectbox("Keyword matching", list(match_modes), key="match_mode")
+    match_threshold = DEFAULT_THRESHOLD
+    if match_modes[match_label] in ("fuzzy", "semantic"):
+        match_threshold = st.slider(
+            "Minimum keyword similarity", min_value=0.3, max_value=1.0,
+            value=DEFAULT_THRESHOLD, step=0.05, key="match_threshold",
         )
-        all_results.append({
-            "Resume File": res.name,
-            "Job Description": jd_file.name,
-            "Candidate Location": location,
-            "Cover Letter": cover,
-            "Email": email,
-            "email_id": email_id,
-            "contact_number": contact_number,
-            "Days Available": days_available_list[i],
-            "Batch": "Batch 1",
-            "Location Score": loc_score,
-            "Resume_Keywords": ', '.join(resume_keywords),
-            "weighted_score": weighted_score
-        })
-    return all_results
+    semantic_similarity = st.checkbox(
+        "Add a semantic similarity column (resume vs JD embeddings)",
+        value=False,
+        key="semantic_similarity",
+    )
+    save_candidates = st.checkbox(
+        "Save processed candidates to the candidate store (searchable for later JDs)",
+        value=True,
+        key="save_candidates",
+    )
+    if st.button("Process Batch with Weighted Score") and resumes and jd:
+        high_p = st.session_state["high_priority"]
+        med_p = st.session_state["medium_priority"]
+        low_p = st.session_state["priority_keywords"]
+        artifacts = st.session_state["resume_artifacts"]
+        overrides = st.session_state["location_overrides"]
+        rows = {}
+        st.session_state["interim_rows"] = rows
+        st.session_state["processing"] = True
+        st.session_state["loc_done"] = False
+        st.session_state["ranking_engine"] = None
 
-if st.session_state["set_priority_step"] == 4:
-    if st.button("Process Batch with Weighted Score"):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            high_p = st.session_state["high_priority"]
-            med_p = st.session_state["medium_priority"]
-            low_p = st.session_state["priority_keywords"]
-            results = process(
-                resumes, jd, days_available,
-                high_p, med_p, low_p, tmpdir
+        total = len(resumes)
+        progress = st.progress(0.0, text=f"0/{total} resumes processed")
+        stats_line = st.empty()
+        live_table = st.empty()
+        start = time.monotonic()
+        last_refresh = 0.0
+        # Stage timings, tokens and cache hits of this batch only, for the sidebar
+        with metrics.scope() as batch_metrics:
+            for i, row in iter_process(
+                resumes, jd, high_p, med_p, low_p,
+                days_available_list=days_available,
+                max_workers=max_parallel,
+                convert_workers=convert_workers,
+                regenerate_letters=regenerate_letters,
+                combined=combined_extraction,
+                match_mode=match_modes[match_label],
+                match_threshold=match_threshold,
+                artifacts=artifacts,
+                include_letters=letter_mode == "all",
+                candidate_store=shared_candidate_store() if save_candidates else None,
+            ):
+                # Manual location-score edits from earlier runs survive the merge
+                row["Location Score"] = overrides.get(row["Artifact Key"], row["Location Score"])
+                rows[i] = row
+                done = len(rows)
+                elapsed = time.monotonic() - start
+                progress.progress(done / total, text=f"{done}/{total} resumes processed")
+                stats_line.caption(
+                    f"Throughput: {done / elapsed * 60 if elapsed else 0:.1f} resumes/min | "
+                    f"ETA: {(total - done) * elapsed / done:.0f}s"
+                )
+                # Rebuilding the table is O(rows), so refresh it at most once a second
+                if elapsed - last_refresh >= 1.0 or done == total:
+                    last_refresh = elapsed
+                    partial = rows_to_frame(rows)
+                    st.session_state["interim_results"] = partial
+                    live_table.dataframe(partial[LIVE_COLUMNS])
+
+            # Re-score the complete batch at once (one matrix product in fuzzy mode)
+            results = score_rows(
+                [rows[i] for i in sorted(rows)], artifacts, high_p, med_p, low_p,
+                match_modes[match_label], match_threshold,
             )
+            if semantic_similarity and results:
+                with st.spinner("Embedding resumes..."):
+                    add_semantic_similarity(results, artifacts, current_jd_text())
+            st.session_state["processing"] = False
             df_init = pd.DataFrame(results)
+            live_table.empty()
+            if letter_mode == "top" and not df_init.empty:
+                with st.spinner(f"Generating cover letters and emails for the top {top_n} candidates..."):
+                    letters = generate_letters(
+                        top_candidate_keys(df_init, top_n), artifacts, current_jd_text(),
+                        max_workers=max_parallel, regenerate=regenerate_letters,
+                    )
+                df_init = fill_letters(df_init, letters)
+        st.session_state["batch_metrics"] = batch_metrics.snapshot()
+        if not df_init.empty:
+            reused_count = int(df_init["Reused"].sum())
+            st.info(f"♻️ Reused {reused_count} previously processed resume(s), processed {len(df_init) - reused_count} new or changed.")
         st.session_state["interim_results"] = df_init.copy()
-        st.session_state["loc_done"] = False
+        if not df_init.empty:
+            saved_total = int(df_init["Tokens Saved"].sum())
+            if saved_total:
+                st.caption(
+                    f"Compaction removed about {saved_total:,} input tokens "
+                    f"({saved_total / len(df_init):,.0f} per resume) before prompting."
+                )
+            # Tokens as reported by Gemini for this batch: the combined call vs the per-field prompts
+            usage = call_token_usage(batch_metrics)
+            if usage["combined"]["calls"] or usage["per_field"]["calls"]:
+                st.caption(
+                    f"Gemini tokens (in/out): {usage['combined']['input']:,}/{usage['combined']['output']:,} "
+                    f"in {usage['combined']['calls']} combined call(s), "
+                    f"{usage['per_field']['input']:,}/{usage['per_field']['output']:,} "
+                    f"in {usage['per_field']['calls']} per-field call(s)."
+                )
+        failed = df_init[df_init["Error"] != ""] if not df_init.empty else df_init
+        if not failed.empty:
+            st.warning(f"{len(failed)} resume(s) could not be processed:")
+            st.dataframe(failed[["Resume File", "Error"]])
 
 # ---------- Manual Location‑Score Edit ----------
 if st.session_state["interim_results"] is not None:
@@ -221,18 +580,24 @@ if st.session_state["interim_results"] is not None:
     st.subheader("🔄 Edit Location Score")
     if not df_init.empty:
         st.markdown("You can edit the 'Location Score' column below if you wish to change it manually.")
-        edited_scores = []
-        for idx, row in df_init.iterrows():
-            new_score = st.number_input(
-                f"Location Score for {row['Resume File']} (Current: {row['Location Score']}, Location: {row['Candidate Location']})",
-                min_value=0.0,
-                max_value=1.0,
-                value=float(row['Location Score']),
-                step=0.01,
-                key=f"loc_score_{idx}",
-            )
-            edited_scores.append(new_score)
+        # One grid for the whole batch; edits are kept per batch (the key follows its artifact keys)
+        edited = st.data_editor(
+            df_init[["Resume File", "Candidate Location", "Location Score"]],
+            column_config={
+                "Location Score": st.column_config.NumberColumn(min_value=0.0, max_value=1.0, step=0.01),
+            },
+            disabled=["Resume File", "Candidate Location"],
+            hide_index=True,
+            key="loc_scores_" + content_key(*df_init["Artifact Key"]),
+        )
         if st.button("✅ Done Editing Location Scores"):
+            edited_scores = edited["Location Score"].fillna(0.0).astype(float).tolist()
+            # Only the cells the recruiter changed become overrides; the rest keep following the model
+            st.session_state["location_overrides"].update(
+                (key, new)
+                for key, old, new in zip(df_init["Artifact Key"], df_init["Location Score"], edited_scores)
+                if new != old
+            )
             df_init["Location Score"] = edited_scores
             st.session_state["loc_done"] = True
             st.session_state["interim_results"] = df_init.copy()
@@ -243,17 +608,88 @@ if st.session_state.get("loc_done", False):
     # No embeddings/cosine/projection/scaling
     text_cols = [
         "Resume File", "Job Description", "Candidate Location", "Cover Letter", "Email", "email_id", "contact_number", "Days Available", "Batch",
-        "Resume_Keywords", "weighted_score"
+        "Resume_Keywords", "weighted_score", "Keyword Matches", "Error", "Artifact Key"
     ]
+    if "Keyword Evidence" in df_final.columns and df_final["Keyword Evidence"].astype(bool).any():
+        text_cols.insert(text_cols.index("Keyword Matches") + 1, "Keyword Evidence")
+    if "Semantic Similarity" in df_final.columns:
+        text_cols.insert(text_cols.index("weighted_score") + 1, "Semantic Similarity")
     df_final = df_final[text_cols]
-    df_final = df_final.sort_values("weighted_score", ascending=False).reset_index(drop=True)
-    st.subheader("🔎 Final Results (Sorted by Weighted Score)")
-    st.dataframe(df_final)
-    out_path = os.path.join(tempfile.gettempdir(), "final_results.xlsx")
-    df_final.to_excel(out_path, index=False)
-    with open(out_path, "rb") as f:
-        st.download_button(
-            "📥 Download Excel Results",
-            f,
-            file_name="final_results.xlsx",
+
+    # Re-rank the processed pool for a different priority selection, no LLM calls
+    engine = st.session_state["ranking_engine"]
+    if engine is None or len(engine) != len(df_final):
+        engine = RankingEngine.from_column(st.session_state["interim_results"]["Matched JD Keywords"])
+        st.session_state["ranking_engine"] = engine
+    if len(engine):
+        with st.expander("⚖️ Re-rank with different keyword priorities"):
+            all_keywords = st.session_state["jd_keywords"] or []
+            rerank_high = st.multiselect(
+                "HIGH priority", all_keywords,
+                default=[k for k in st.session_state["high_priority"] if k in all_keywords],
+                key="rerank_high",
+            )
+            medium_options = [k for k in all_keywords if k not in rerank_high]
+            rerank_medium = st.multiselect(
+                "MEDIUM priority", medium_options,
+                default=[k for k in st.session_state["medium_priority"] if k in medium_options],
+                key="rerank_medium",
+            )
+            rerank_low = [k for k in all_keywords if k not in rerank_high and k not in rerank_medium]
+            st.write("**Low Priority:**", rerank_low)
+        # The scores of the processing step stand unless the priorities were changed here
+        scored_with = (set(st.session_state["high_priority"]), set(st.session_state["medium_priority"]))
+        if (set(rerank_high), set(rerank_medium)) != scored_with:
+            df_final["weighted_score"] = engine.scores(rerank_high, rerank_medium, rerank_low)
+
+    sort_columns = ["weighted_score"]
+    if "Semantic Similarity" in df_final.columns:
+        sort_label = st.radio(
+            "Sort by", ["Weighted score", "Semantic similarity"], horizontal=True, key="sort_by",
         )
+        # The other column breaks ties
+        sort_columns = ["weighted_score", "Semantic Similarity"]
+        if sort_label == "Semantic similarity":
+            sort_columns.reverse()
+    df_final = df_final.sort_values(sort_columns, ascending=False).reset_index(drop=True)
+    st.subheader(f"🔎 Final Results (Sorted by {sort_columns[0].replace('_', ' ').title()})")
+
+    # Letters are only generated for candidates the recruiter actually looks at
+    with st.expander("✉️ Cover letter & outreach email"):
+        interim = st.session_state["interim_results"]
+        candidates = df_final[df_final["Error"] == ""]
+        if not candidates.empty and jd:
+            pick = st.selectbox(
+                "Candidate", range(len(candidates)),
+                format_func=lambda i: f"{candidates.iloc[i]['Resume File']} (score {candidates.iloc[i]['weighted_score']})",
+                key="letter_candidate",
+            )
+            key = candidates.iloc[pick]["Artifact Key"]
+            col_one, col_top = st.columns(2)
+            generate_n = col_top.number_input("Top N", min_value=1, max_value=1000, value=10, key="lazy_top_n")
+            keys = []
+            if col_one.button("Generate for this candidate"):
+                keys = [key]
+            if col_top.button("Generate for the top N"):
+                keys = list(candidates["Artifact Key"].head(int(generate_n)))
+            if keys:
+                with st.spinner("Generating with Gemini..."):
+                    letters = generate_letters(keys, st.session_state["resume_artifacts"], current_jd_text())
+                st.session_state["interim_results"] = fill_letters(interim.copy(), letters)
+                df_final = fill_letters(df_final, letters)
+            row = df_final[df_final["Artifact Key"] == key].iloc[0]
+            if row["Cover Letter"]:
+                st.markdown("**Cover Letter**")
+                st.text(row["Cover Letter"])
+                st.markdown("**Email**")
+                st.text(row["Email"])
+            else:
+                st.caption("Not generated yet.")
+
+    df_final = df_final.drop(columns=["Artifact Key"])
+    st.dataframe(df_final)
+    # Built in memory on request, so sessions never share (or overwrite) a file
+    render_export([("Results", df_final)], "final_results", "final_export")
+
+render_cache_stats()
+render_batch_metrics()
@@ -0,0 +1,98 @@
+"""
+Data work of one Streamlit rerun of the Final Results section for a batch of
+synthetic candidates: before (the Excel file rewritten on every rerun) and
+after (a content signature per rerun; the export is only built on request,
+in memory). Widget rendering itself is not included.
+
+Example:
+    python bench_app_rerun.py --candidates 1000 --reruns 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from ranking import KEYWORD_SEPARATOR, RankingEngine
+from results_export import available_formats, export_frame, frame_signature
+from synthetic_corpus import LOCATIONS, SKILLS
+
+
+def synthetic_results(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        city, state = rng.choice(LOCATIONS)
+        keywords = rng.sample(SKILLS, k=12)
+        rows.append({
+            "Resume File": f"resume_{i:05d}.pdf",
+            "Job Description": "jd.pdf",
+            "Candidate Location": f"{city}, {state}",
+            "Cover Letter": "Dear Hiring Manager, " + " ".join(rng.choices(SKILLS, k=300)),
+            "Email": "Hello, " + " ".join(rng.choices(SKILLS, k=120)),
+            "email_id": f"candidate{i}@example.com",
+            "contact_number": f"+91 90000 {i:05d}",
+            "Days Available": rng.randrange(1, 90),
+            "Batch": "Batch 1",
+            "Location Score": rng.choice([0.0, 0.1]),
+            "Resume_Keywords": ", ".join(keywords),
+            "weighted_score": 0,
+            "Keyword Matches": "; ".join(keywords[:6]),
+            "Matched JD Keywords": KEYWORD_SEPARATOR.join(keywords[:6]),
+            "Error": "",
+            "Artifact Key": f"{i:064x}:jd",
+        })
+    return pd.DataFrame(rows)
+
+
+def final_table(results, engine, high, medium, low):
+    """The Final Results table as app.py builds it on every rerun."""
+    df = results.drop(columns=["Matched JD Keywords"]).copy()
+    df["weighted_score"] = engine.scores(high, medium, low)
+    return df.sort_values(["weighted_score"], ascending=False).reset_index(drop=True).drop(columns=["Artifact Key"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-rerun cost of the results section")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    results = synthetic_results(args.candidates)
+    engine = RankingEngine.from_column(results["Matched JD Keywords"])
+    high, medium, low = SKILLS[:4], SKILLS[4:9], SKILLS[9:]
+    out_path = os.path.join(tempfile.gettempdir(), "bench_final_results.xlsx")
+
+    def before():
+        df = final_table(results, engine, high, medium, low)
+        df.to_excel(out_path, index=False)
+
+    def after():
+        df = final_table(results, engine, high, medium, low)
+        frame_signature(df)
+
+    for name, rerun in (("before", before), ("after", after)):
+        timings = []
+        for _ in range(args.reruns if name == "after" else max(1, args.reruns // 5)):
+            start = time.perf_counter()
+            rerun()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{name:<7} {args.candidates} candidates | median rerun {timings[len(timings) // 2] * 1000:.1f} ms")
+
+    df = final_table(results, engine, high, medium, low)
+    for fmt in available_formats():
+        start = time.perf_counter()
+        data = export_frame(df, fmt)
+        print(f"export  {fmt:<8} {(time.perf_counter() - start) * 1000:.0f} ms, {len(data) / 1024 / 1024:.1f} MB "
+              "(once, on request)")
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
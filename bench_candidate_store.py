@@ -0,0 +1,77 @@
+"""
+Query latency of the candidate store (candidate_store.CandidateStore) for a
+pool of synthetic candidates.
+
+Example:
+    python bench_candidate_store.py --candidates 50000 --queries 20
+
+Each candidate gets a few of the common synthetic_corpus.SKILLS plus
+keywords from a long tail, as free-form Gemini keywords would be; every
+query is a random JD of High/Medium/Low keywords.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from candidate_store import CandidateStore
+from synthetic_corpus import LOCATIONS, SKILLS
+
+
+def synthetic_candidates(n, keywords_per_candidate=25, tail_size=5000, seed=0):
+    rng = random.Random(seed)
+    tail = [f"skill {i}" for i in range(tail_size)]
+    for i in range(n):
+        common = rng.sample(SKILLS, k=min(len(SKILLS), keywords_per_candidate // 2))
+        keywords = common + rng.sample(tail, k=keywords_per_candidate - len(common))
+        city, state = rng.choice(LOCATIONS)
+        analysis = {
+            "keywords": keywords,
+            "email_id": f"candidate{i}@example.com",
+            "contact_number": f"+91 90000 {i:05d}",
+            "Candidate Location": f"{city}, {state}",
+            "Location Score": 0.0,
+        }
+        yield f"{i:064x}", f"resume_{i:06d}.pdf", f"Synthetic resume {i}", analysis
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Candidate store query benchmark")
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--keywords", type=int, default=25, help="Keywords per candidate")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100, help="Candidates returned per query")
+    parser.add_argument("--db", default=None, help="Store file (default: a temporary one)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = CandidateStore(args.db or os.path.join(tmpdir, "candidates.sqlite3"))
+        if len(store) < args.candidates:
+            start = time.perf_counter()
+            batch = []
+            for record in synthetic_candidates(args.candidates, args.keywords):
+                batch.append(record)
+                if len(batch) == 1000:
+                    store.add_many(batch)
+                    batch = []
+            store.add_many(batch)
+            print(f"Stored {args.candidates} candidates in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        rng = random.Random(1)
+        timings = []
+        for _ in range(args.queries):
+            jd = rng.sample(SKILLS, k=15) + [f"skill {rng.randrange(5000)}" for _ in range(5)]
+            start = time.perf_counter()
+            rows = store.search(jd[:4], jd[4:9], jd[9:], limit=args.limit)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{len(store)} candidates | {args.queries} queries | "
+              f"median {timings[len(timings) // 2] * 1000:.1f} ms | max {timings[-1] * 1000:.1f} ms | "
+              f"{len(rows)} rows per query")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark: measures how long importing the app modules takes in a
+fresh interpreter, using `python -X importtime`.
+
+Examples:
+    python bench_import_time.py                       # app and pipeline against the committed budget
+    python bench_import_time.py --save-baseline       # record the current timings
+    python bench_import_time.py --baseline other.json --tolerance 0.25
+    python bench_import_time.py pipeline --max-ms 500
+
+Exits with status 1 when a module is slower than --max-ms (DEFAULT_MAX_MS
+unless given), or more than --tolerance slower than its timing in the
+baseline file (import_baseline.json next to this script unless given).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["app", "pipeline"]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+
+# Hard limit per module (ms); streamlit and pandas make up most of `import app`
+DEFAULT_MAX_MS = 2500
+
+# "import time:      self [us] |  cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module):
+    """
+    Imports `module` in a new interpreter and returns (total_us, imports),
+    where imports maps every imported package to its cumulative time in µs.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    # Streamlit warns about running outside `streamlit run`; the import still completes
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    imports = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        cumulative, name = int(m.group(2)), m.group(4)
+        if name == "site" and not m.group(3):
+            # Interpreter start-up, not caused by the module under test
+            imports.clear()
+            continue
+        imports[name] = max(imports.get(name, 0), cumulative)
+        if name == module:
+            total = cumulative
+    return total, imports
+
+
+def measure(module, repeats):
+    """Median cumulative import time of `module` (µs) and its heaviest imports."""
+    runs = [import_times(module) for _ in range(repeats)]
+    total = statistics.median(t for t, _ in runs)
+    heaviest = sorted(((name, us) for name, us in runs[-1][1].items() if name != module),
+                      key=lambda kv: kv[1], reverse=True)
+    return total, heaviest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time (cold start) benchmark")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS,
+                        help="Fail when a module takes longer (0 = no limit)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON file with previous timings to compare against (skipped if missing)")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown over the baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="Write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    failures = []
+    for module in args.modules:
+        total_us, heaviest = measure(module, max(1, args.repeats))
+        ms = total_us / 1000
+        results[module] = round(ms, 1)
+        print(f"{module}: {ms:.1f} ms (median of {args.repeats})")
+        for name, us in heaviest[:args.top]:
+            print(f"    {name:<50} {us / 1000:>8.1f} ms")
+        if args.max_ms and ms > args.max_ms:
+            failures.append(f"{module} took {ms:.1f} ms (limit {args.max_ms:g} ms)")
+        if module in baseline and ms > baseline[module] * (1 + args.tolerance):
+            failures.append(f"{module} took {ms:.1f} ms, baseline {baseline[module]:.1f} ms "
+                            f"(+{ms / baseline[module] - 1:.0%})")
+
+    if args.save_baseline:
+        saved = {}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            # Modules not measured in this run keep their recorded timing
+            json.dump(dict(saved, **results), f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}")
+    for failure in failures:
+        print("REGRESSION: " + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
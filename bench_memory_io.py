@@ -0,0 +1,109 @@
+"""
+Peak memory and I/O per document: the file-based conversion chain
+(file_to_md -> flatten_tables -> read_text_from_md in a temp directory)
+against the in-memory one (extractors.extract_text).
+
+Example:
+    python bench_memory_io.py resumes/ --backend auto --output memory_io.json
+
+Peak memory is the tracemalloc peak of Python allocations; I/O is the
+number of bytes passed to read/write system calls (/proc/self/io, so Linux
+only; reported as null elsewhere).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from extractors import DEFAULT_BACKEND, extract_text
+from functions3 import file_to_md, flatten_tables, read_text_from_md
+
+
+def _io_counters():
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def via_files(name, data, backend):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        md_path = file_to_md((name, data), tmpdir, backend)
+        if md_path is None:
+            return ""
+        return read_text_from_md(flatten_tables(md_path, tmpdir))
+
+
+def via_memory(name, data, backend):
+    return extract_text(name, data, backend) or ""
+
+
+PIPELINES = {"files": via_files, "memory": via_memory}
+
+
+def measure(pipeline, name, data, backend):
+    """Runs one conversion and returns its wall time, peak memory and I/O."""
+    io_before = _io_counters()
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = PIPELINES[pipeline](name, data, backend)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    io_after = _io_counters()
+    return {
+        "file": name,
+        "pipeline": pipeline,
+        "bytes": len(data),
+        "chars": len(text),
+        "seconds": round(seconds, 4),
+        "peak_kb": round(peak / 1024, 1),
+        "read_kb": round((io_after[0] - io_before[0]) / 1024, 1) if io_before else None,
+        "written_kb": round((io_after[1] - io_before[1]) / 1024, 1) if io_before else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-document peak memory and I/O benchmark")
+    parser.add_argument("paths", nargs="+", help="PDF/DOCX files or folders")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND)
+    parser.add_argument("--output", default=None, help="Also write the rows as JSON")
+    args = parser.parse_args(argv)
+
+    files = []
+    for arg in args.paths:
+        if os.path.isdir(arg):
+            files += [os.path.join(arg, n) for n in sorted(os.listdir(arg)) if n.endswith((".pdf", ".docx"))]
+        else:
+            files.append(arg)
+
+    rows = []
+    for path in files:
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(path)
+        # Warm-up so one-off imports are not charged to the first pipeline
+        via_memory(name, data, args.backend)
+        for pipeline in PIPELINES:
+            rows.append(measure(pipeline, name, data, args.backend))
+
+    for pipeline in PIPELINES:
+        mine = [r for r in rows if r["pipeline"] == pipeline]
+        if not mine:
+            continue
+        avg = lambda field: sum(r[field] or 0 for r in mine) / len(mine)
+        print(f"{pipeline:<7} {len(mine)} docs | {avg('seconds') * 1000:8.1f} ms | peak {avg('peak_kb'):8.1f} KB | "
+              f"read {avg('read_kb'):8.1f} KB | written {avg('written_kb'):8.1f} KB (mean per document)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "rows": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
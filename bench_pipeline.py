@@ -0,0 +1,168 @@
+"""
+Offline per-stage benchmark of the screening pipeline.
+
+Runs each stage on a synthetic corpus (see synthetic_corpus.py) at several
+batch sizes, with Gemini replaced by fake_llm.FakeChatModel, and writes the
+timings as JSON so runs can be compared across versions.
+
+Example:
+    python bench_pipeline.py --sizes 10,100,1000 --llm-latency 0.2 --output bench_results.json
+
+With --compare-calls the LLM stage runs once with the combined call and once
+with separate prompts, and the input/output tokens recorded for each (the
+llm_tokens metrics) are written next to the timings.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+from fake_llm import FakeChatModel
+from functions3 import file_to_md, flatten_tables, read_text_from_md
+from instrumentation import in_current_scope, metrics
+from llm_cache import LLMResponseCache
+from pipeline import (
+    MAX_PARALLEL_RESUMES, analyse_resume, call_token_usage, compute_weighted_score, extract_keywords_from_text
+)
+from synthetic_corpus import generate_corpus
+
+DEFAULT_SIZES = "10,100,1000,5000"
+STAGES = ("file_to_md", "flatten_md_tables", "read_text_from_md", "llm_calls", "compute_weighted_score")
+
+
+def _timed(fn, items):
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return time.perf_counter() - start, out
+
+
+def run_stages(paths, jd_text, high, medium, low, backend, workers, combined, stages=STAGES):
+    """
+    Runs the stages on `paths` in order, each on the previous stage's output,
+    and returns {stage: seconds}.
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # One sub-directory per file so same-named documents cannot collide
+        def convert(indexed):
+            i, path = indexed
+            work_dir = os.path.join(tmpdir, str(i))
+            os.makedirs(work_dir)
+            return file_to_md(path, work_dir, backend)
+
+        timings["file_to_md"], md_paths = _timed(convert, enumerate(paths))
+        md_paths = [p for p in md_paths if p]
+        timings["flatten_md_tables"], flat_paths = _timed(
+            lambda p: flatten_tables(p, os.path.dirname(p)), md_paths)
+        timings["read_text_from_md"], texts = _timed(read_text_from_md, flat_paths)
+
+    keyword_lists = []
+    if "llm_calls" in stages:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            analyses = list(pool.map(
+                in_current_scope(lambda text: analyse_resume(text, jd_text, combined=combined, include_letters=False)),
+                texts))
+        timings["llm_calls"] = time.perf_counter() - start
+        keyword_lists = [a["keywords"] for a in analyses]
+
+    if "compute_weighted_score" in stages:
+        timings["compute_weighted_score"], _ = _timed(
+            lambda kws: compute_weighted_score(kws, high, medium, low), keyword_lists)
+    return {stage: timings[stage] for stage in stages if stage in timings}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline per-stage pipeline benchmark")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated batch sizes")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "ta_buddy_bench_corpus"),
+                        help="Directory of the synthetic corpus (generated if missing, reused otherwise)")
+    parser.add_argument("--formats", default="pdf,docx")
+    parser.add_argument("--length", choices=["short", "medium", "long", "mixed"], default="mixed")
+    parser.add_argument("--table-density", type=float, default=0.3)
+    parser.add_argument("--backend", default="fast", help="Extraction backend (fast, spire, auto)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake Gemini call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=MAX_PARALLEL_RESUMES, help="Resumes analysed in parallel")
+    parser.add_argument("--separate-calls", action="store_true", help="Four prompts per resume instead of one")
+    parser.add_argument("--compare-calls", action="store_true",
+                        help="Run the LLM stage both ways and record the tokens of each")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    formats = tuple(args.formats.split(","))
+    print(f"Preparing corpus of {sizes[-1]} resumes in {args.corpus}...", file=sys.stderr)
+    paths, jds = generate_corpus(args.corpus, sizes[-1], formats, args.length, args.table_density)
+
+    fake = FakeChatModel(latency=args.llm_latency, jitter=args.llm_jitter)
+    utils.set_llm_model(fake)
+    modes = ("combined", "separate") if args.compare_calls else ("separate" if args.separate_calls else "combined",)
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                md = file_to_md(jds[formats[0]], tmpdir, args.backend)
+                jd_text = read_text_from_md(flatten_tables(md, tmpdir))
+            for mode in modes:
+                # A fresh response cache per size and mode, so every LLM call really goes to the fake model
+                utils.llm_cache = LLMResponseCache(os.path.join(cache_dir, f"llm_{size}_{mode}.sqlite3"))
+                jd_keywords = extract_keywords_from_text(jd_text)
+                high, medium, low = jd_keywords[0::3], jd_keywords[1::3], jd_keywords[2::3]
+
+                calls_before = fake.calls
+                with metrics.scope() as run_metrics:
+                    timings = run_stages(paths[:size], jd_text, high, medium, low, args.backend,
+                                         args.workers, mode == "combined")
+                for stage, seconds in timings.items():
+                    results.append({
+                        "stage": stage,
+                        "mode": mode,
+                        "batch_size": size,
+                        "seconds": round(seconds, 4),
+                        "ms_per_item": round(seconds * 1000 / size, 3),
+                        "items_per_second": round(size / seconds, 1) if seconds else None,
+                    })
+                    print(f"{stage:<24} {mode:<9} n={size:<6} {seconds:>9.3f}s "
+                          f"{seconds * 1000 / size:>9.3f} ms/item", file=sys.stderr)
+                results.append({"stage": "llm_call_count", "mode": mode, "batch_size": size,
+                                "calls": fake.calls - calls_before})
+                usage = call_token_usage(run_metrics)
+                results.append({"stage": "llm_tokens", "mode": mode, "batch_size": size, **usage})
+                print(f"{'llm_tokens':<24} {mode:<9} n={size:<6} "
+                      + "  ".join(f"{group}: {u['input']:,} in / {u['output']:,} out" for group, u in usage.items()),
+                      file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Throughput of the rate limiter against a fake Gemini model that enforces a
+quota (sliding-window requests and tokens per period, plus a cap on
+concurrent calls) and answers 429 beyond it.
+
+Example:
+    python bench_rate_limit.py --rpm 600 --period 10 --threads 32 --duration 30
+
+The quota period is shortened (here to 10 s) so the steady state is reached
+quickly; "unlimited" runs the same load without the limiter for comparison.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from fake_llm import FakeChatModel
+from instrumentation import in_current_scope, metrics
+from rate_limiter import GeminiRateLimiter
+
+
+def run(mode, args):
+    fake = FakeChatModel(latency=args.latency, jitter=args.jitter, rpm_limit=args.rpm, tpm_limit=args.tpm,
+                         max_concurrent=args.max_concurrent, quota_period=args.period)
+    limiter = GeminiRateLimiter(rpm=args.rpm, tpm=args.tpm, max_concurrency=args.concurrency,
+                                period=args.period, backoff_base=args.backoff, backoff_cap=args.period)
+    deadline = time.monotonic() + args.duration
+    done = []
+    failed = []
+    lock = threading.Lock()
+
+    def worker(n):
+        i = 0
+        while time.monotonic() < deadline:
+            prompt = f"Extract the current city or state location. Worker {n}, request {i}."
+            i += 1
+            try:
+                if mode == "limited":
+                    limiter.invoke(fake, prompt, site="bench")
+                else:
+                    fake.invoke(prompt)
+                outcome = done
+            except Exception:
+                outcome = failed
+            with lock:
+                outcome.append(time.monotonic())
+
+    with metrics.scope() as recorded:
+        start = time.monotonic()
+        threads = [threading.Thread(target=in_current_scope(worker), args=(n,)) for n in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+    # Steady state: the second half of the run
+    half = start + elapsed / 2
+    steady = sum(1 for t in done if t >= half) / (elapsed / 2) * args.period
+    return {
+        "mode": mode,
+        "succeeded": len(done),
+        "failed": len(failed),
+        "throttled": fake.throttled,
+        "retries": recorded.counter_total("llm_retries"),
+        "steady_requests_per_period": round(steady, 1),
+        "quota_used": round(steady / args.rpm, 3) if args.rpm else None,
+        "token_quota_used": round(fake.tokens / elapsed * args.period / args.tpm, 3) if args.tpm else None,
+        "final_concurrency_limit": int(limiter.concurrency.limit) if mode == "limited" else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate limiter benchmark against a throttling fake model")
+    parser.add_argument("--rpm", type=int, default=600, help="Requests per period allowed by the fake")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per period allowed by the fake (0 = no limit)")
+    parser.add_argument("--max-concurrent", type=int, default=20, help="Concurrent calls allowed by the fake")
+    parser.add_argument("--period", type=float, default=10.0, help="Quota window in seconds")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--threads", type=int, default=32, help="Callers")
+    parser.add_argument("--concurrency", type=int, default=32, help="Upper bound of the limiter's concurrency")
+    parser.add_argument("--backoff", type=float, default=0.25, help="Base of the retry backoff (seconds)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--modes", default="unlimited,limited")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for mode in args.modes.split(","):
+        result = run(mode, args)
+        results.append(result)
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
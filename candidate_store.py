@@ -0,0 +1,307 @@
+"""
+Persistent store of processed candidates, shared across sessions and JDs.
+
+Each resume's extracted text, keywords, contact details and location are
+kept in SQLite, keyed by the content hash of the resume file. An inverted
+index (keyword -> candidates) lets the priority keywords of a new JD be
+matched against the whole historical pool without any conversion or LLM
+calls:
+
+    store = CandidateStore()
+    store.search(high, medium, low, limit=50)
+
+Cover letters and emails depend on the JD and are not stored.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from keyword_matcher import PRIORITY_WEIGHTS
+from ranking import KEYWORD_SEPARATOR
+
+# SQLite file holding the candidate pool
+DEFAULT_DB_PATH = os.getenv(
+    "TA_BUDDY_CANDIDATE_DB",
+    os.path.join(os.path.expanduser("~"), ".cache", "ta_buddy", "candidates.sqlite3"),
+)
+
+
+def normalize_keyword(keyword):
+    return keyword.strip().lower()
+
+
+class CandidateStore:
+    """
+    Candidate pool in SQLite with an inverted keyword index.
+
+    `postings` holds one (keyword, candidate) pair per distinct resume
+    keyword, clustered by keyword, so a search only reads the postings of
+    the JD's keywords. Postings lists read once are kept in memory until the
+    store changes, so repeated searches do not touch the postings table.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._signature = None
+        self._postings_cache = {}
+
+    def _connect(self):
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS candidates ("
+                    " id INTEGER PRIMARY KEY,"
+                    " content_hash TEXT NOT NULL UNIQUE,"
+                    " name TEXT NOT NULL,"
+                    " text TEXT NOT NULL,"
+                    " keywords TEXT NOT NULL,"
+                    " email_id TEXT,"
+                    " contact_number TEXT,"
+                    " location TEXT,"
+                    " location_score REAL,"
+                    " updated REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS postings ("
+                    " keyword TEXT NOT NULL,"
+                    " candidate_id INTEGER NOT NULL,"
+                    " PRIMARY KEY (keyword, candidate_id)) WITHOUT ROWID"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS postings_candidate ON postings(candidate_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS candidates_updated ON candidates(updated)")
+                conn.commit()
+                self._initialized = True
+            return conn
+
+    # ----------- Writing -----------
+
+    def add(self, content_hash, name, text, analysis):
+        """Stores (or refreshes) one candidate from a pipeline.analyse_resume() result."""
+        self.add_many([(content_hash, name, text, analysis)])
+
+    def add_many(self, records):
+        """
+        Stores (content_hash, name, text, analysis) records in one transaction.
+        Keywords that are only the JD phrases found in the resume (phrase
+        matching, analysis["keyword_source"] == "jd phrases") are specific to
+        that JD and are not stored: a known candidate keeps its keywords, a
+        new one is stored without any.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                for content_hash, name, text, analysis in records:
+                    own_keywords = analysis.get("keyword_source") != "jd phrases"
+                    keywords = []
+                    if own_keywords:
+                        keywords = sorted(set(
+                            normalize_keyword(k) for k in analysis.get("keywords", []) if k.strip()
+                        ))
+                    details = (
+                        analysis.get("email_id", ""), analysis.get("contact_number", ""),
+                        analysis.get("Candidate Location", ""), analysis.get("Location Score", 0), now,
+                    )
+                    row = conn.execute(
+                        "SELECT id FROM candidates WHERE content_hash = ?", (content_hash,)
+                    ).fetchone()
+                    if row is None:
+                        candidate_id = conn.execute(
+                            "INSERT INTO candidates (content_hash, name, text, keywords, email_id, contact_number,"
+                            " location, location_score, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (content_hash, name, text, json.dumps(keywords)) + details,
+                        ).lastrowid
+                    elif not own_keywords:
+                        conn.execute(
+                            "UPDATE candidates SET name = ?, text = ?, email_id = ?, contact_number = ?,"
+                            " location = ?, location_score = ?, updated = ? WHERE id = ?",
+                            (name, text) + details + (row[0],),
+                        )
+                        continue
+                    else:
+                        candidate_id = row[0]
+                        conn.execute(
+                            "UPDATE candidates SET name = ?, text = ?, keywords = ?, email_id = ?,"
+                            " contact_number = ?, location = ?, location_score = ?, updated = ? WHERE id = ?",
+                            (name, text, json.dumps(keywords)) + details + (candidate_id,),
+                        )
+                        conn.execute("DELETE FROM postings WHERE candidate_id = ?", (candidate_id,))
+                    conn.executemany(
+                        "INSERT INTO postings (keyword, candidate_id) VALUES (?, ?)",
+                        [(k, candidate_id) for k in keywords],
+                    )
+        finally:
+            conn.close()
+
+    def remove(self, content_hash):
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT id FROM candidates WHERE content_hash = ?", (content_hash,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM postings WHERE candidate_id = ?", (row[0],))
+                    conn.execute("DELETE FROM candidates WHERE id = ?", (row[0],))
+        finally:
+            conn.close()
+
+    # ----------- Reading -----------
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+        finally:
+            conn.close()
+
+    def __contains__(self, content_hash):
+        return self.get(content_hash) is not None
+
+    def get(self, content_hash):
+        """The stored candidate as a dict (with "text" and the keyword list), or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT content_hash, name, text, keywords, email_id, contact_number, location,"
+                " location_score, updated FROM candidates WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            "content_hash": row[0], "name": row[1], "text": row[2], "keywords": json.loads(row[3]),
+            "email_id": row[4], "contact_number": row[5], "location": row[6],
+            "location_score": row[7], "updated": row[8],
+        }
+
+    def _postings(self, conn, keywords):
+        """
+        Candidate ids per keyword as numpy arrays. Lists read from SQLite are
+        kept in memory until the store changes (in this or another process).
+        """
+        import numpy as np
+        signature = conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(MAX(updated), 0) FROM candidates"
+        ).fetchone()
+        with self._lock:
+            if signature != self._signature:
+                self._signature = signature
+                self._postings_cache = {}
+            cache = self._postings_cache
+        for keyword in keywords:
+            if keyword not in cache:
+                cache[keyword] = np.fromiter(
+                    (i for (i,) in conn.execute("SELECT candidate_id FROM postings WHERE keyword = ?", (keyword,))),
+                    dtype=np.int64,
+                )
+        return {keyword: cache[keyword] for keyword in keywords}, signature[1]
+
+    def search(self, high_kw, med_kw, low_kw, limit=100, min_score=1):
+        """
+        Ranks the stored candidates for a JD's priority keywords (exact
+        keyword match, weighted with PRIORITY_WEIGHTS as in RankingEngine).
+        Scores are accumulated from the postings of the JD keywords only.
+
+        Returns:
+            list: result rows (dicts) of the best `limit` candidates scoring
+            at least `min_score`, best first
+        """
+        import numpy as np
+        weights = {}
+        for priority, keywords in (("high", high_kw), ("medium", med_kw), ("low", low_kw)):
+            for keyword in keywords:
+                if keyword.strip():
+                    keyword = normalize_keyword(keyword)
+                    weights[keyword] = max(weights.get(keyword, 0), PRIORITY_WEIGHTS[priority])
+        if not weights or limit < 1:
+            return []
+        conn = self._connect()
+        try:
+            postings, max_id = self._postings(conn, weights)
+            scores = np.zeros(max_id + 1, dtype=np.int32)
+            for keyword, ids in postings.items():
+                scores[ids] += weights[keyword]
+            best = np.flatnonzero(scores >= max(1, min_score))
+            if len(best) > limit:
+                best = best[np.argpartition(-scores[best], limit - 1)[:limit]]
+            # Highest score first, then in insertion order
+            best = best[np.lexsort((best, -scores[best]))]
+            details = {}
+            if len(best):
+                ids = [int(i) for i in best]
+                details = {
+                    row[0]: row[1:] for row in conn.execute(
+                        "SELECT id, content_hash, name, keywords, email_id, contact_number, location,"
+                        f" location_score, updated FROM candidates WHERE id IN ({','.join('?' * len(ids))})",
+                        ids,
+                    )
+                }
+        finally:
+            conn.close()
+        rows = []
+        for candidate_id in best:
+            content_hash, name, keywords, email_id, contact_number, location, location_score, updated = \
+                details[int(candidate_id)]
+            keywords = json.loads(keywords)
+            rows.append({
+                "Resume File": name,
+                "Candidate Location": location,
+                "email_id": email_id,
+                "contact_number": contact_number,
+                "Location Score": location_score,
+                "Resume_Keywords": ", ".join(keywords),
+                "weighted_score": int(scores[candidate_id]),
+                "Matched JD Keywords": KEYWORD_SEPARATOR.join(k for k in keywords if k in weights),
+                "Content Hash": content_hash,
+                "Last Processed": time.strftime("%Y-%m-%d %H:%M", time.localtime(updated)),
+            })
+        return rows
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            candidates = conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+            keywords = conn.execute("SELECT COUNT(DISTINCT keyword) FROM postings").fetchone()[0]
+        finally:
+            conn.close()
+        return {"candidates": candidates, "keywords": keywords}
+
+
+def _read_keywords(path):
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Search the candidate store with a JD's priority keywords")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--high", help="File with HIGH priority keywords, one per line")
+    parser.add_argument("--medium", help="File with MEDIUM priority keywords, one per line")
+    parser.add_argument("--low", help="File with LOW priority keywords, one per line")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    store = CandidateStore(args.db)
+    rows = store.search(_read_keywords(args.high), _read_keywords(args.medium), _read_keywords(args.low),
+                        limit=args.top)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""
+Headless batch mode: screens a folder of resumes against a job description
+and streams one JSON line per resume to the output file.
+
+Example:
+    python cli.py --jd jd.pdf --resumes "resumes/*.pdf" --high high.txt --medium medium.txt --output results.jsonl
+
+Keyword files hold one keyword per line. When --low is omitted, every JD
+keyword (extracted with Gemini) that is not High or Medium is Low priority,
+as in the app. Completed resumes are recorded in a checkpoint file, so
+re-running the same command after an interruption continues where it stopped.
+Resumes that failed (conversion timeout or crash, Gemini error) are written
+to the output with their error but not checkpointed, so a re-run retries
+them; their later line supersedes the error line.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# TA_BUDDY_* settings are read when the modules below are imported
+load_dotenv()
+
+from conversion_pool import DEFAULT_WORKERS
+from instrumentation import metrics, write_metrics
+from keyword_matcher import DEFAULT_THRESHOLD
+from functions3 import file_to_text
+from pipeline import MAX_PARALLEL_RESUMES, extract_jd_keywords, iter_process
+from similarity import add_semantic_similarity
+from candidate_store import DEFAULT_DB_PATH, CandidateStore
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+
+def find_resumes(patterns):
+    """Expands folders and glob patterns into a sorted list of PDF/DOCX paths."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, n) for n in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        paths += [p for p in candidates if p.lower().endswith(RESUME_EXTENSIONS) and os.path.isfile(p)]
+    return sorted(set(paths))
+
+
+def read_keywords(path):
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def trim_partial_line(path):
+    """Drops a half-written last line left behind by an interrupted run."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _append(f, line):
+    f.write(line + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talent Acquisition Buddy batch screening")
+    parser.add_argument("--jd", required=True, help="Job description (PDF/DOCX)")
+    parser.add_argument("--resumes", required=True, nargs="+", help="Resume folders, files or glob patterns")
+    parser.add_argument("--high", help="File with HIGH priority keywords, one per line")
+    parser.add_argument("--medium", help="File with MEDIUM priority keywords, one per line")
+    parser.add_argument("--low", help="File with LOW priority keywords (default: remaining JD keywords)")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL output file (appended to)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--days-available", type=int, default=None, help="Days Available value for every row")
+    parser.add_argument("--workers", type=int, default=MAX_PARALLEL_RESUMES, help="Resumes analysed in parallel")
+    parser.add_argument("--convert-workers", type=int, default=DEFAULT_WORKERS, help="Conversion processes")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Resumes loaded into memory at a time")
+    parser.add_argument("--match-mode", choices=["exact", "fuzzy", "semantic", "phrase"], default="exact",
+                        help="phrase: look the JD keywords and their synonyms up in the resume text "
+                             "(no Gemini keyword extraction)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Fuzzy match threshold")
+    parser.add_argument("--no-letters", action="store_true",
+                        help="Skip cover letters and outreach emails (generate them later for the shortlist)")
+    parser.add_argument("--separate-calls", action="store_true",
+                        help="Use four Gemini prompts per resume instead of one structured call")
+    parser.add_argument("--semantic-similarity", action="store_true",
+                        help="Add a resume vs JD embedding similarity column (rows are then written per chunk)")
+    parser.add_argument("--save-candidates", nargs="?", const=DEFAULT_DB_PATH, default=None, metavar="DB",
+                        help="Also save processed candidates to the candidate store (default file: %(const)s)")
+    parser.add_argument("--metrics", action="append", default=[],
+                        help="Write stage timings, tokens and cache hits to this file at the end "
+                             "(.prom/.txt: Prometheus text format, otherwise JSON); can be repeated")
+    args = parser.parse_args(argv)
+
+    paths = find_resumes(args.resumes)
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+    done = read_checkpoint(checkpoint_path)
+    jd_hash = file_hash(args.jd)
+    todo = [p for p in paths if f"{file_hash(p)}:{jd_hash}" not in done]
+    print(f"{len(paths)} resumes found, {len(paths) - len(todo)} already done, {len(todo)} to process",
+          file=sys.stderr)
+    if not todo:
+        return 0
+
+    high = read_keywords(args.high)
+    medium = [k for k in read_keywords(args.medium) if k not in high]
+    if args.low:
+        low = read_keywords(args.low)
+    else:
+        print("Extracting keywords from job description using Gemini...", file=sys.stderr)
+        low = [k for k in extract_jd_keywords(args.jd) if k not in high and k not in medium]
+
+    trim_partial_line(args.output)
+    processed = 0
+    jd_text = file_to_text(args.jd) if args.semantic_similarity else ""
+    artifacts = {}
+    store = CandidateStore(args.save_candidates) if args.save_candidates else None
+    with open(args.output, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt:
+
+        def write(row):
+            nonlocal processed
+            _append(out, json.dumps(row, ensure_ascii=False, default=str))
+            # The checkpoint is written only once the row is safely on disk, and
+            # only for successes: failed resumes are retried by the next run
+            if not row["Error"]:
+                _append(ckpt, row["Artifact Key"])
+            processed += 1
+            status = "error: " + row["Error"] if row["Error"] else f"score {row['weighted_score']}"
+            print(f"[{processed}/{len(todo)}] {row['Resume File']}: {status}", file=sys.stderr)
+
+        for start in range(0, len(todo), max(1, args.chunk_size)):
+            chunk = todo[start:start + args.chunk_size]
+            pending = []
+            for i, row in iter_process(
+                chunk, args.jd, high, medium, low,
+                days_available_list=[args.days_available] * len(chunk),
+                max_workers=args.workers,
+                convert_workers=args.convert_workers,
+                combined=not args.separate_calls,
+                include_letters=not args.no_letters,
+                match_mode=args.match_mode,
+                match_threshold=args.threshold,
+                artifacts=artifacts,
+                candidate_store=store,
+            ):
+                row["Resume Path"] = chunk[i]
+                if args.semantic_similarity:
+                    pending.append(row)
+                else:
+                    write(row)
+            if pending:
+                # One batched embedding pass per chunk
+                add_semantic_similarity(pending, artifacts, jd_text)
+                for row in pending:
+                    write(row)
+            # Only the current chunk's texts are needed
+            artifacts.clear()
+    for path in args.metrics:
+        write_metrics(path, metrics.snapshot())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
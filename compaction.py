@@ -0,0 +1,247 @@
+"""
+Compaction of resume/JD text before it is put into a prompt.
+
+The flattened markdown coming out of the converters carries image
+placeholders, Spire evaluation banners, page numbers, running headers and
+footers and duplicated table text. compact_text() strips all of that;
+prompt_views() additionally keeps, for each prompt, only the resume sections
+it needs and trims them to a per-prompt token budget (counted as
+`prompt_truncated` in the metrics when it cuts text).
+"""
+import os
+import re
+
+from functions3 import estimate_tokens
+from instrumentation import metrics
+
+ENABLED = os.getenv("TA_BUDDY_COMPACTION", "1") != "0"
+
+# Token budget of the resume/JD text per prompt (0 = no limit). "jd" is the JD
+# given as context to the letter/email prompts; JD keyword extraction reads it whole.
+DEFAULT_BUDGETS = {"location": 400, "keywords": 2000, "letter": 2500, "email": 1500, "profile": 3000, "jd": 1500}
+
+
+def _parse_budgets(value):
+    """Parses "location=300,keywords=1500" overrides on top of DEFAULT_BUDGETS."""
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in value.split(","):
+        if "=" in item:
+            name, tokens = item.split("=", 1)
+            budgets[name.strip()] = int(tokens)
+    return budgets
+
+
+PROMPT_BUDGETS = _parse_budgets(os.getenv("TA_BUDDY_PROMPT_BUDGETS", ""))
+
+# Resume sections each prompt needs ("header" is the text before the first heading).
+# None means every section except the dropped ones.
+PROMPT_SECTIONS = {
+    "location": ("header", "contact"),
+    "keywords": ("summary", "skills", "experience", "projects", "education", "certifications", "other"),
+    "letter": None,
+    "email": ("header", "summary", "skills", "experience", "projects", "education"),
+    "profile": None,
+    "jd": None,
+}
+
+# Sections no prompt needs
+DROPPED_SECTIONS = ("declaration",)
+
+SECTION_ALIASES = {
+    "summary": ("summary", "profile", "professional summary", "profile summary", "objective",
+                "career objective", "about me", "about"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "tools", "skill set", "technical expertise"),
+    "experience": ("experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment", "internships", "internship"),
+    "projects": ("projects", "academic projects", "key projects", "personal projects"),
+    "education": ("education", "academic qualifications", "qualifications", "academic details",
+                  "educational qualifications", "academics"),
+    "certifications": ("certifications", "certificates", "courses", "trainings", "training",
+                       "achievements", "awards", "publications"),
+    "contact": ("contact", "contact details", "contact information", "personal details",
+                "personal information", "personal profile", "address"),
+    "declaration": ("declaration", "references", "hobbies", "interests", "hobbies and interests"),
+}
+_SECTION_BY_TITLE = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+# Whole lines that carry no information for the LLM
+BOILERPLATE_LINES = [
+    re.compile(r"^\s*evaluation warning\b.*$", re.I),                # Spire free edition banner
+    re.compile(r"^\s*created with (an evaluation copy of )?spire\..*$", re.I),
+    re.compile(r"^\s*(page\s*)?\d+\s*((of|/)\s*\d+)?\s*$", re.I),    # page numbers
+    re.compile(r"^\s*[-_=*~]{3,}\s*$"),                                # horizontal rules
+]
+IMAGE_PLACEHOLDERS = re.compile(r"!\[[^\]]*\]\([^)]*\)|<img[^>]*>", re.I)
+MARKDOWN_ESCAPE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|])")
+HEADING_MARK = re.compile(r"^\s*#{1,6}\s*")
+
+# Lines among the first/last PAGE_EDGE_LINES of at least two pages ("\f"-separated)
+# are running headers or footers
+PAGE_EDGE_LINES = 2
+
+# Longest block of lines recognized when it is repeated right after itself
+MAX_REPEATED_BLOCK = 20
+
+
+def _normalize_line(line):
+    return " ".join(line.lower().split())
+
+
+def _clean_line(line):
+    line = IMAGE_PLACEHOLDERS.sub("", line)
+    line = MARKDOWN_ESCAPE.sub(r"\1", line)
+    return " ".join(line.split())
+
+
+def _page_furniture(text):
+    """Normalized lines found at the top or bottom of two or more pages."""
+    pages = text.split("\f")
+    if len(pages) < 2:
+        return set()
+    counts = {}
+    for page in pages:
+        keys = [key for key in (_normalize_line(_clean_line(line)) for line in page.splitlines()) if key]
+        for key in set(keys[:PAGE_EDGE_LINES] + keys[-PAGE_EDGE_LINES:]):
+            counts[key] = counts.get(key, 0) + 1
+    return {key for key, n in counts.items() if n >= 2}
+
+
+def _drop_repeats(lines):
+    """Drops lines that repeat the line, or block of lines, right before them (e.g. table text emitted twice)."""
+    keys = [_normalize_line(line) for line in lines]
+    kept, kept_keys = [], []
+    i = 0
+    while i < len(lines):
+        for size in range(min(MAX_REPEATED_BLOCK, len(kept_keys), len(lines) - i), 0, -1):
+            block = keys[i:i + size]
+            if any(block) and block == kept_keys[-size:]:
+                i += size
+                break
+        else:
+            kept.append(lines[i])
+            kept_keys.append(keys[i])
+            i += 1
+    return kept
+
+
+def compact_text(text):
+    """
+    Removes image placeholders, Spire banners, page numbers, rules and
+    markdown escapes, collapses whitespace, drops running headers and
+    footers and lines repeated right after themselves (table text emitted
+    twice), and squeezes blank lines. Lines repeated elsewhere in the
+    document (the same employer or title under two roles) are kept.
+    """
+    furniture = _page_furniture(text)
+    out = []
+    for line in text.splitlines():
+        line = _clean_line(line)
+        if not line:
+            if out and out[-1]:
+                out.append("")
+            continue
+        if any(p.match(line) for p in BOILERPLATE_LINES) or _normalize_line(line) in furniture:
+            continue
+        out.append(line)
+    return "\n".join(_drop_repeats(out)).strip()
+
+
+def _section_of(line, current):
+    """Canonical section name if `line` is a section heading, else None."""
+    title = HEADING_MARK.sub("", line).strip(" *_:").lower()
+    if not title or len(title) > 40:
+        return None
+    if title in _SECTION_BY_TITLE:
+        return _SECTION_BY_TITLE[title]
+    # Unknown markdown headings start an "other" section, except in the
+    # header, where they are usually the candidate's name
+    if HEADING_MARK.match(line) and current != "header":
+        return "other"
+    return None
+
+
+def split_sections(text):
+    """
+    Splits (compacted) resume text into sections.
+
+    Returns:
+        list: (section name, lines) pairs in document order; the text before
+        the first heading is the "header" section
+    """
+    sections = [("header", [])]
+    for line in text.splitlines():
+        name = _section_of(line, sections[-1][0])
+        if name is not None:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if any(l.strip() for l in lines)]
+
+
+def _truncate(lines, tokens):
+    """Keeps whole lines while they fit into `tokens`; the first line that does not is cut short."""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line + "\n")
+        if used + cost > tokens:
+            # About 4 characters per token, as in estimate_tokens
+            chars = (tokens - used) * 4 - 1
+            if chars > 0:
+                kept.append(line[:chars])
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def trim_to_budget(sections, budget):
+    """
+    Trims sections so their text fits `budget` tokens. Small sections are
+    kept whole and the remaining budget is shared equally among the larger
+    ones, which are cut at a line boundary where possible.
+    """
+    if not budget:
+        return sections
+    sizes = [estimate_tokens("\n".join(lines) + "\n") for _, lines in sections]
+    if sum(sizes) <= budget:
+        return sections
+    allowance = [0] * len(sections)
+    remaining = budget
+    order = sorted(range(len(sections)), key=lambda i: sizes[i])
+    for n, i in enumerate(order):
+        share = remaining // (len(order) - n)
+        allowance[i] = min(sizes[i], share)
+        remaining -= allowance[i]
+    return [(name, _truncate(lines, allowance[i])) for i, (name, lines) in enumerate(sections)]
+
+
+def _view(sections, prompt, budget):
+    wanted = PROMPT_SECTIONS.get(prompt)
+    chosen = [(name, lines) for name, lines in sections
+              if name not in DROPPED_SECTIONS and (wanted is None or name in wanted)]
+    # Unstructured text, or none of the wanted sections found: use everything
+    if not chosen:
+        chosen = sections
+    trimmed = trim_to_budget(chosen, budget)
+    if trimmed is not chosen:
+        metrics.incr("prompt_truncated", prompt=prompt)
+    chosen = trimmed
+    return "\n".join("\n".join(lines) for _, lines in chosen if lines).strip()
+
+
+def prompt_text(text, prompt, budget=None):
+    """Compacted text for one prompt ("location", "keywords", "letter", "email", "profile" or "jd")."""
+    if not ENABLED:
+        return text
+    if budget is None:
+        budget = PROMPT_BUDGETS.get(prompt, 0)
+    return _view(split_sections(compact_text(text)), prompt, budget)
+
+
+def prompt_views(text, prompts=("location", "keywords", "letter", "email", "profile")):
+    """prompt_text for several prompts, compacting and splitting the text only once."""
+    if not ENABLED:
+        return {prompt: text for prompt in prompts}
+    sections = split_sections(compact_text(text))
+    return {prompt: _view(sections, prompt, PROMPT_BUDGETS.get(prompt, 0)) for prompt in prompts}
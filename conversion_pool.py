@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from extractors import DEFAULT_BACKEND, cache_variant, extract_text
+from text_cache import text_cache
+from instrumentation import metrics
+
+# Worker processes used for document conversion and the per-document time limit
+DEFAULT_WORKERS = int(os.getenv("TA_BUDDY_CONVERT_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_TIMEOUT = float(os.getenv("TA_BUDDY_CONVERT_TIMEOUT", "120"))
+
+# Workers are not forked from the (multithreaded) app process: a fork can copy
+# locks held by other threads and deadlock
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def convert_document(name, data, backend=DEFAULT_BACKEND):
+    """
+    Converts one document (file name + bytes) to flattened text in memory.
+    Runs inside a worker process.
+
+    Returns:
+        tuple: (text, metrics snapshot of this conversion for the parent process)
+    """
+    # Drop anything left by a previous document
+    metrics.reset()
+    text = extract_text(name, data, backend)
+    if text is None:
+        raise ValueError(f"Unsupported file type: {name}")
+    if not text.strip():
+        raise RuntimeError("No text could be extracted")
+    return text, metrics.drain()
+
+
+def _kill_workers(pool):
+    # ProcessPoolExecutor has no public way to stop a hung worker
+    for proc in list(getattr(pool, "_processes", {}).values()):
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+
+
+def _run(documents, indices, max_workers, timeout, backend, cache, convert):
+    """
+    Converts documents[i] for every i in `indices`, at most `max_workers` at a
+    time, yielding (i, result) as each one finishes. Returns the indices whose
+    worker crashed the pool, which cannot be told apart from their innocent
+    neighbours and are retried one by one.
+    """
+    pending = deque(indices)
+    crashed = []
+    while pending:
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
+        running = {}
+        restart = False
+        try:
+            while (pending or running) and not restart:
+                # Only submit what can start immediately so the deadline is accurate
+                while pending and len(running) < max_workers:
+                    i = pending.popleft()
+                    name, data = documents[i]
+                    future = pool.submit(convert, name, data, backend)
+                    running[future] = (i, time.monotonic() + timeout)
+
+                next_deadline = min(deadline for _, deadline in running.values())
+                done, _ = wait(running, timeout=max(0.0, next_deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, _ = running.pop(future)
+                    name, data = documents[i]
+                    try:
+                        text, worker_metrics = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(i)
+                        restart = True
+                    except Exception as e:
+                        yield i, {"name": name, "text": "", "error": str(e) or type(e).__name__}
+                    else:
+                        metrics.merge(worker_metrics)
+                        cache.put(cache.key_for(data, cache_variant(backend)), text)
+                        yield i, {"name": name, "text": text, "error": ""}
+
+                now = time.monotonic()
+                for future, (i, deadline) in list(running.items()):
+                    if deadline <= now:
+                        running.pop(future)
+                        restart = True
+                        yield i, {"name": documents[i][0], "text": "",
+                                  "error": f"Conversion timed out after {timeout:g}s"}
+        finally:
+            if restart or running:
+                _kill_workers(pool)
+            pool.shutdown(wait=not (restart or running), cancel_futures=True)
+        # Documents still in flight when the pool was torn down are started again
+        pending.extendleft(i for i, _ in running.values())
+    return crashed
+
+
+def iter_convert_documents(documents, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                           backend=DEFAULT_BACKEND, cache=text_cache, convert=convert_document):
+    """
+    Converts a batch of documents to flattened text in a process pool,
+    yielding (index, result) pairs in completion order. See convert_documents.
+    """
+    max_workers = max(1, int(max_workers))
+    todo = []
+    for i, (name, data) in enumerate(documents):
+        text = cache.get(cache.key_for(data, cache_variant(backend)))
+        metrics.incr("text_cache", result="miss" if text is None else "hit")
+        if text is not None:
+            yield i, {"name": name, "text": text, "error": ""}
+        else:
+            todo.append(i)
+
+    crashed = yield from _run(documents, todo, max_workers, timeout, backend, cache, convert)
+    for i in crashed:
+        # Re-run alone: if it crashes again it really is the culprit
+        if (yield from _run(documents, [i], 1, timeout, backend, cache, convert)):
+            yield i, {"name": documents[i][0], "text": "",
+                      "error": "Conversion crashed the worker process"}
+
+
+def convert_documents(documents, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                      backend=DEFAULT_BACKEND, cache=text_cache, convert=convert_document):
+    """
+    Converts a batch of documents to flattened text in a process pool.
+
+    Args:
+        documents (list): (file name, file bytes) pairs
+        max_workers (int): Number of worker processes
+        timeout (float): Seconds a single document may take before its worker is killed
+        backend (str): Extraction backend passed to `extractors.convert_to_md`
+        cache (TextCache): Cache consulted before, and filled after, conversion
+        convert: Module-level function run in the workers, with the signature
+            and return value of convert_document
+
+    Returns:
+        list: One dict per document, in input order, with keys "name", "text"
+        and "error" ("" on success). A hanging or crashing document only fails
+        its own entry.
+    """
+    results = [None] * len(documents)
+    for i, result in iter_convert_documents(documents, max_workers, timeout, backend, cache, convert):
+        results[i] = result
+    return results
@@ -0,0 +1,434 @@
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from instrumentation import metrics
+from table_flattener import flatten_md_text
+
+logger = logging.getLogger(__name__)
+
+# Backend used by file_to_md: "auto" (fast path with Spire fallback), "fast" or "spire"
+DEFAULT_BACKEND = os.getenv("TA_BUDDY_EXTRACTOR", "auto")
+
+# If the fast path yields fewer characters than this, "auto" falls back to Spire
+MIN_FAST_TEXT_CHARS = int(os.getenv("TA_BUDDY_MIN_FAST_CHARS", "200"))
+
+# Pages of a PDF that the layout conversion (pdf2docx + Spire) converts; the rest
+# of a long portfolio is ignored there (0 = all). The text-only path reads every page.
+MAX_PAGES = int(os.getenv("TA_BUDDY_MAX_PAGES", "10"))
+
+# Documents larger than this only get the text-only extraction (MB, 0 = no limit)
+MAX_DOCUMENT_MB = float(os.getenv("TA_BUDDY_MAX_DOCUMENT_MB", "20"))
+
+# Limits of one layout conversion (pdf2docx + Spire): resident memory (MB) and
+# wall-clock seconds, after which it is killed and the text-only result is used
+LAYOUT_MAX_RSS_MB = float(os.getenv("TA_BUDDY_CONVERT_MAX_RSS_MB", "1024"))
+LAYOUT_TIMEOUT = float(os.getenv("TA_BUDDY_LAYOUT_TIMEOUT", "60"))
+
+# How often the memory and time of a layout conversion are checked (seconds)
+LIMIT_POLL_INTERVAL = 0.1
+
+
+# ----------- Fast path: PyPDF2 / python-docx -----------
+
+def extract_pdf_text(file_path, max_pages=0):
+    """
+    Extracts the text layer of a PDF (path or binary stream) page by page
+    with PyPDF2, from the first `max_pages` pages only (0 = all). Pages are
+    separated by form feeds, which compaction uses to find running headers
+    and footers.
+    """
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    pages = len(reader.pages)
+    if max_pages and pages > max_pages:
+        metrics.incr("conversion_truncated", backend="fast")
+        pages = max_pages
+    return "\f".join((reader.pages[i].extract_text() or "") for i in range(pages))
+
+
+def pdf_page_count(file_path):
+    """Number of pages of a PDF (path or binary stream), or None if PyPDF2 cannot read it."""
+    from PyPDF2 import PdfReader
+    try:
+        return len(PdfReader(file_path).pages)
+    except Exception:
+        return None
+
+
+def extract_docx_text(file_path):
+    """
+    Extracts paragraphs and tables of a DOCX in document order with python-docx.
+    Table rows are written as comma-joined cells, the same form
+    `table_flattener.flatten_md_tables` produces.
+    """
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    document = Document(file_path)
+    lines = []
+    for block in document.element.body.iterchildren():
+        tag = block.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            lines.append(Paragraph(block, document).text)
+        elif tag == "tbl":
+            for row in Table(block, document).rows:
+                cells = []
+                seen = set()
+                for cell in row.cells:
+                    # Merged cells are returned once per grid column; keep one copy
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    cells.append(" ".join(cell.text.split()))
+                lines.append(", ".join(cells))
+    return "\n".join(lines)
+
+
+def fast_extract(file_path):
+    """Returns the plain text of a PDF/DOCX without re-laying out the document."""
+    if file_path.endswith(".pdf"):
+        return extract_pdf_text(file_path)
+    if file_path.endswith(".docx"):
+        return extract_docx_text(file_path)
+    return None
+
+
+# ----------- Backends: file path in, markdown path out -----------
+
+def _write_md(file_path, text):
+    md_path = os.path.splitext(file_path)[0] + ".md"
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return md_path
+
+
+def fast_convert(file_path):
+    with metrics.span("fast_extract"):
+        text = fast_extract(file_path)
+    if text is None:
+        return None
+    return _write_md(file_path, text)
+
+
+def spire_convert(file_path, max_pages=MAX_PAGES):
+    """
+    The original chain: pdf2docx (PDF only, the first `max_pages` pages),
+    then Spire DOCX -> Markdown.
+    """
+    from word_to_md import convert_word_to_md
+    if file_path.endswith(".pdf"):
+        from pdf_to_word import convert_pdf_to_word
+        docx_path = file_path.replace(".pdf", ".docx")
+        with metrics.span("pdf2docx"):
+            convert_pdf_to_word(file_path, docx_path, start=0, end=max_pages or None)
+        md_path = docx_path.replace(".docx", ".md")
+        with metrics.span("spire"):
+            convert_word_to_md(docx_path, md_path)
+    elif file_path.endswith(".docx"):
+        md_path = file_path.replace(".docx", ".md")
+        with metrics.span("spire"):
+            convert_word_to_md(file_path, md_path)
+    else:
+        return None
+    return md_path
+
+
+# ----------- Limits of the layout conversion -----------
+
+class ConversionLimitExceeded(Exception):
+    """A document is too large for the layout conversion, or the conversion went over its limits."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _rss_mb(pid):
+    # Linux only; elsewhere the memory limit is not enforced
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _limited_call(conn, fn, args):
+    metrics.reset()
+    try:
+        conn.send((True, fn(*args), metrics.drain()))
+    except Exception as e:
+        conn.send((False, f"{type(e).__name__}: {e}", metrics.drain()))
+    finally:
+        conn.close()
+
+
+def run_limited(fn, *args, timeout=LAYOUT_TIMEOUT, max_rss_mb=LAYOUT_MAX_RSS_MB):
+    """
+    Runs fn(*args) in a child process and returns its result. The child is
+    killed, and ConversionLimitExceeded raised, when it runs for more than
+    `timeout` seconds or its resident memory goes over `max_rss_mb` (0 = no
+    limit). Errors of `fn` are raised as RuntimeError.
+    """
+    # fork is cheap and keeps the converters imported, but is only safe without other threads
+    use_fork = "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+    ctx = multiprocessing.get_context("fork" if use_fork else "spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_limited_call, args=(sender, fn, args), daemon=True)
+    start = time.monotonic()
+    proc.start()
+    sender.close()
+    try:
+        while not receiver.poll(LIMIT_POLL_INTERVAL):
+            elapsed = time.monotonic() - start
+            rss = _rss_mb(proc.pid) or 0.0
+            if timeout and elapsed > timeout:
+                raise ConversionLimitExceeded("timeout", f"Layout conversion took more than {timeout:g}s")
+            if max_rss_mb and rss > max_rss_mb:
+                raise ConversionLimitExceeded("memory", f"Layout conversion used more than {max_rss_mb:g} MB")
+            if not proc.is_alive() and not receiver.poll():
+                raise RuntimeError(f"Layout conversion exited with code {proc.exitcode}")
+        ok, result, child_metrics = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"Layout conversion exited with code {proc.exitcode}") from None
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        receiver.close()
+    metrics.merge(child_metrics)
+    if not ok:
+        raise RuntimeError(result)
+    return result
+
+
+def check_document_size(size, max_mb=MAX_DOCUMENT_MB):
+    """Raises ConversionLimitExceeded for a document too large for the layout conversion."""
+    if max_mb and size > max_mb * 1024 * 1024:
+        raise ConversionLimitExceeded(
+            "size", f"{size / 1024 / 1024:.1f} MB is over the {max_mb:g} MB limit of the layout conversion"
+        )
+
+
+def guarded_spire_convert(file_path):
+    """
+    spire_convert within the size, page, memory and time limits. PDFs are
+    first checked with PyPDF2: only their first MAX_PAGES pages are
+    converted. Raises ConversionLimitExceeded when a limit is hit.
+    """
+    check_document_size(os.path.getsize(file_path))
+    if MAX_PAGES and file_path.endswith(".pdf"):
+        pages = pdf_page_count(file_path)
+        if pages and pages > MAX_PAGES:
+            metrics.incr("conversion_truncated", backend="spire")
+    with metrics.span("layout_conversion"):
+        return run_limited(spire_convert, file_path)
+
+
+def _fast_failed(name, error):
+    metrics.incr("fast_extract_failed")
+    logger.warning("Fast text extraction failed for '%s': %s", name, error)
+
+
+def degraded_text(name, source, error, text=None):
+    """
+    Text-only result for a document whose layout conversion hit a limit:
+    `text` when the fast path already produced it, otherwise the fast
+    extraction of `source` (path or bytes), or "" if that fails too.
+    """
+    metrics.incr("conversion_degraded", reason=error.reason)
+    logger.warning("%s: %s; using the text-only extraction", name, error)
+    if text is not None:
+        return text
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            return fast_extract_bytes(name, source) or ""
+        return fast_extract(source) or ""
+    except Exception as e:
+        _fast_failed(name, e)
+        return ""
+
+
+def limited_spire_convert(file_path):
+    """guarded_spire_convert, falling back to the text-only extraction when a limit is hit."""
+    try:
+        return guarded_spire_convert(file_path)
+    except ConversionLimitExceeded as e:
+        return _write_md(file_path, degraded_text(os.path.basename(file_path), file_path, e))
+
+
+EXTRACTOR_BACKENDS = {
+    "fast": fast_convert,
+    "spire": limited_spire_convert,
+}
+
+
+def convert_to_md(file_path, backend=DEFAULT_BACKEND):
+    """
+    Converts a PDF/DOCX on disk to a markdown/text file and returns its path.
+
+    Args:
+        file_path (str): Path to the input PDF/DOCX file
+        backend (str): "auto", or a key of EXTRACTOR_BACKENDS
+
+    "auto" tries the fast path first and only falls back to the Spire chain
+    when the fast path fails or yields less than MIN_FAST_TEXT_CHARS characters
+    (e.g. scanned PDFs or text stored in shapes).
+    """
+    if backend != "auto":
+        return EXTRACTOR_BACKENDS[backend](file_path)
+    try:
+        with metrics.span("fast_extract"):
+            text = fast_extract(file_path)
+    except Exception as e:
+        _fast_failed(file_path, e)
+        text = None
+    if text is not None and len(text.strip()) >= MIN_FAST_TEXT_CHARS:
+        return _write_md(file_path, text)
+    try:
+        return guarded_spire_convert(file_path)
+    except ConversionLimitExceeded as e:
+        return _write_md(file_path, degraded_text(os.path.basename(file_path), file_path, e, text))
+
+
+# ----------- In memory: file bytes in, flattened text out -----------
+
+def cache_variant(backend):
+    """Text cache variant of a conversion: the backend and the page cap of the layout conversion."""
+    if backend == "fast" or not MAX_PAGES:
+        return backend
+    return f"{backend}:layout_pages={MAX_PAGES}"
+
+
+def fast_extract_bytes(name, data):
+    """fast_extract for a document held in memory; nothing is written to disk."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".pdf":
+        return extract_pdf_text(io.BytesIO(data))
+    if ext == ".docx":
+        return extract_docx_text(io.BytesIO(data))
+    return None
+
+
+def spire_convert_bytes(name, data):
+    """
+    Runs the Spire chain on a document held in memory and returns its
+    markdown. pdf2docx and Spire only work on files, so they get a private,
+    uniquely named temp directory that is removed as soon as the markdown
+    has been read back. The conversion runs within the limits of
+    guarded_spire_convert (ConversionLimitExceeded is raised when one is hit).
+    """
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in (".pdf", ".docx"):
+        return None
+    # Before anything is written or parsed
+    check_document_size(len(data))
+    with tempfile.TemporaryDirectory(prefix="ta_buddy_") as workdir:
+        file_path = os.path.join(workdir, "document" + ext)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        md_path = guarded_spire_convert(file_path)
+        if not os.path.exists(md_path):
+            raise RuntimeError("Conversion produced no output")
+        with open(md_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+def _convert_bytes(name, data, backend):
+    if backend == "spire":
+        try:
+            return spire_convert_bytes(name, data)
+        except ConversionLimitExceeded as e:
+            return degraded_text(name, data, e)
+    try:
+        with metrics.span("fast_extract"):
+            text = fast_extract_bytes(name, data)
+    except Exception as e:
+        if backend == "fast":
+            raise
+        _fast_failed(name, e)
+        text = None
+    if backend == "fast" or (text is not None and len(text.strip()) >= MIN_FAST_TEXT_CHARS):
+        return text
+    try:
+        return spire_convert_bytes(name, data)
+    except ConversionLimitExceeded as e:
+        return degraded_text(name, data, e, text)
+
+
+def extract_text(name, data, backend=DEFAULT_BACKEND):
+    """
+    Converts a PDF/DOCX given as bytes to flattened text, with the same
+    backends and "auto" fallback rule as convert_to_md.
+
+    Args:
+        name (str): File name; only its extension is used
+        data (bytes): File content
+        backend (str): "auto", "fast" or "spire"
+
+    Returns:
+        str: The text with markdown tables flattened, or None for unsupported file types
+    """
+    with metrics.span("file_to_md"):
+        text = _convert_bytes(name, data, backend)
+    if text is None:
+        return None
+    with metrics.span("flatten_tables"):
+        return flatten_md_text(text)
+
+
+# ----------- Timing comparison -----------
+
+def compare_backends(paths, backends=("fast", "spire")):
+    """
+    Converts every file with each backend and returns one row per
+    (file, backend) with the wall time and number of characters extracted.
+    """
+    import shutil
+    import tempfile
+    from table_flattener import flatten_md_tables
+
+    rows = []
+    for path in paths:
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                work_path = os.path.join(tmpdir, os.path.basename(path))
+                shutil.copyfile(path, work_path)
+                start = time.perf_counter()
+                md_path = EXTRACTOR_BACKENDS[backend](work_path)
+                chars = 0
+                if md_path and os.path.exists(md_path):
+                    flat_path = os.path.join(tmpdir, "flattened_" + os.path.basename(md_path))
+                    flatten_md_tables(md_path, flat_path)
+                    with open(flat_path, "r", encoding="utf-8") as f:
+                        chars = len(f.read().strip())
+                elapsed = time.perf_counter() - start
+            rows.append({"file": os.path.basename(path), "backend": backend,
+                         "seconds": round(elapsed, 3), "chars": chars})
+    return rows
+
+
+if __name__ == "__main__":
+    # Usage: python extractors.py <folder or files with sample resumes/JDs>
+    paths = []
+    for arg in sys.argv[1:] or ["."]:
+        if os.path.isdir(arg):
+            paths += [os.path.join(arg, n) for n in sorted(os.listdir(arg))
+                      if n.endswith((".pdf", ".docx"))]
+        else:
+            paths.append(arg)
+    rows = compare_backends(paths)
+    for row in rows:
+        print(f"{row['file']:<40} {row['backend']:<6} {row['seconds']:>8.3f}s {row['chars']:>8} chars")
+    for backend in ("fast", "spire"):
+        total = sum(r["seconds"] for r in rows if r["backend"] == backend)
+        print(f"Total {backend}: {total:.3f}s over {len(paths)} files")
@@ -0,0 +1,208 @@
+"""
+Deterministic stand-in for the Gemini chat model, for offline benchmarks and
+smoke tests. It recognizes the app's prompts (keywords, location, combined
+profile, cover letter, outreach email) and answers them in the expected
+format after a configurable delay, without any network access.
+FakeEmbeddings does the same for the embedding model. Optional quotas make
+the fake answer like a throttling API (429 errors), to exercise the rate limiter.
+
+Example:
+    import utils
+    from fake_llm import FakeChatModel
+    utils.set_llm_model(FakeChatModel(latency=0.5))
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from synthetic_corpus import LOCATIONS, SKILLS
+
+
+class FakeMessage:
+    """The parts of a LangChain AIMessage the app reads."""
+
+    def __init__(self, content, input_tokens, output_tokens):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+
+class FakeRateLimitError(Exception):
+    """429 answer of the fake model (like google-genai's ClientError)."""
+
+    code = 429
+
+
+class FakeChatModel:
+    """
+    Fake chat model with the `invoke(prompt).content` interface of
+    ChatGoogleGenerativeAI.
+
+    The same prompt always gets the same answer. Keywords are the known
+    skills (synthetic_corpus.SKILLS) found in the prompt, topped up with
+    random ones; the location is the first known city found.
+
+    Args:
+        latency (float): Seconds each call sleeps, to simulate the API round trip
+        jitter (float): Extra random delay of up to this many seconds (deterministic per prompt)
+        letter_chars (int): Length of generated cover letters and emails
+        n_keywords (int): Minimum number of keywords returned
+        seed (int): Changes every answer while keeping them deterministic
+        rpm_limit, tpm_limit (int): Requests / tokens per `quota_period` seconds
+            (sliding window) above which calls fail with FakeRateLimitError; 0 = no limit
+        max_concurrent (int): Calls in flight above which calls fail the same way
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, letter_chars=1500, n_keywords=15, seed=0,
+                 model="fake-gemini", temperature=0.4, rpm_limit=0, tpm_limit=0, max_concurrent=0,
+                 quota_period=60.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.letter_chars = letter_chars
+        self.n_keywords = n_keywords
+        self.seed = seed
+        self.model = model
+        self.temperature = temperature
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.max_concurrent = max_concurrent
+        self.quota_period = quota_period
+        self.calls = 0
+        self.throttled = 0
+        self.tokens = 0
+        self.in_flight = 0
+        self._window = deque()  # (time, tokens) of the accepted calls
+        self._window_tokens = 0
+        self._lock = threading.Lock()
+
+    def _admit(self, tokens):
+        """Records an accepted call, or raises FakeRateLimitError if it exceeds a quota."""
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= self.quota_period:
+            self._window_tokens -= self._window.popleft()[1]
+        reason = None
+        if self.rpm_limit and len(self._window) >= self.rpm_limit:
+            reason = "requests per minute"
+        elif self.tpm_limit and self._window_tokens + tokens > self.tpm_limit:
+            reason = "tokens per minute"
+        elif self.max_concurrent and self.in_flight >= self.max_concurrent:
+            reason = "concurrent requests"
+        if reason:
+            self.throttled += 1
+            raise FakeRateLimitError(f"429 RESOURCE_EXHAUSTED: quota exceeded ({reason})")
+        self._window.append((now, tokens))
+        self._window_tokens += tokens
+        self.tokens += tokens
+        self.in_flight += 1
+
+    def invoke(self, prompt):
+        text = prompt if isinstance(prompt, str) else prompt.to_string()
+        digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        delay = self.latency + rng.random() * self.jitter
+        content = self._answer(text, rng)
+        message = FakeMessage(content, (len(text) + 3) // 4, (len(content) + 3) // 4)
+        with self._lock:
+            self.calls += 1
+            self._admit(message.usage_metadata["total_tokens"])
+        try:
+            if delay > 0:
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return message
+
+    # ----------- Answers per prompt type -----------
+
+    def _answer(self, text, rng):
+        if text.startswith("You are an expert recruiter extracting structured information"):
+            resume = text.split("\nResume:\n", 1)[-1]
+            profile = {
+                "location": self._location(resume),
+                "keywords": self._keywords(resume, rng),
+                "email_id": _first(r"[\w\.-]+@[\w\.-]+", resume),
+                "phone": _first(r"\+?\d[\d\-\(\) ]{8,}\d", resume),
+            }
+            if '"cover_letter":' in text:
+                profile["cover_letter"] = self._letter("Dear Hiring Manager,", rng)
+                profile["outreach_email"] = self._letter("Dear Candidate,", rng)
+            return json.dumps(profile)
+        if "extracting short, self-explanatory keywords" in text:
+            return json.dumps({"keywords": self._keywords(text.split("TEXT:", 1)[-1], rng)})
+        if text.startswith("Extract the current city or state location"):
+            return self._location(text)
+        if text.startswith("You are an HR professional writing an email"):
+            return self._letter("Subject: Interview invitation\n\nDear Candidate,", rng)
+        return self._letter("Dear Hiring Manager,", rng)
+
+    def _keywords(self, text, rng):
+        lower = text.lower()
+        found = [s for s in SKILLS if s in lower]
+        extra = [s for s in SKILLS if s not in found]
+        rng.shuffle(extra)
+        return found + extra[:max(0, self.n_keywords - len(found))]
+
+    @staticmethod
+    def _location(text):
+        for city, state in LOCATIONS:
+            if city in text:
+                return f"{city}, {state}"
+        return ""
+
+    def _letter(self, opening, rng):
+        words = ["experience", "team", "role", "skills", "project", "opportunity", "impact",
+                 "company", "growth", "discussion", "interview", "background", "delivery"]
+        body = []
+        size = len(opening)
+        while size < self.letter_chars:
+            sentence = " ".join(rng.choice(words) for _ in range(12)).capitalize() + "."
+            body.append(sentence)
+            size += len(sentence) + 1
+        return opening + "\n\n" + " ".join(body) + "\n\nThank you,\nTalent Acquisition Team"
+
+
+def _first(pattern, text):
+    match = re.search(pattern, text)
+    return match.group(0) if match else ""
+
+
+class FakeEmbeddings:
+    """
+    Deterministic stand-in for an embedding model (`embed_documents` /
+    `embed_query`), for offline tests of semantic similarity.
+
+    Words are hashed into `dim` buckets (feature hashing), so texts sharing
+    words get similar vectors, as with a real model.
+    """
+
+    def __init__(self, dim=256, latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        vec = [0.0] * self.dim
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:8], "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = sum(v * v for v in vec) ** 0.5 or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
@@ -1,14 +1,15 @@
 import os
 import re
-import numpy as np
-
-import pandas as pd
 import json
-from docx import Document
-from PyPDF2 import PdfReader
+import shutil
+import tempfile
 
 from table_flattener import flatten_md_tables
-from utils import compute_similarity as gemini_similarity, generate_cover_letter as gemini_cover_letter, llm_model
+from extractors import DEFAULT_BACKEND, cache_variant, convert_to_md, extract_text
+from text_cache import text_cache
+from instrumentation import metrics
+from gazetteer import find_location, score_location
+from utils import compute_similarity as gemini_similarity, generate_cover_letter as gemini_cover_letter, invoke_llm
 
 def extract_email(text):
     match = re.search(r'[\w\.-]+@[\w\.-]+', text)
@@ -18,69 +19,244 @@ def extract_contact_number(text):
     match = re.search(r'(\+?\d[\d\-\(\) ]{8,}\d)', text)
     return match.group(0) if match else ""
 
-def file_to_md(uploaded_file, tmpdir):
-    file_path = os.path.join(tmpdir, uploaded_file.name)
+def load_document(source, name=None):
+    """
+    Returns (file name, file bytes) for a Streamlit upload, a file path, a
+    binary stream with a `name`, a (name, bytes) pair, or raw bytes (in which
+    case `name` is required).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return name or os.path.basename(source), f.read()
+    if isinstance(source, tuple):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        if not name:
+            raise ValueError("A file name is required when passing raw bytes")
+        return name, bytes(source)
+    return name or os.path.basename(getattr(source, "name", "")), _read_bytes(source)
+
+# Bytes copied at a time when a document is written to disk
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+def spool_document(source, directory, chunk_size=SPOOL_CHUNK_SIZE):
+    """
+    Writes a document (anything load_document accepts) to `directory` in
+    chunks of `chunk_size` bytes, so no second full copy of an upload is
+    held in memory, and returns the path of the file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        file_path = os.path.join(directory, os.path.basename(source))
+        shutil.copyfile(source, file_path)
+        return file_path
+    if isinstance(source, (tuple, bytes, bytearray)):
+        name, data = load_document(source)
+        file_path = os.path.join(directory, os.path.basename(name))
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return file_path
+    file_path = os.path.join(directory, os.path.basename(getattr(source, "name", "")))
+    source.seek(0)
     with open(file_path, "wb") as f:
-        f.write(uploaded_file.read())
-    if file_path.endswith(".pdf"):
-        from pdf_to_word import convert_pdf_to_word
-        from word_to_md import convert_word_to_md
-        docx_path = file_path.replace(".pdf", ".docx")
-        convert_pdf_to_word(file_path, docx_path)
-        md_path = docx_path.replace(".docx", ".md")
-        convert_word_to_md(docx_path, md_path)
-    elif file_path.endswith(".docx"):
-        from word_to_md import convert_word_to_md
-        md_path = file_path.replace(".docx", ".md")
-        convert_word_to_md(file_path, md_path)
-    else:
-        return None
-    return md_path
+        shutil.copyfileobj(source, f, chunk_size)
+    source.seek(0)
+    return file_path
+
+def file_to_md(source, tmpdir, backend=DEFAULT_BACKEND):
+    # A sub-directory per call, so uploads sharing a file name cannot overwrite each other
+    with metrics.span("file_to_md"):
+        file_path = spool_document(source, tempfile.mkdtemp(dir=tmpdir))
+        return convert_to_md(file_path, backend)
 
 def flatten_tables(md_path, tmpdir):
-    flat_md_path = os.path.join(tmpdir, "flattened_" + os.path.basename(md_path))
-    flatten_md_tables(md_path, flat_md_path)
+    # Next to the markdown file, which file_to_md keeps in its own sub-directory
+    flat_md_path = os.path.join(os.path.dirname(md_path), "flattened_" + os.path.basename(md_path))
+    with metrics.span("flatten_tables"):
+        flatten_md_tables(md_path, flat_md_path)
     return flat_md_path
 
 def read_text_from_md(md_path):
-    with open(md_path, 'r', encoding='utf-8') as f:
+    with metrics.span("read_text_from_md"), open(md_path, 'r', encoding='utf-8') as f:
         return f.read()
 
+def _read_bytes(uploaded_file):
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    data = uploaded_file.read()
+    uploaded_file.seek(0)
+    return data
 
+def file_to_text(source, tmpdir=None, cache=text_cache, backend=DEFAULT_BACKEND):
+    """
+    Converts a PDF/DOCX (anything load_document accepts) to flattened text
+    in memory (extractors.extract_text), reusing the cached text when the same
+    file bytes were converted before. `tmpdir` is no longer used; converters
+    that need files get their own temp directory.
+    """
+    name, data = load_document(source)
+    key = cache.key_for(data, cache_variant(backend))
+    text = cache.get(key)
+    metrics.incr("text_cache", result="miss" if text is None else "hit")
+    if text is not None:
+        return text
+    text = extract_text(name, data, backend)
+    if text is None:
+        return ""
+    cache.put(key, text)
+    return text
 
 
 
-def gemini_email(resume, jd):
-    prompt = f"""You are an HR professional writing an email to a candidate. The candidate's resume is below, and so is the job description. Invite the candidate for a discussion/interview, mention why you are interested, and tell a few good points about the company. Write a professional email.
+def email_prompt(resume, jd):
+    return f"""You are an HR professional writing an email to a candidate. The candidate's resume is below, and so is the job description. Invite the candidate for a discussion/interview, mention why you are interested, and tell a few good points about the company. Write a professional email.
 Resume:
 {resume}
 Job Description:
 {jd}
 """
-    from utils import llm_model
-    from langchain_core.prompts import ChatPromptTemplate
-    chain = ChatPromptTemplate.from_template("{prompt}") | llm_model
-    response = chain.invoke({"prompt": prompt})
-    return response.content.strip()
 
-def extract_location(text, llm_choice):
-    prompt = f"""Extract the current city or state location of the candidate from the following resume text. Only return the location, nothing else.\n\n{text}"""
-    from utils import llm_model
-    from langchain_core.prompts import ChatPromptTemplate
-    chain = ChatPromptTemplate.from_template("{prompt}") | llm_model
-    response = chain.invoke({"prompt": prompt})
-    return response.content.strip()
+def gemini_email(resume, jd, use_cache=True):
+    return invoke_llm(email_prompt(resume, jd), use_cache, site="outreach_email").strip()
 
-def score_location(location):
-    loc = location.lower()
-    if "telangana" in loc or "andhra pradesh" in loc:
-        return 0.1
-    return 0
+def location_prompt(text):
+    return f"""Extract the current city or state location of the candidate from the following resume text. Only return the location, nothing else.\n\n{text}"""
+
+def local_location(text):
+    """
+    Location found in the local gazetteer, or None when Gemini has to decide.
+    Every lookup is counted in the `location_lookups` metric (method
+    "gazetteer" or "llm"), which gives the fallback rate.
+    """
+    with metrics.span("location_gazetteer"):
+        location, reason = find_location(text)
+    metrics.incr("location_lookups", method="llm" if location is None else "gazetteer", reason=reason)
+    return location
+
+def gemini_location(text, use_cache=True):
+    return invoke_llm(location_prompt(text), use_cache, site="location").strip()
+
+def extract_location(text, llm_choice, use_cache=True, llm_text=None):
+    """
+    Current location of the candidate: looked up in the local gazetteer, and
+    asked from Gemini only when it finds no place or conflicting ones.
+    `llm_text` (e.g. the compacted header) is sent instead of `text` if given.
+    """
+    location = local_location(text)
+    if location is not None:
+        return location
+    return gemini_location(text if llm_text is None else llm_text, use_cache)
+
+# ----------- COMBINED STRUCTURED EXTRACTION (one call per resume) -----------
+RESUME_PROFILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "location": {"type": "string", "description": "current city or state of the candidate"},
+        "keywords": {"type": "array", "items": {"type": "string"}},
+        "email_id": {"type": "string"},
+        "phone": {"type": "string"},
+        "cover_letter": {"type": "string"},
+        "outreach_email": {"type": "string"},
+    },
+    "required": ["location", "keywords", "email_id", "phone"],
+}
+
+LETTER_FIELDS = ("cover_letter", "outreach_email")
+
+def estimate_tokens(text):
+    """Rough Gemini token count (about 4 characters per token), without an API call."""
+    return (len(text) + 3) // 4
+
+def resume_profile_prompt(resume, jd="", include_letters=False):
+    schema = json.loads(json.dumps(RESUME_PROFILE_SCHEMA))
+    if not include_letters:
+        for field in LETTER_FIELDS:
+            schema["properties"].pop(field)
+    else:
+        schema["required"] = schema["required"] + list(LETTER_FIELDS)
+    letters = ""
+    if include_letters:
+        letters = f"""
+- "cover_letter": a concise, formal cover letter written by the candidate for the job description, with the candidate's real name, address, phone number and email at the top (no square brackets), a compelling intro, and a thank you with a call to action at the end.
+- "outreach_email": a professional email from an HR professional inviting the candidate for a discussion/interview, mentioning why you are interested and a few good points about the company.
+
+Job Description:
+{jd}
+"""
+    return f"""You are an expert recruiter extracting structured information from a resume.
+
+Return ONLY a JSON object matching this JSON schema (no markdown, no extra words):
+{json.dumps(schema)}
+
+Fields:
+- "location": the current city or state location of the candidate, or "" if not stated.
+- "keywords": short, self-explanatory keywords from the resume (e.g. "bachelor degree in computer science", "certification in data science", "Python", "Machine Learning", "AWS"). Expand all short forms and abbreviations to their full forms. Avoid full sentences or vague terms.
+- "email_id": the candidate's email address, or "".
+- "phone": the candidate's phone number, or "".{letters}
+Resume:
+{resume}
+"""
+
+def _valid_text(value, max_len=None):
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if max_len is not None and (len(value) > max_len or "\n" in value):
+        return None
+    return value
+
+def parse_resume_profile(output, include_letters=False):
+    """
+    Strictly parses the combined extraction response. Every field that is
+    missing or fails validation is returned as None so the caller can fall
+    back to the individual extraction for that field only.
+    """
+    fields = ["location", "keywords", "email_id", "phone"]
+    if include_letters:
+        fields += list(LETTER_FIELDS)
+    profile = dict.fromkeys(fields)
+
+    text = output.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return profile
+    if not isinstance(data, dict):
+        return profile
+
+    profile["location"] = _valid_text(data.get("location"), max_len=100)
+
+    keywords = data.get("keywords")
+    if isinstance(keywords, list) and keywords and all(isinstance(k, str) for k in keywords):
+        cleaned = sorted(set(k.strip().lower() for k in keywords if k.strip()))
+        profile["keywords"] = cleaned or None
+
+    email_id = _valid_text(data.get("email_id"), max_len=254)
+    if email_id == "" or (email_id and re.fullmatch(r"[\w\.\+-]+@[\w-]+(\.[\w-]+)+", email_id)):
+        profile["email_id"] = email_id
+
+    phone = _valid_text(data.get("phone"), max_len=40)
+    if phone == "" or (phone and len(re.sub(r"\D", "", phone)) >= 8):
+        profile["phone"] = phone
+
+    for field in LETTER_FIELDS:
+        if field in profile:
+            profile[field] = _valid_text(data.get(field)) or None
+    return profile
+
+def extract_resume_profile(resume, jd="", include_letters=False, use_cache=True):
+    """
+    Extracts location, keywords, email ID and phone (plus, optionally, the
+    cover letter and outreach email) from a resume in a single Gemini call.
+    """
+    prompt = resume_profile_prompt(resume, jd, include_letters)
+    return parse_resume_profile(invoke_llm(prompt, use_cache, site="resume_profile"), include_letters)
 
 
 
 # ----------- KEYWORD EXTRACTION FUNCTION (your new requirement) -----------
-def key_word_extraction(resume_text, jd_text, llm_choice):
+def key_word_extraction(resume_text, jd_text, llm_choice, use_cache=True):
     """
     Extracts keywords and computes match ratio using either Gemini Flash or DeepSeek LLM.
     Returns a string (full answer) and a float (fraction).
@@ -120,11 +296,7 @@ JOB DESCRIPTION:
 "NOTE": Never give out put like "Bachelor's degree", "Master's degree". If are giving some education details then give in out put like "Bachelor's degree in Electronics", "Master's degree in Physics", certification in data science. Given outputs are just example. Give you answer according to the document provided. So the format is " degree/diploma/certification in subject".
 """
     # Generate LLM response
-    # Generate LLM response
-    from langchain_core.prompts import ChatPromptTemplate
-    chain = ChatPromptTemplate.from_template("{prompt}") | llm_model
-    response = chain.invoke({"prompt": prompt})
-    text = response.content.strip()
+    text = invoke_llm(prompt, use_cache, site="keyword_match").strip()
 
     # Try to extract JSON
     json_match = re.search(r"\{[\s\S]*\}", text)
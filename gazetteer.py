@@ -0,0 +1,260 @@
+"""
+Local location extraction and the region -> Location Score table.
+
+find_location() scans a resume with a PhraseMatcher compiled once over the
+bundled city/state/country gazetteer (data/gazetteer.csv), header and
+contact sections first. Matches there, and on lines such as "Address:" or
+"Location:", weigh more than places named under experience or education.
+The text of the best-supported region is returned; when nothing matches, or
+two regions are about equally supported, it returns None and the caller
+falls back to Gemini. Names that are also common words or surnames (marked
+"ambiguous" in the gazetteer, e.g. Kota, Gaya) only count with a location
+cue: after "in"/"at", on a labelled line, or in the header (below the name
+line) and contact sections.
+
+Example:
+    python gazetteer.py resumes/      # per-resume time and fallback rate
+"""
+import csv
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+from phrase_matcher import PhraseMatcher
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# City/state/country list: name,kind,state,country,aliases ("|"-separated),ambiguous ("1" = needs a cue)
+GAZETTEER_PATH = os.getenv("TA_BUDDY_GAZETTEER", os.path.join(_HERE, "data", "gazetteer.csv"))
+
+# JSON object {region: score} (regions are city, state or country names); "" = the default table
+LOCATION_SCORES_PATH = os.getenv("TA_BUDDY_LOCATION_SCORES", "")
+DEFAULT_LOCATION_SCORES = {"telangana": 0.1, "andhra pradesh": 0.1}
+
+# Locations at home are written "city, state"; abroad "city, country"
+HOME_COUNTRY = "India"
+
+# Weight of a match by resume section (compaction.split_sections names)
+SECTION_WEIGHTS = {"header": 3.0, "contact": 3.0, "summary": 1.5}
+OTHER_SECTION_WEIGHT = 1.0
+
+# Multiplier for matches on a line that labels the candidate's location
+LABELLED_LINE_WEIGHT = 2.0
+LOCATION_LABEL = re.compile(
+    r"\b(address|location|based (in|out of)|residing|resides|lives in|current city|hometown)\b", re.I
+)
+
+# Sections in which ambiguous names count without a cue on the line; the
+# first line of the header (the candidate's name) is excluded
+CUE_SECTIONS = ("header", "contact")
+# An ambiguous name directly preceded by one of these words is taken as a place
+PLACE_PREPOSITION = re.compile(r"\b(in|at)\W*$", re.I)
+
+# Support of the runner-up region, relative to the best one, from which the match is ambiguous
+AMBIGUITY_RATIO = 0.6
+
+Place = namedtuple("Place", "name kind state country ambiguous")
+
+_lock = threading.Lock()
+_matcher = None
+_scores = None
+
+
+# ----------- Gazetteer -----------
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    """PhraseMatcher mapping each name and alias to the list of Places it can refer to."""
+    places = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            state = row["state"] or (row["name"] if row["kind"] == "state" else "")
+            place = Place(row["name"], row["kind"], state, row["country"], bool(row.get("ambiguous")))
+            for name in [row["name"]] + [a for a in (row.get("aliases") or "").split("|") if a]:
+                places.setdefault(name, []).append(place)
+    return PhraseMatcher(places)
+
+
+def gazetteer():
+    """The gazetteer matcher, loaded and compiled once per process."""
+    global _matcher
+    if _matcher is None:
+        with _lock:
+            if _matcher is None:
+                matcher = load_gazetteer()
+                matcher.find("")  # compiles the automaton
+                _matcher = matcher
+    return _matcher
+
+
+def _format(city, region):
+    state, country = region
+    if country != HOME_COUNTRY:
+        state = country
+    return ", ".join(dict.fromkeys(p for p in (city, state) if p))
+
+
+def _support(sections):
+    """Weighted support of each (state, country) region, of each city per region, and of each country."""
+    matcher = gazetteer()
+    regions, cities, countries = {}, {}, {}
+    for section, lines in sections:
+        weight = SECTION_WEIGHTS.get(section, OTHER_SECTION_WEIGHT)
+        name_line = section == "header"
+        for line in lines:
+            if not line.strip():
+                continue
+            cue_line = section in CUE_SECTIONS and not name_line
+            name_line = False
+            matches = matcher.find(line)
+            if not matches:
+                continue
+            labelled = bool(LOCATION_LABEL.search(line))
+            line_weight = weight * (LABELLED_LINE_WEIGHT if labelled else 1.0)
+            for start, _, _, places in matches:
+                if not (cue_line or labelled or PLACE_PREPOSITION.search(line[:start])):
+                    places = [place for place in places if not place.ambiguous]
+                    if not places:
+                        continue
+                # A name shared by several places supports each of them partly
+                share = line_weight / len(places)
+                for place in places:
+                    if place.kind == "country":
+                        countries[place.country] = countries.get(place.country, 0) + share
+                        continue
+                    region = (place.state, place.country)
+                    regions[region] = regions.get(region, 0) + share
+                    if place.kind == "city":
+                        by_city = cities.setdefault(region, {})
+                        by_city[place.name] = by_city.get(place.name, 0) + share
+    return regions, cities, countries
+
+
+def _resolve(regions, cities, countries):
+    if not regions:
+        if len(countries) == 1:
+            return next(iter(countries)), "country"
+        return None, "ambiguous" if countries else "no match"
+    ranked = sorted(regions.items(), key=lambda item: -item[1])
+    if len(ranked) > 1 and ranked[1][1] >= AMBIGUITY_RATIO * ranked[0][1]:
+        return None, "ambiguous"
+    region = ranked[0][0]
+    by_city = cities.get(region, {})
+    city = max(by_city, key=by_city.get) if by_city else ""
+    return _format(city, region), "gazetteer"
+
+
+def find_location(text):
+    """
+    The candidate's current location found locally. The header, contact and
+    summary sections are searched first; the rest of the resume only when
+    they do not name one region.
+
+    Returns:
+        tuple: (location, reason) where location is "City, State" (or a
+        state or country), or None with reason "no match" or "ambiguous"
+        when the LLM should decide
+    """
+    from compaction import split_sections
+    sections = split_sections(text)
+    top = [(name, lines) for name, lines in sections if name in SECTION_WEIGHTS]
+    location, reason = _resolve(*_support(top))
+    if location is None and len(top) < len(sections):
+        location, reason = _resolve(*_support(sections))
+    return location, reason
+
+
+# ----------- Location scores -----------
+
+def load_location_scores(path=LOCATION_SCORES_PATH):
+    """Region -> score table from a JSON file, or the default table."""
+    if not path:
+        return dict(DEFAULT_LOCATION_SCORES)
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    return {str(region).strip().lower(): float(score) for region, score in table.items()}
+
+
+def location_scores():
+    """The region -> score table, loaded once per process."""
+    global _scores
+    if _scores is None:
+        with _lock:
+            if _scores is None:
+                _scores = load_location_scores()
+    return _scores
+
+
+def set_location_scores(table):
+    """Replaces the region -> score table (regions are matched case-insensitively)."""
+    global _scores
+    with _lock:
+        _scores = {str(region).strip().lower(): float(score) for region, score in table.items()}
+
+
+def score_location(location):
+    """
+    Location Score of an extracted location: the score of the most specific
+    region in the table that the location is in (city, then state, then
+    country); 0 when none is listed.
+    """
+    table = location_scores()
+    if not location or not table:
+        return 0
+    names = {"city": [], "state": [], "country": []}
+    for _, _, _, places in gazetteer().find(location):
+        for place in places:
+            if place.kind == "city":
+                names["city"].append(place.name)
+            if place.state:
+                names["state"].append(place.state)
+            names["country"].append(place.country)
+    for level in ("city", "state", "country"):
+        for name in names[level]:
+            if name.lower() in table:
+                return table[name.lower()]
+    # Regions the gazetteer does not know are matched as plain text
+    loc = location.lower()
+    for region, score in table.items():
+        if region in loc:
+            return score
+    return 0
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    import time
+    from extractors import extract_text
+    parser = argparse.ArgumentParser(description="Local location extraction: time per resume and fallback rate")
+    parser.add_argument("paths", nargs="+", help="Resume files (PDF/DOCX/TXT) or folders")
+    args = parser.parse_args(argv)
+
+    files = []
+    for arg in args.paths:
+        if os.path.isdir(arg):
+            files += [os.path.join(arg, n) for n in sorted(os.listdir(arg)) if n.endswith((".pdf", ".docx", ".txt"))]
+        else:
+            files.append(arg)
+    gazetteer()
+    timings, reasons = [], {}
+    for path in files:
+        with open(path, "rb") as f:
+            data = f.read()
+        text = data.decode("utf-8", "replace") if path.endswith(".txt") else extract_text(os.path.basename(path), data)
+        start = time.perf_counter()
+        location, reason = find_location(text or "")
+        timings.append(time.perf_counter() - start)
+        reasons[reason] = reasons.get(reason, 0) + 1
+        print(f"{os.path.basename(path)}: {location or '-'} ({reason}, {timings[-1] * 1000:.2f} ms)")
+    if timings:
+        timings.sort()
+        fallbacks = reasons.get("no match", 0) + reasons.get("ambiguous", 0)
+        print(f"{len(files)} resumes | median {timings[len(timings) // 2] * 1000:.2f} ms | "
+              f"LLM fallback {fallbacks / len(files):.0%} | {reasons}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
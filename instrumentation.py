@@ -0,0 +1,305 @@
+"""
+Lightweight in-process metrics: per-stage wall time spans and labelled
+counters (LLM calls, tokens, cache hits, retries), exportable as JSON or in
+the Prometheus text format.
+
+    from instrumentation import metrics
+
+    with metrics.span("file_to_md"):
+        ...
+    metrics.incr("llm_tokens", 120, site="location", direction="input")
+
+    with metrics.scope() as batch:      # collects only what this thread records meanwhile
+        run_batch()
+    summary = batch.snapshot()
+
+Scopes follow the context (contextvars), not the process: a scope opened by
+one Streamlit session does not see another session's calls. Work handed to
+other threads records into the caller's scopes when wrapped with
+in_current_scope().
+
+Set TA_BUDDY_METRICS=0 to disable: spans then return a shared no-op object
+and counters return immediately.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("TA_BUDDY_METRICS", "1") != "0"
+
+# Prefix of the exported Prometheus metric names
+PROMETHEUS_PREFIX = "ta_buddy"
+
+# Scopes open in the current context (thread, or work wrapped by in_current_scope)
+_active_scopes = contextvars.ContextVar("metrics_scopes", default=())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.name, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+class MetricsRecorder:
+    """
+    Thread-safe aggregate of stage timings and counters.
+
+    Stages keep a call count, total and maximum seconds and an error count;
+    counters are keyed by name plus labels. Recorders opened with scope()
+    receive a copy of everything recorded in the same context while they
+    are open.
+    """
+
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    # ----------- Recording -----------
+
+    def span(self, name):
+        """Context manager timing one run of stage `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator running the whole function inside span(name)."""
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds, error=False):
+        """Adds one run of stage `name` that took `seconds`."""
+        if self.enabled:
+            self._add_stage(name, 1, seconds, seconds, int(error))
+
+    def _add_stage(self, name, count, seconds, max_seconds, errors):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0}
+            stage["count"] += count
+            stage["seconds"] += seconds
+            stage["max_seconds"] = max(stage["max_seconds"], max_seconds)
+            stage["errors"] += errors
+        for scope in self._scopes():
+            scope._add_stage(name, count, seconds, max_seconds, errors)
+
+    def incr(self, name, value=1, **labels):
+        """Adds `value` to the counter `name` with the given labels."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for scope in self._scopes():
+            scope.incr(name, value, **labels)
+
+    def merge(self, snapshot):
+        """Adds a snapshot taken elsewhere (e.g. in a worker process) to this recorder."""
+        if not self.enabled or not snapshot:
+            return
+        for name, stage in snapshot["stages"].items():
+            self._add_stage(name, stage["count"], stage["seconds"], stage["max_seconds"], stage["errors"])
+        for counter in snapshot["counters"]:
+            self.incr(counter["name"], counter["value"], **counter["labels"])
+
+    def _scopes(self):
+        return [scope for parent, scope in _active_scopes.get() if parent is self]
+
+    @contextmanager
+    def scope(self):
+        """
+        Yields a new recorder that receives everything recorded in this
+        context (see in_current_scope) until the block exits.
+        """
+        child = MetricsRecorder(self.enabled)
+        token = _active_scopes.set(_active_scopes.get() + ((self, child),))
+        try:
+            yield child
+        finally:
+            _active_scopes.reset(token)
+
+    # ----------- Reading -----------
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {name: dict(stage) for name, stage in sorted(self._stages.items())},
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+            }
+
+    def drain(self):
+        """Returns the snapshot and clears the recorder (None when disabled)."""
+        if not self.enabled:
+            return None
+        snap = self.snapshot()
+        self.reset()
+        return snap
+
+    def counter_total(self, name, **labels):
+        """Sum of counter `name` over all label sets matching `labels`."""
+        with self._lock:
+            return sum(
+                value for (n, lbls), value in self._counters.items()
+                if n == name and all(dict(lbls).get(k) == v for k, v in labels.items())
+            )
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+def format_json(snapshot):
+    return json.dumps(snapshot, indent=2)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_prometheus(snapshot, prefix=PROMETHEUS_PREFIX):
+    """Renders a snapshot in the Prometheus text exposition format."""
+    lines = []
+    stage_metrics = [
+        ("stage_calls_total", "counter", "count", "Number of runs of each pipeline stage"),
+        ("stage_seconds_total", "counter", "seconds", "Wall time spent in each pipeline stage"),
+        ("stage_seconds_max", "gauge", "max_seconds", "Slowest single run of each pipeline stage"),
+        ("stage_errors_total", "counter", "errors", "Runs of each pipeline stage that raised"),
+    ]
+    for metric, kind, field, help_text in stage_metrics:
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for name, stage in snapshot["stages"].items():
+            lines.append(f"{prefix}_{metric}{_label_text({'stage': name})} {stage[field]:g}")
+    seen = set()
+    for counter in snapshot["counters"]:
+        metric = f"{prefix}_{counter['name']}_total"
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_label_text(counter['labels'])} {counter['value']:g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path, snapshot=None):
+    """Writes a snapshot (default: the global recorder) as JSON, or Prometheus text for *.prom/*.txt."""
+    if snapshot is None:
+        snapshot = metrics.snapshot()
+    text = format_prometheus(snapshot) if path.endswith((".prom", ".txt")) else format_json(snapshot)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+# Process-wide recorder used by the pipeline
+metrics = MetricsRecorder()
+
+
+def in_current_scope(fn):
+    """
+    Wraps `fn` so that, whichever thread runs it, it records into the
+    scopes open where it was wrapped (e.g. before pool.submit).
+    """
+    scopes = _active_scopes.get()
+
+    def run(*args, **kwargs):
+        token = _active_scopes.set(scopes)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active_scopes.reset(token)
+    return run
+
+
+# ----------- LLM retries -----------
+
+# Call site of the LLM request running in the current thread, for retry attribution
+_current = threading.local()
+
+
+def set_llm_site(site):
+    _current.site = site
+    if ENABLED and not _retry_counter_installed:
+        _install_retry_counter()
+
+
+class _RetryLogHandler(logging.Handler):
+    """
+    Counts the retries the Gemini client logs ("Retrying ...") before
+    sleeping, attributed to the call site running in that thread.
+    """
+
+    def emit(self, record):
+        if record.getMessage().startswith("Retrying"):
+            metrics.incr("llm_retries", site=getattr(_current, "site", "unknown"))
+
+
+# Loggers of the google-genai HTTP client (retries are logged at INFO) and of
+# older langchain_google_genai releases that retried themselves
+RETRY_LOGGERS = ("google_genai._api_client", "langchain_google_genai.chat_models")
+
+_retry_counter_installed = False
+_install_lock = threading.Lock()
+
+
+def _install_retry_counter():
+    """
+    Adds the retry-counting handler to RETRY_LOGGERS on the first LLM call.
+    Their levels are left alone: client retries are counted when the
+    application's logging configuration lets their INFO records through
+    (rate_limiter disables the client's own retries and counts its own).
+    """
+    global _retry_counter_installed
+    with _install_lock:
+        if _retry_counter_installed:
+            return
+        for name in RETRY_LOGGERS:
+            logging.getLogger(name).addHandler(_RetryLogHandler())
+        _retry_counter_installed = True
+
@@ -0,0 +1,279 @@
+import csv
+import itertools
+import os
+from functools import lru_cache
+
+from phrase_matcher import PhraseMatcher, normalize_phrase
+
+# Points per matched JD keyword, by priority
+PRIORITY_WEIGHTS = {"high": 3, "medium": 2, "low": 1}
+
+# Minimum similarity for a resume keyword to count as a JD keyword match
+DEFAULT_THRESHOLD = float(os.getenv("TA_BUDDY_MATCH_THRESHOLD", "0.6"))
+
+# Optional local sentence-transformers model directory for semantic matching
+SENTENCE_MODEL_PATH = os.getenv("TA_BUDDY_SENTENCE_MODEL", "")
+
+# Abbreviation/synonym table of the "phrase" mode: phrase,aliases ("|"-separated)
+SYNONYMS_PATH = os.getenv(
+    "TA_BUDDY_SYNONYMS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "synonyms.csv")
+)
+
+# Spellings generated per JD keyword at most (keywords with several abbreviations multiply)
+MAX_VARIANTS = 32
+
+
+@lru_cache(maxsize=2)
+def load_sentence_model(model_path):
+    """Loads (once per process) a sentence-transformers model from a local path."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_path)
+
+
+def _normalize(keywords):
+    return [k.strip().lower() for k in keywords if k and k.strip()]
+
+
+def load_synonyms(path=SYNONYMS_PATH):
+    """Groups of equivalent phrases (normalized), one per row of the synonym table."""
+    groups = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            phrases = [row["phrase"]] + (row.get("aliases") or "").split("|")
+            group = list(dict.fromkeys(p for p in map(normalize_phrase, phrases) if p))
+            if len(group) > 1:
+                groups.append(group)
+    return groups
+
+
+@lru_cache(maxsize=1)
+def synonym_matcher(path=SYNONYMS_PATH):
+    """PhraseMatcher mapping every phrase of the synonym table to its group (loaded once per process)."""
+    return PhraseMatcher({phrase: tuple(group) for group in load_synonyms(path) for phrase in group})
+
+
+def expand_keyword(keyword, synonyms=None):
+    """
+    Spellings of a keyword: each phrase of the synonym table found in it is
+    replaced by its equivalents ("nlp engineer" -> "natural language
+    processing engineer"), up to MAX_VARIANTS.
+    """
+    keyword = normalize_phrase(keyword)
+    synonyms = synonym_matcher() if synonyms is None else synonyms
+    parts, last = [], 0
+    for start, end, phrase, group in synonyms.find(keyword):
+        parts += [(keyword[last:start],), (phrase,) + tuple(p for p in group if p != phrase)]
+        last = end
+    parts.append((keyword[last:],))
+    variants = ("".join(choice) for choice in itertools.product(*parts))
+    return list(itertools.islice(variants, MAX_VARIANTS))
+
+
+class KeywordMatcher:
+    """
+    Fuzzy matcher between resume keywords and prioritized JD keywords.
+
+    All resume keywords of a batch are stacked into one matrix and compared
+    with the JD keywords in a single (sparse) matrix product, using hashed
+    character n-gram vectors or, when `model_path` is given,
+    sentence-transformers embeddings. Each keyword is vectorized on its own
+    (no weights fitted on the batch), so a resume gets the same similarities
+    and score whichever resumes it is scored with. A JD keyword counts as present in a resume when any of the
+    resume's keywords reaches `threshold` cosine similarity with it; the
+    score is the sum of PRIORITY_WEIGHTS of the JD keywords present.
+
+    Args:
+        high_kw, med_kw, low_kw (list): JD keywords by priority
+        threshold (float): Minimum cosine similarity for a match
+        model_path (str): Local sentence-transformers model, or "" for character n-grams
+    """
+
+    def __init__(self, high_kw, med_kw, low_kw, threshold=DEFAULT_THRESHOLD, model_path=""):
+        import numpy as np
+        weights = {}
+        for keywords, priority in ((high_kw, "high"), (med_kw, "medium"), (low_kw, "low")):
+            for kw in _normalize(keywords):
+                weights[kw] = max(weights.get(kw, 0), PRIORITY_WEIGHTS[priority])
+        self.jd_keywords = list(weights)
+        self.weights = np.array([weights[k] for k in self.jd_keywords], dtype=float)
+        self.threshold = threshold
+        self.model_path = model_path
+        self._jd_vecs = None
+
+    def _vectors(self, keywords):
+        if self.model_path:
+            return load_sentence_model(self.model_path).encode(keywords, normalize_embeddings=True)
+        from sklearn.feature_extraction.text import HashingVectorizer
+        # Stateless: no vocabulary or IDF fitted on the batch
+        vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(3, 4), alternate_sign=False)
+        return vectorizer.transform(keywords)
+
+    def _similarity(self, resume_keywords):
+        """Cosine similarity matrix: all resume keywords x JD keywords."""
+        import numpy as np
+        if self._jd_vecs is None:
+            # Vectorized once per matcher
+            self._jd_vecs = self._vectors(self.jd_keywords)
+        # Rows are L2-normalized, so the dot product is the cosine
+        sim = self._vectors(resume_keywords) @ self._jd_vecs.T
+        return sim.toarray() if hasattr(sim, "toarray") else np.asarray(sim)
+
+    def _best_similarity(self, lists):
+        """
+        Similarity of every resume keyword with every JD keyword, and its
+        best value per (resume, JD keyword): a segment max over each resume's rows.
+        """
+        import numpy as np
+        n = len(lists)
+        flat = [kw for kws in lists for kw in kws]
+        best = np.zeros((n, len(self.jd_keywords)))
+        if not flat or not self.jd_keywords:
+            return flat, None, best
+        sim = self._similarity(flat)
+        sizes = np.array([len(kws) for kws in lists])
+        nonempty = np.flatnonzero(sizes)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))[nonempty]
+        best[nonempty] = np.maximum.reduceat(sim, starts, axis=0)
+        return flat, sim, best
+
+    def matched_keywords(self, resume_keyword_lists):
+        """The JD keywords each resume matches (any resume keyword reaching the threshold)."""
+        import numpy as np
+        lists = [sorted(set(_normalize(kws))) for kws in resume_keyword_lists]
+        _, _, best = self._best_similarity(lists)
+        return [[self.jd_keywords[j] for j in np.flatnonzero(row >= self.threshold)] for row in best]
+
+    def score_batch(self, resume_keyword_lists):
+        """
+        Scores a whole batch of resumes.
+
+        Args:
+            resume_keyword_lists (list): One list of keywords per resume
+
+        Returns:
+            tuple: (scores, matches) where scores is an array with one weighted
+            score per resume and matches holds, per resume, one
+            (resume keyword, JD keyword, similarity) triple for every JD
+            keyword that passed the threshold, with the resume keyword that
+            matched it best. The score is the sum of the weights of exactly
+            these JD keywords.
+        """
+        import numpy as np
+        lists = [sorted(set(_normalize(kws))) for kws in resume_keyword_lists]
+        n = len(lists)
+        scores = np.zeros(n)
+        matches = [[] for _ in range(n)]
+        flat, sim, best = self._best_similarity(lists)
+        if sim is None:
+            return scores, matches
+        passed = best >= self.threshold
+        scores = passed @ self.weights
+
+        # Audit trail: for each JD keyword that counts, the resume keyword matching it best
+        start = 0
+        for i, kws in enumerate(lists):
+            block = sim[start:start + len(kws)]
+            start += len(kws)
+            cols = np.flatnonzero(passed[i])
+            if not cols.size:
+                continue
+            rows = block[:, cols].argmax(axis=0)
+            for col, row in zip(cols, rows):
+                matches[i].append((kws[row], self.jd_keywords[col], round(float(block[row, col]), 2)))
+        return scores, matches
+
+
+class PhraseKeywordMatcher:
+    """
+    Local matcher of prioritized JD keywords in resume text.
+
+    The JD keywords and their spellings from the synonym table are compiled
+    into one PhraseMatcher, so each resume is scanned once, whatever the
+    number of keywords, and no resume keywords have to be extracted by
+    Gemini. A JD keyword is present when any of its spellings occurs in the
+    text on word boundaries; the score is the sum of PRIORITY_WEIGHTS of the
+    JD keywords present, as in KeywordMatcher.
+
+    Args:
+        high_kw, med_kw, low_kw (list): JD keywords by priority
+        synonyms (PhraseMatcher): Synonym groups (default: the SYNONYMS_PATH table)
+    """
+
+    def __init__(self, high_kw, med_kw, low_kw, synonyms=None):
+        import numpy as np
+        weights = {}
+        for keywords, priority in ((high_kw, "high"), (med_kw, "medium"), (low_kw, "low")):
+            for kw in _normalize(keywords):
+                weights[kw] = max(weights.get(kw, 0), PRIORITY_WEIGHTS[priority])
+        self.jd_keywords = list(weights)
+        self.weights = np.array([weights[k] for k in self.jd_keywords], dtype=float)
+        # Spelling -> indices of the JD keywords it stands for
+        spellings = {}
+        for j, kw in enumerate(self.jd_keywords):
+            for variant in expand_keyword(kw, synonyms):
+                spellings.setdefault(variant, []).append(j)
+        self.matcher = PhraseMatcher({variant: tuple(js) for variant, js in spellings.items()})
+
+    def hits(self, text):
+        """
+        Occurrences of the JD keywords in `text` as (JD keyword, spelling
+        found, start, end), in text order.
+        """
+        found = []
+        for start, end, spelling, indices in self.matcher.find(text, overlapping=True):
+            found += [(self.jd_keywords[j], spelling, start, end) for j in indices]
+        return found
+
+    def keywords_in(self, text):
+        """The JD keywords present in `text`, sorted."""
+        return sorted(set(kw for kw, _, _, _ in self.hits(text)))
+
+    def matched_keywords(self, texts):
+        """The JD keywords present in each text."""
+        return [self.keywords_in(text) for text in texts]
+
+    def score_batch(self, texts):
+        """
+        Scores resume texts.
+
+        Returns:
+            tuple: (scores, matches, hits) with one weighted score per text,
+            the (spelling found, JD keyword, 1.0) triples per text and the
+            hits() of each text, i.e. where every keyword was found
+        """
+        import numpy as np
+        index = {kw: j for j, kw in enumerate(self.jd_keywords)}
+        scores = np.zeros(len(texts))
+        matches, all_hits = [], []
+        for i, text in enumerate(texts):
+            hits = self.hits(text or "")
+            present = set(kw for kw, _, _, _ in hits)
+            scores[i] = sum(self.weights[index[kw]] for kw in present)
+            matches.append(sorted(set((spelling, kw, 1.0) for kw, spelling, _, _ in hits)))
+            all_hits.append(hits)
+        return scores, matches, all_hits
+
+
+def format_evidence(text, hits, context=30):
+    """
+    Renders the hits of each JD keyword as 'python ×3 @1204: "…built Python
+    services…"': the number of occurrences, the offset of the first one and
+    its surrounding text.
+    """
+    first, counts = {}, {}
+    for kw, _, start, end in hits:
+        counts[kw] = counts.get(kw, 0) + 1
+        first.setdefault(kw, (start, end))
+    parts = []
+    for kw in sorted(first):
+        start, end = first[kw]
+        snippet = " ".join(text[max(0, start - context):end + context].split())
+        parts.append(f'{kw} ×{counts[kw]} @{start}: "…{snippet}…"')
+    return "; ".join(parts)
+
+
+def format_matches(matches):
+    """Renders match triples as 'resume keyword → JD keyword (0.82)' for display."""
+    return "; ".join(
+        kw if kw == jd_kw else f"{kw} → {jd_kw} ({sim:.2f})" for kw, jd_kw, sim in matches
+    )
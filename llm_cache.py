@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# SQLite file holding cached Gemini responses, entry lifetime and size limit
+DEFAULT_DB_PATH = os.getenv(
+    "TA_BUDDY_LLM_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "ta_buddy", "llm_cache.sqlite3"),
+)
+DEFAULT_TTL = float(os.getenv("TA_BUDDY_LLM_CACHE_TTL_HOURS", "168")) * 3600
+DEFAULT_MAX_ENTRIES = int(os.getenv("TA_BUDDY_LLM_CACHE_MAX_ENTRIES", "20000"))
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so formatting-only differences share a cache entry."""
+    return " ".join(prompt.split())
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses in SQLite.
+
+    Entries are keyed on the model name, the temperature and a hash of the
+    normalized prompt, expire after `ttl` seconds, and the least recently
+    used ones are evicted beyond `max_entries`. Identical prompts requested
+    at the same time (e.g. from two Streamlit sessions) share one LLM call.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def key_for(model_name, temperature, prompt):
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return f"{model_name}|{temperature}|{digest}"
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0]
+        finally:
+            conn.close()
+
+    def put(self, key, response):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_or_call(self, key, call, use_cache=True):
+        """
+        Returns the cached response for `key`, otherwise runs `call()` (which
+        must return a string) and stores its result. A call for a key already
+        in flight waits for that call's response instead, and counts as a hit
+        (it does not reach the API). With `use_cache=False` the cache is
+        bypassed for reading and the call is never shared, but the fresh
+        response is stored.
+        """
+        if not use_cache:
+            with self._lock:
+                self.misses += 1
+            response = call()
+            self.put(key, response)
+            return response
+
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not owner:
+            return future.result()
+
+        try:
+            response = call()
+            self.put(key, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -32,13 +32,15 @@
 import os
 from pdf2docx import Converter
 
-def convert_pdf_to_word(pdf_path: str, docx_path: str) -> None:
+def convert_pdf_to_word(pdf_path: str, docx_path: str, start: int = 0, end=None) -> None:
     """
     Converts a PDF file to a Word (.docx) file.
 
     Parameters:
         pdf_path (str): Path to the input PDF file.
         docx_path (str): Path where the output Word file will be saved.
+        start (int): First page to convert (0-based).
+        end (int): Page to stop before, or None for the last page.
     """
     try:
         # Ensure the output directory exists
@@ -50,8 +52,8 @@ def convert_pdf_to_word(pdf_path: str, docx_path: str) -> None:
         # Create a converter object
         cv = Converter(pdf_path)
 
-        # Convert the entire PDF to Word
-        cv.convert(docx_path, start=0, end=None)
+        # Convert the requested pages (by default the entire PDF) to Word
+        cv.convert(docx_path, start=start, end=end)
 
         # Close the converter
         cv.close()
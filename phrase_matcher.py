@@ -0,0 +1,119 @@
+"""
+Multi-phrase matcher: finds every occurrence of a (large) set of phrases in
+one pass over the text, whatever the number of phrases.
+
+It is an Aho-Corasick automaton over word tokens rather than characters, so
+matches always start and end on word boundaries and a resume of a few
+thousand words takes well under a millisecond:
+
+    matcher = PhraseMatcher({"new delhi": "Delhi", "hyderabad": "Telangana"})
+    matcher.find("Based in New Delhi")   # [(9, 18, "new delhi", "Delhi")]
+"""
+import re
+
+# Words, keeping "c++", "c#", "node.js" and "b.tech" in one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+|[+#]+)*")
+
+
+def tokenize(text):
+    """Lowercase tokens of `text` as (token, start, end) with offsets into the original text."""
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text.lower())]
+
+
+def normalize_phrase(phrase):
+    """The canonical form phrases are stored and reported in: lowercase tokens joined by spaces."""
+    return " ".join(token for token, _, _ in tokenize(phrase))
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton whose transitions are word tokens.
+
+    Args:
+        phrases: Mapping phrase -> value, or an iterable of phrases (the value
+            is then the normalized phrase itself)
+    """
+
+    def __init__(self, phrases=None):
+        self._phrases = {}
+        self._compiled = False
+        if phrases is not None:
+            items = phrases.items() if isinstance(phrases, dict) else ((p, None) for p in phrases)
+            for phrase, value in items:
+                self.add(phrase, value)
+
+    def add(self, phrase, value=None):
+        """Adds a phrase (a later value for the same normalized phrase replaces the earlier one)."""
+        key = normalize_phrase(phrase)
+        if key:
+            self._phrases[key] = key if value is None else value
+            self._compiled = False
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def __contains__(self, phrase):
+        return normalize_phrase(phrase) in self._phrases
+
+    def _compile(self):
+        goto = [{}]
+        # Per state: (normalized phrase, length in tokens) of the phrases ending there
+        output = [[]]
+        for phrase in self._phrases:
+            state = 0
+            tokens = phrase.split(" ")
+            for token in tokens:
+                nxt = goto[state].get(token)
+                if nxt is None:
+                    nxt = goto[state][token] = len(goto)
+                    goto.append({})
+                    output.append([])
+                state = nxt
+            output[state].append((phrase, len(tokens)))
+        # Breadth-first failure links; outputs of the fallback state are inherited
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for token, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and token not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(token, 0) if goto[f].get(token) != nxt else 0
+                output[nxt] = output[nxt] + output[fail[nxt]]
+        self._goto, self._fail, self._output = goto, fail, output
+        self._compiled = True
+
+    def iter_matches(self, text):
+        """
+        Yields every match, overlapping ones included, as
+        (start, end, normalized phrase, value) in order of their end offset.
+        """
+        if not self._compiled:
+            self._compile()
+        goto, fail, output, phrases = self._goto, self._fail, self._output, self._phrases
+        tokens = tokenize(text)
+        state = 0
+        for i, (token, _, end) in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for phrase, length in output[state]:
+                yield tokens[i - length + 1][1], end, phrase, phrases[phrase]
+
+    def find(self, text, overlapping=False):
+        """
+        List of matches (start, end, normalized phrase, value) in text order.
+        Unless `overlapping`, only the leftmost-longest of overlapping
+        matches is kept ("new delhi" rather than "delhi").
+        """
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], -m[1]))
+        if overlapping:
+            return matches
+        kept = []
+        last_end = -1
+        for match in matches:
+            if match[0] >= last_end:
+                kept.append(match)
+                last_end = match[1]
+        return kept
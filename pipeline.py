@@ -0,0 +1,538 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from functions3 import (
+    file_to_text, load_document,
+    extract_location, local_location, gemini_location, score_location, extract_email, extract_contact_number,
+    gemini_email, gemini_cover_letter,
+    email_prompt, location_prompt, extract_resume_profile, resume_profile_prompt, estimate_tokens
+)
+from utils import invoke_llm, cover_letter_prompt_value
+from conversion_pool import DEFAULT_WORKERS, iter_convert_documents
+from keyword_matcher import (
+    DEFAULT_THRESHOLD, SENTENCE_MODEL_PATH, KeywordMatcher, PhraseKeywordMatcher, format_evidence, format_matches
+)
+from ranking import KEYWORD_SEPARATOR, RankingEngine
+from instrumentation import in_current_scope, metrics
+from compaction import prompt_text, prompt_views
+
+# Number of resumes whose Gemini calls run at the same time
+MAX_PARALLEL_RESUMES = int(os.getenv("TA_BUDDY_MAX_PARALLEL", "4"))
+
+# ----------- Keywords & scoring ------------
+
+def keywords_prompt(text):
+    return f"""
+You are an expert at extracting short, self-explanatory keywords from documents.
+
+Extract a comma-separated list of contextually meaningful and **self-explanatory** keywords from the following text. 
+Each keyword should be as short as possible but fully clear in meaning and context (e.g. "bachelor degree in computer science", "master degree in physics", "certification in data science", "Python", "Machine Learning", "AWS"). 
+Expand all short forms and abbreviations to their full forms.
+Avoid unnecessary length, full sentences, or vague terms.
+
+Return ONLY the JSON below (no extra words):
+
+{{
+  "keywords": [ ... ]
+}}
+
+TEXT:
+{text}
+"""
+
+def extract_keywords_from_text(text, model_name="Gemini Flash", use_cache=True):
+    output = invoke_llm(keywords_prompt(text), use_cache, site="keywords").strip()
+    json_match = re.search(r"\{[\s\S]*\}", output)
+    keywords = []
+    if json_match:
+        try:
+            out = json.loads(json_match.group())
+            keywords = [kw.strip().lower() for kw in out.get("keywords", []) if kw.strip()]
+        except Exception:
+            pass
+    if not keywords:
+        keywords = [w.strip().lower() for w in output.split(",") if w.strip()]
+    keywords = list(set(keywords))
+    keywords.sort()
+    return keywords
+
+def extract_jd_keywords(jd_source):
+    jd_text = file_to_text(jd_source)
+    # Compacted but not cut to a budget: every requirement of the JD is scored
+    keywords = extract_keywords_from_text(prompt_text(jd_text, "jd", budget=0))
+    return keywords
+
+def compute_weighted_score(resume_kw, high_kw, med_kw, low_kw):
+    resume_kw_set = set(k.strip().lower() for k in resume_kw)
+    a = len(resume_kw_set & set(k.strip().lower() for k in high_kw))
+    b = len(resume_kw_set & set(k.strip().lower() for k in med_kw))
+    c = len(resume_kw_set & set(k.strip().lower() for k in low_kw))
+    return a*3 + b*2 + c*1
+
+@metrics.timed("score_resumes")
+def score_resumes(keyword_lists, high_kw, med_kw, low_kw, match_mode="exact",
+                  threshold=DEFAULT_THRESHOLD, texts=None, phrase_matcher=None):
+    """
+    Scores a batch of resumes. "exact" uses compute_weighted_score; "fuzzy"
+    (character n-grams) and "semantic" (local sentence-transformers model)
+    match the whole batch at once with KeywordMatcher; "phrase" looks the JD
+    keywords and their synonyms up in the resume `texts` themselves
+    (PhraseKeywordMatcher, built once per call unless `phrase_matcher` is given).
+    Returns (scores, matches, hits) with the matched (resume kw, JD kw,
+    similarity) triples per resume and, in "phrase" mode, the hits
+    (JD kw, spelling, start, end) per resume (empty lists otherwise).
+    """
+    if match_mode == "phrase":
+        if phrase_matcher is None:
+            phrase_matcher = PhraseKeywordMatcher(high_kw, med_kw, low_kw)
+        scores, matches, hits = phrase_matcher.score_batch(texts)
+        return [int(score) for score in scores], matches, hits
+    no_hits = [[] for _ in keyword_lists]
+    if match_mode == "exact":
+        jd_set = set(k.strip().lower() for k in list(high_kw) + list(med_kw) + list(low_kw))
+        scores = [compute_weighted_score(kws, high_kw, med_kw, low_kw) for kws in keyword_lists]
+        matches = [
+            [(k, k, 1.0) for k in sorted(set(kw.strip().lower() for kw in kws) & jd_set)]
+            for kws in keyword_lists
+        ]
+        return scores, matches, no_hits
+    model_path = SENTENCE_MODEL_PATH if match_mode == "semantic" else ""
+    matcher = KeywordMatcher(high_kw, med_kw, low_kw, threshold=threshold, model_path=model_path)
+    scores, matches = matcher.score_batch(keyword_lists)
+    return [int(score) for score in scores], matches, no_hits
+
+def _score_fields(score, matched, hits=(), text=""):
+    # `matched` has one triple per JD keyword that counts (KeywordMatcher.matched_keywords
+    # in fuzzy/semantic mode), so RankingEngine re-scores the column to the same score
+    return {
+        "weighted_score": score,
+        "Keyword Matches": format_matches(matched),
+        "Matched JD Keywords": KEYWORD_SEPARATOR.join(sorted(set(jd_kw for _, jd_kw, _ in matched))),
+        "Keyword Evidence": format_evidence(text, hits) if hits else "",
+    }
+
+# ----------- Per-resume analysis ------------
+
+def prompt_token_estimates(res_text, jd_text, include_letters=True, views=None, jd_view=None):
+    """
+    Estimated input tokens for one resume: separate prompts vs one combined
+    call. Pass the compaction `views` and `jd_view` to estimate the prompts
+    as actually sent; without them the raw text is used for every prompt.
+    """
+    if views is None:
+        views = dict.fromkeys(("location", "keywords", "letter", "email", "profile"), res_text)
+        jd_view = jd_text
+    separate = estimate_tokens(location_prompt(views["location"])) + estimate_tokens(keywords_prompt(views["keywords"]))
+    if include_letters:
+        separate += (
+            estimate_tokens(cover_letter_prompt_value(views["letter"], jd_view).to_string())
+            + estimate_tokens(email_prompt(views["email"], jd_view))
+        )
+    combined = estimate_tokens(resume_profile_prompt(views["profile"], jd_view, include_letters=include_letters))
+    return separate, combined
+
+# Gemini call sites that stand in for the combined resume_profile call
+PER_FIELD_SITES = ("location", "keywords", "cover_letter", "outreach_email")
+
+def call_token_usage(recorder=metrics):
+    """
+    Calls and input/output tokens recorded in `recorder` (a metrics scope)
+    for the combined resume_profile call and for the per-field calls, as
+    {"combined": {...}, "per_field": {...}}. Only calls that reached Gemini
+    are counted; cached answers cost no tokens.
+    """
+    groups = {"combined": ("resume_profile",), "per_field": PER_FIELD_SITES}
+    return {
+        group: {
+            "calls": sum(recorder.counter_total("llm_calls", site=site, cache="miss") for site in sites),
+            "input": sum(recorder.counter_total("llm_tokens", site=site, direction="input") for site in sites),
+            "output": sum(recorder.counter_total("llm_tokens", site=site, direction="output") for site in sites),
+        }
+        for group, sites in groups.items()
+    }
+
+@metrics.timed("analyse_resume")
+def analyse_resume(res_text, jd_text, regenerate_letters=False, combined=False, include_letters=True,
+                   phrase_matcher=None):
+    """
+    Runs the Gemini calls for one resume (cover letter, email, location,
+    keywords). With `combined=True` a single structured
+    extraction call is made first and only the fields it failed to return are
+    requested individually; otherwise the four calls run in parallel. In
+    both modes the location is looked up in the local gazetteer first and
+    Gemini's answer is only used when it finds none.
+    With `include_letters=False` the cover letter and email are left empty
+    for generate_letters() to fill in later. With a `phrase_matcher`
+    (PhraseKeywordMatcher) the keywords not returned by the combined call
+    are the JD keywords found in the text instead of a Gemini call.
+    """
+    letter_cache = not regenerate_letters
+    # Each prompt only gets the compacted resume sections it needs
+    views = prompt_views(res_text)
+    jd_view = prompt_text(jd_text, "jd")
+    fields = {}
+    if combined:
+        location = local_location(res_text)
+        fields = extract_resume_profile(views["profile"], jd_view, include_letters=include_letters,
+                                        use_cache=letter_cache)
+        if location is not None:
+            fields["location"] = location
+
+    calls = {
+        # In combined mode the gazetteer has been searched already
+        "location": (gemini_location, views["location"]) if combined
+        else (extract_location, res_text, "Gemini Flash", True, views["location"]),
+        "keywords": (extract_keywords_from_text, views["keywords"]),
+    }
+    if phrase_matcher is not None:
+        calls["keywords"] = (phrase_matcher.keywords_in, res_text)
+    if include_letters:
+        calls["cover_letter"] = (gemini_cover_letter, views["letter"], jd_view, letter_cache)
+        calls["outreach_email"] = (gemini_email, views["email"], jd_view, letter_cache)
+    else:
+        fields["cover_letter"] = fields["outreach_email"] = ""
+    missing = [name for name in calls if fields.get(name) is None]
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {name: pool.submit(in_current_scope(calls[name][0]), *calls[name][1:]) for name in missing}
+            for name, future in futures.items():
+                fields[name] = future.result()
+
+    email_id = fields.get("email_id")
+    if email_id is None:
+        email_id = extract_email(res_text)
+    contact_number = fields.get("phone")
+    if contact_number is None:
+        contact_number = extract_contact_number(res_text)
+
+    resume_keywords = fields["keywords"]
+    keyword_source = "jd phrases" if phrase_matcher is not None and "keywords" in missing else "gemini"
+    separate_tokens, combined_tokens = prompt_token_estimates(res_text, jd_text, include_letters, views, jd_view)
+    raw_separate, raw_combined = prompt_token_estimates(res_text, jd_text, include_letters)
+    tokens_saved = (raw_combined - combined_tokens) if combined else (raw_separate - separate_tokens)
+    return {
+        "Candidate Location": fields["location"],
+        "Cover Letter": fields["cover_letter"],
+        "Email": fields["outreach_email"],
+        "email_id": email_id,
+        "contact_number": contact_number,
+        "Location Score": score_location(fields["location"]),
+        "keywords": resume_keywords,
+        "Resume_Keywords": ', '.join(resume_keywords),
+        "Tokens Saved": tokens_saved,
+        "Fallback Fields": ', '.join(missing) if combined else "",
+        "keyword_source": keyword_source,
+    }
+
+def generate_outreach(res_text, jd_text, use_cache=True):
+    """Cover letter and outreach email for one candidate, generated in parallel."""
+    views = prompt_views(res_text, ("letter", "email"))
+    jd_view = prompt_text(jd_text, "jd")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cover = pool.submit(in_current_scope(gemini_cover_letter), views["letter"], jd_view, use_cache)
+        email = pool.submit(in_current_scope(gemini_email), views["email"], jd_view, use_cache)
+        return cover.result(), email.result()
+
+@metrics.timed("generate_letters")
+def generate_letters(keys, artifacts, jd_text, max_workers=MAX_PARALLEL_RESUMES, regenerate=False):
+    """
+    Generates cover letters and outreach emails for the candidates in `keys`
+    (artifact keys) concurrently. Candidates that already have both are
+    skipped unless `regenerate`, so each letter is produced once per
+    candidate and JD. The text is stored in `artifacts`.
+
+    Returns:
+        dict: artifact key -> (cover letter, email) for the requested keys
+    """
+    todo = [
+        key for key in dict.fromkeys(keys)
+        if key in artifacts and (regenerate or not (artifacts[key].get("Cover Letter")
+                                                    and artifacts[key].get("Email")))
+    ]
+
+    def generate(key):
+        cover, email = generate_outreach(artifacts[key]["text"], jd_text, use_cache=not regenerate)
+        artifacts[key]["Cover Letter"] = cover
+        artifacts[key]["Email"] = email
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+            list(pool.map(in_current_scope(generate), todo))
+    return {
+        key: (artifacts[key].get("Cover Letter", ""), artifacts[key].get("Email", ""))
+        for key in keys if key in artifacts
+    }
+
+def artifact_key(resume_bytes, jd_hash):
+    """Key of a resume's cached artifacts: content hash of the resume plus the JD hash."""
+    return f"{hashlib.sha256(resume_bytes).hexdigest()}:{jd_hash}"
+
+def content_hash_of(key):
+    """Resume content hash part of an artifact key (the key of the candidate store)."""
+    return key.split(":", 1)[0]
+
+def _result_row(name, jd_name, analysis, score, days_available, batch_label, key, reused, error):
+    return {
+        "Resume File": name,
+        "Job Description": jd_name,
+        "Candidate Location": analysis.get("Candidate Location", ""),
+        "Cover Letter": analysis.get("Cover Letter", ""),
+        "Email": analysis.get("Email", ""),
+        "email_id": analysis.get("email_id", ""),
+        "contact_number": analysis.get("contact_number", ""),
+        "Days Available": days_available,
+        "Batch": batch_label,
+        "Location Score": analysis.get("Location Score", 0),
+        "Resume_Keywords": analysis.get("Resume_Keywords", ""),
+        "weighted_score": score.get("weighted_score", 0),
+        "Keyword Matches": score.get("Keyword Matches", ""),
+        "Keyword Evidence": score.get("Keyword Evidence", ""),
+        "Matched JD Keywords": score.get("Matched JD Keywords", ""),
+        "Tokens Saved": analysis.get("Tokens Saved", 0),
+        "Fallback Fields": analysis.get("Fallback Fields", ""),
+        "Artifact Key": key,
+        "Reused": reused,
+        "Error": error
+    }
+
+# ---------- Main Pipeline ----------
+
+def iter_process(resume_sources, jd_source, high_priority, medium_priority, low_priority,
+                 days_available_list=None, max_workers=MAX_PARALLEL_RESUMES,
+                 convert_workers=DEFAULT_WORKERS, regenerate_letters=False, combined=False,
+                 match_mode="exact", match_threshold=DEFAULT_THRESHOLD,
+                 artifacts=None, batch_label="Batch 1", include_letters=True, candidate_store=None):
+    """
+    Runs the pipeline and yields (index, result row) for each resume as soon
+    as it is finished, in completion order.
+
+    Resumes and the JD can be anything functions3.load_document accepts
+    (Streamlit uploads, paths, streams, (name, bytes) pairs). `artifacts` maps
+    artifact_key() to the text and LLM results of resumes processed earlier;
+    only resumes without an entry are converted and sent to Gemini, and new
+    entries are added to it. Each row's "Reused" column tells whether it came
+    from `artifacts`. Rows are scored individually; process() re-scores the
+    whole batch at once. With `include_letters=False` cover letters and
+    emails are deferred to generate_letters(). Newly analysed resumes are
+    also saved to `candidate_store` (a candidate_store.CandidateStore) if given.
+
+    With `match_mode="phrase"` no keywords are extracted by Gemini: each
+    resume's text is scanned for the JD keywords (and their synonyms) and the
+    rows get a "Keyword Evidence" column telling where they were found.
+    Artifacts analysed that way are analysed again in the other modes.
+
+    With `jd_source=None` the resumes are analysed without a JD (no letters),
+    so the artifacts can be scored against any number of roles (see process_roles).
+    """
+    if artifacts is None:
+        artifacts = {}
+    if jd_source is None:
+        jd_name, jd_text, jd_hash = "", "", ""
+        include_letters = False
+    else:
+        jd_name, jd_bytes = load_document(jd_source)
+        with metrics.span("jd_to_text"):
+            jd_text = file_to_text((jd_name, jd_bytes))
+        jd_hash = hashlib.sha256(jd_bytes).hexdigest()
+
+    documents = [load_document(source) for source in resume_sources]
+    keys = [artifact_key(data, jd_hash) for _, data in documents]
+    phrase_matcher = None
+    if match_mode == "phrase":
+        phrase_matcher = PhraseKeywordMatcher(high_priority, medium_priority, low_priority)
+    reused = [
+        key in artifacts and not regenerate_letters
+        and (phrase_matcher is not None or artifacts[key].get("keyword_source") != "jd phrases")
+        for key in keys
+    ]
+    todo = [i for i in range(len(documents)) if not reused[i]]
+    if days_available_list is None:
+        days_available_list = [None] * len(documents)
+
+    finished = queue.Queue()
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+
+    @in_current_scope
+    def analyse(i, text):
+        analysis = analyse_resume(text, jd_text, regenerate_letters, combined, include_letters, phrase_matcher)
+        artifacts[keys[i]] = dict(analysis, text=text)
+        if candidate_store is not None:
+            candidate_store.add(content_hash_of(keys[i]), documents[i][0], text, analysis)
+        return ""
+
+    @in_current_scope
+    def feed():
+        # Conversion results are handed to the LLM pool as soon as they arrive
+        try:
+            for j, conv in iter_convert_documents([documents[i] for i in todo], max_workers=convert_workers):
+                if stop.is_set():
+                    break
+                i = todo[j]
+                if conv["error"]:
+                    finished.put((i, conv["error"]))
+                    continue
+                future = pool.submit(analyse, i, conv["text"])
+                future.add_done_callback(lambda f, i=i: finished.put(
+                    (i, f.result() if not f.exception() else f"Analysis failed: {f.exception()}")
+                ))
+        except Exception as e:
+            finished.put((None, e))
+
+    for i in range(len(documents)):
+        if reused[i]:
+            finished.put((i, ""))
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        for _ in range(len(documents)):
+            i, error = finished.get()
+            if i is None:
+                raise error
+            analysis = {} if error else artifacts[keys[i]]
+            score = {}
+            if not error:
+                scores, matches, hits = score_resumes(
+                    [analysis["keywords"]], high_priority, medium_priority, low_priority,
+                    match_mode=match_mode, threshold=match_threshold,
+                    texts=[analysis["text"]], phrase_matcher=phrase_matcher,
+                )
+                score = _score_fields(scores[0], matches[0], hits[0], analysis["text"])
+            yield i, _result_row(documents[i][0], jd_name, analysis, score, days_available_list[i],
+                                 batch_label, keys[i], reused[i], error)
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def score_rows(rows, artifacts, high_priority, medium_priority, low_priority,
+               match_mode="exact", match_threshold=DEFAULT_THRESHOLD):
+    """Re-scores result rows as one batch (one matrix product in fuzzy mode)."""
+    ok = [i for i, row in enumerate(rows) if not row["Error"] and row["Artifact Key"] in artifacts]
+    texts = [artifacts[rows[i]["Artifact Key"]]["text"] for i in ok]
+    scores, matches, hits = score_resumes(
+        [artifacts[rows[i]["Artifact Key"]]["keywords"] for i in ok],
+        high_priority, medium_priority, low_priority,
+        match_mode=match_mode, threshold=match_threshold, texts=texts,
+    )
+    for i, score, matched, found, text in zip(ok, scores, matches, hits, texts):
+        rows[i].update(_score_fields(score, matched, found, text))
+    return rows
+
+@metrics.timed("process")
+def process(resume_files, jd_file, days_available_list,
+            high_priority, medium_priority, low_priority, tmpdir=None,
+            max_workers=MAX_PARALLEL_RESUMES, convert_workers=DEFAULT_WORKERS,
+            regenerate_letters=False, combined=False,
+            match_mode="exact", match_threshold=DEFAULT_THRESHOLD,
+            artifacts=None, include_letters=True, semantic_similarity=False, candidate_store=None):
+    """
+    Runs the pipeline for a batch and returns the result rows in input order.
+    With `semantic_similarity` the rows also get a "Semantic Similarity"
+    column (see similarity.add_semantic_similarity).
+    """
+    if not resume_files or not jd_file:
+        return []
+    if artifacts is None:
+        artifacts = {}
+    rows = [None] * len(resume_files)
+    for i, row in iter_process(
+        resume_files, jd_file, high_priority, medium_priority, low_priority,
+        days_available_list=days_available_list, max_workers=max_workers,
+        convert_workers=convert_workers, regenerate_letters=regenerate_letters,
+        combined=combined, match_mode=match_mode, match_threshold=match_threshold,
+        artifacts=artifacts, include_letters=include_letters, candidate_store=candidate_store,
+    ):
+        rows[i] = row
+    rows = score_rows(rows, artifacts, high_priority, medium_priority, low_priority,
+                      match_mode, match_threshold)
+    if semantic_similarity:
+        from similarity import add_semantic_similarity
+        add_semantic_similarity(rows, artifacts, file_to_text(jd_file))
+    return rows
+
+# ---------- Multiple roles ----------
+
+def score_roles(keyword_lists, roles, match_mode="exact", threshold=DEFAULT_THRESHOLD, texts=None):
+    """
+    Resumes x roles weighted-score matrix. Each role is a dict with "high",
+    "medium" and "low" keyword lists. Resume keywords (in "phrase" mode the
+    resume `texts`) are matched once against the union of all roles'
+    keywords, then every role is scored in one sparse matrix product
+    (RankingEngine.score_matrix).
+    """
+    priorities = [(role["high"], role["medium"], role["low"]) for role in roles]
+    if match_mode == "phrase":
+        all_keywords = [kw for p in priorities for kws in p for kw in kws]
+        keyword_lists = PhraseKeywordMatcher([], [], all_keywords).matched_keywords(texts)
+    elif match_mode != "exact":
+        all_keywords = [kw for p in priorities for kws in p for kw in kws]
+        model_path = SENTENCE_MODEL_PATH if match_mode == "semantic" else ""
+        matcher = KeywordMatcher([], [], all_keywords, threshold=threshold, model_path=model_path)
+        keyword_lists = matcher.matched_keywords(keyword_lists)
+    return RankingEngine.from_keyword_lists(keyword_lists).score_matrix(priorities)
+
+def role_column(role_name):
+    return f"Score: {role_name}"
+
+@metrics.timed("process_roles")
+def process_roles(resume_files, roles, days_available_list=None,
+                  max_workers=MAX_PARALLEL_RESUMES, convert_workers=DEFAULT_WORKERS,
+                  combined=False, match_mode="exact", match_threshold=DEFAULT_THRESHOLD,
+                  artifacts=None, candidate_store=None):
+    """
+    Ranks one resume pool against several job descriptions in one pass.
+
+    Each resume is converted and sent to Gemini once (without a JD, so no
+    letters); the role scores are then one resumes x roles matrix. `roles`
+    is a list of dicts with "name", "high", "medium" and "low".
+
+    Returns:
+        tuple: (rows, matrix) with one result row per resume in input order,
+        carrying a "Score: <role>" column per role plus "Best Role" and
+        "Best Role Score", and the scores as an array (resumes x roles, zero
+        for failed resumes)
+    """
+    import numpy as np
+    if not resume_files or not roles:
+        return [], np.zeros((0, len(roles)), dtype=int)
+    if artifacts is None:
+        artifacts = {}
+    rows = [None] * len(resume_files)
+    # In "phrase" mode the resumes are searched for the vocabulary of all roles
+    vocabulary = [kw for role in roles for p in ("high", "medium", "low") for kw in role[p]]
+    phrase_mode = match_mode == "phrase"
+    for i, row in iter_process(
+        resume_files, None, [], [], vocabulary if phrase_mode else [],
+        days_available_list=days_available_list, max_workers=max_workers,
+        convert_workers=convert_workers, combined=combined,
+        match_mode="phrase" if phrase_mode else "exact",
+        artifacts=artifacts, include_letters=False, candidate_store=candidate_store,
+    ):
+        rows[i] = row
+    ok = [i for i, row in enumerate(rows) if not row["Error"] and row["Artifact Key"] in artifacts]
+    matrix = np.zeros((len(rows), len(roles)), dtype=int)
+    if ok:
+        matrix[ok] = score_roles(
+            [artifacts[rows[i]["Artifact Key"]]["keywords"] for i in ok], roles, match_mode, match_threshold,
+            texts=[artifacts[rows[i]["Artifact Key"]]["text"] for i in ok],
+        )
+    for i, row in enumerate(rows):
+        for j, role in enumerate(roles):
+            row[role_column(role["name"])] = int(matrix[i, j])
+        best = int(matrix[i].argmax())
+        row["Best Role"] = roles[best]["name"] if matrix[i, best] > 0 else ""
+        row["Best Role Score"] = int(matrix[i, best])
+        row["weighted_score"] = int(matrix[i, best])
+    return rows, matrix
+
+def role_shortlist(rows, matrix, role_index, top_n=None):
+    """Rows ranked by their score for one role (best first, resumes that failed left out)."""
+    import numpy as np
+    order = np.argsort(-matrix[:, role_index], kind="stable")
+    ranked = [dict(rows[i], weighted_score=int(matrix[i, role_index])) for i in order if not rows[i]["Error"]]
+    return ranked if top_n is None else ranked[:top_n]
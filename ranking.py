@@ -0,0 +1,100 @@
+from keyword_matcher import PRIORITY_WEIGHTS
+
+# Separator used for keyword lists stored in a single results column
+KEYWORD_SEPARATOR = "; "
+
+
+class RankingEngine:
+    """
+    Re-scores a pool of processed resumes without any LLM or conversion work.
+
+    Each resume is a row of a sparse binary resume x vocabulary matrix holding
+    the JD keywords it matched (exactly or fuzzily) during processing. Since
+    the High/Medium/Low lists are a partition of the JD keywords, a new
+    priority selection is just a new weight vector, and all weighted scores
+    are one matrix-vector product.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self._indices = []
+        self._indptr = [0]
+        self._matrix = None
+
+    def add(self, keywords):
+        """Appends one resume (its matched JD keywords) as a new row."""
+        for kw in set(k.strip().lower() for k in keywords if k and k.strip()):
+            self._indices.append(self.vocabulary.setdefault(kw, len(self.vocabulary)))
+        self._indptr.append(len(self._indices))
+        self._matrix = None
+
+    @classmethod
+    def from_keyword_lists(cls, keyword_lists):
+        engine = cls()
+        for keywords in keyword_lists:
+            engine.add(keywords)
+        return engine
+
+    @classmethod
+    def from_column(cls, values):
+        """Builds the engine from a results column of KEYWORD_SEPARATOR-joined keywords."""
+        return cls.from_keyword_lists(
+            (v.split(KEYWORD_SEPARATOR) if isinstance(v, str) and v else []) for v in values
+        )
+
+    def __len__(self):
+        return len(self._indptr) - 1
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            import numpy as np
+            from scipy import sparse
+            data = np.ones(len(self._indices), dtype=np.float32)
+            self._matrix = sparse.csr_matrix(
+                (data, np.array(self._indices, dtype=np.int64), np.array(self._indptr, dtype=np.int64)),
+                shape=(len(self), len(self.vocabulary)),
+            )
+        return self._matrix
+
+    def weight_vector(self, high_kw, med_kw, low_kw):
+        """Priority weight per vocabulary column (keywords not in the JD weigh 0)."""
+        import numpy as np
+        weights = np.zeros(len(self.vocabulary), dtype=np.float32)
+        # Apply low first so a keyword listed under several priorities keeps the highest
+        for keywords, priority in ((low_kw, "low"), (med_kw, "medium"), (high_kw, "high")):
+            for kw in keywords:
+                col = self.vocabulary.get(kw.strip().lower())
+                if col is not None:
+                    weights[col] = max(weights[col], PRIORITY_WEIGHTS[priority])
+        return weights
+
+    def weight_matrix(self, priorities):
+        """Vocabulary x roles weight matrix for a list of (high, medium, low) keyword lists."""
+        import numpy as np
+        if not priorities:
+            return np.zeros((len(self.vocabulary), 0), dtype=np.float32)
+        return np.stack([self.weight_vector(*p) for p in priorities], axis=1)
+
+    def score_matrix(self, priorities):
+        """
+        Resumes x roles weighted scores, one column per (high, medium, low)
+        priority selection, in a single sparse matrix product.
+        """
+        import numpy as np
+        if not len(self):
+            return np.zeros((0, len(priorities)), dtype=int)
+        return np.asarray(self.matrix @ self.weight_matrix(priorities)).astype(int)
+
+    def scores(self, high_kw, med_kw, low_kw):
+        """Weighted score of every resume, in insertion order."""
+        import numpy as np
+        if not len(self):
+            return np.zeros(0, dtype=int)
+        return (self.matrix @ self.weight_vector(high_kw, med_kw, low_kw)).astype(int)
+
+    def rank(self, high_kw, med_kw, low_kw, top_k=None):
+        """Row indices ordered by descending score (stable for ties)."""
+        import numpy as np
+        order = np.argsort(-self.scores(high_kw, med_kw, low_kw), kind="stable")
+        return order if top_k is None else order[:top_k]
@@ -0,0 +1,281 @@
+"""
+Client-side rate limiting of the Gemini calls, shared by every thread and
+Streamlit session of the process.
+
+Each call first takes one request from a requests/minute token bucket and
+its estimated tokens from a tokens/minute bucket, then a slot from an AIMD
+concurrency limit: the limit grows by about one slot per round of successful
+calls and is halved on a 429 / quota error or a latency spike. Throttled and
+transient errors are retried with full-jitter exponential backoff; once a
+call returns, its estimated tokens are corrected with the real usage.
+
+    from rate_limiter import limiter
+    response = limiter.invoke(model, prompt, site="location")
+"""
+import os
+import random
+import re
+import threading
+import time
+
+from instrumentation import metrics
+
+# Quota of the API key (0 = unlimited)
+RPM = float(os.getenv("TA_BUDDY_RPM", "1000"))
+TPM = float(os.getenv("TA_BUDDY_TPM", "1000000"))
+
+# Upper bound of the adaptive number of concurrent Gemini requests
+MAX_CONCURRENCY = int(os.getenv("TA_BUDDY_LLM_CONCURRENCY", "16"))
+
+# Retries of a throttled or failed call, and the backoff before each one (seconds)
+MAX_RETRIES = int(os.getenv("TA_BUDDY_LLM_RETRIES", "6"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Part of the quota a bucket may spend at once
+BURST_FRACTION = 1 / 12
+
+# HTTP status codes worth retrying; 429 also shrinks the concurrency limit
+THROTTLE_CODES = (429,)
+TRANSIENT_CODES = (500, 502, 503, 504)
+
+
+# Fallback for errors without a status attribute: the wording of throttled and
+# unavailable answers (a bare "429" or "503" in a message is not enough)
+THROTTLE_TEXT = re.compile(r"RESOURCE_EXHAUSTED|too many requests|rate limit|quota exceeded", re.I)
+UNAVAILABLE_TEXT = re.compile(r"\bUNAVAILABLE\b|service unavailable", re.I)
+
+# gRPC status names (google.api_core, grpc) -> HTTP status
+GRPC_CODES = {"RESOURCE_EXHAUSTED": 429, "UNAVAILABLE": 503, "INTERNAL": 500, "DEADLINE_EXCEEDED": 504}
+
+
+def _attribute_code(exc):
+    """HTTP status carried by the exception itself: `.code`/`.status_code` or its response's."""
+    for attr in ("code", "status_code"):
+        code = getattr(exc, attr, None)
+        if callable(code):
+            # grpc.RpcError.code() returns a StatusCode enum
+            try:
+                code = GRPC_CODES.get(getattr(code(), "name", None))
+            except Exception:
+                code = None
+        if isinstance(code, int):
+            # Includes http.HTTPStatus (google.api_core's ResourceExhausted.code etc.)
+            return int(code)
+    code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _status_code(exc):
+    """
+    HTTP status of an API error (google.api_core, google-genai, langchain or
+    fake), following the cause chain. Status attributes anywhere in the chain
+    win over the wording of the messages.
+    """
+    chain = []
+    while exc is not None and len(chain) < 10:
+        chain.append(exc)
+        exc = exc.__cause__
+    for exc in chain:
+        code = _attribute_code(exc)
+        if code is not None:
+            return code
+    for exc in chain:
+        text = str(exc)
+        if THROTTLE_TEXT.search(text):
+            return 429
+        if UNAVAILABLE_TEXT.search(text):
+            return 503
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket for a per-period quota. The burst (`capacity`) is taken out
+    of the refill rate, so no window of `period` seconds is ever granted
+    more than `per_period` tokens.
+    """
+
+    def __init__(self, per_period, period=60.0, burst_fraction=BURST_FRACTION,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.capacity = max(1.0, per_period * burst_fraction)
+        self.rate = max(per_period - self.capacity, 1.0) / period
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1.0):
+        """Blocks until `amount` tokens are available and takes them; returns the seconds waited."""
+        # Requests larger than the bucket only wait until it is full (then go into debt)
+        needed = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return waited
+                wait = (needed - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def debit(self, amount):
+        """Takes (or, if negative, gives back) tokens without waiting, e.g. to correct an estimate."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the number of requests in flight: +1/limit per success
+    (about one slot per round of calls), halved on throttling or when a
+    call takes `spike_factor` times the moving average latency. Decreases
+    are applied at most once per `cooldown` seconds, so one burst of errors
+    only halves the limit once.
+    """
+
+    def __init__(self, maximum=MAX_CONCURRENCY, initial=None, minimum=1,
+                 spike_factor=3.0, cooldown=1.0, clock=time.monotonic):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = float(initial or max(minimum, self.maximum // 2))
+        self.spike_factor = spike_factor
+        self.cooldown = cooldown
+        self.clock = clock
+        self.in_flight = 0
+        self.latency = None
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def _decrease(self, reason):
+        now = self.clock()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit / 2)
+        metrics.incr("llm_concurrency_decreases", reason=reason)
+
+    def on_success(self, seconds):
+        with self._cond:
+            if self.latency is not None and seconds > self.spike_factor * self.latency:
+                self._decrease("latency")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self._cond.notify_all()
+            # Moving average of the latency, the baseline for spikes
+            self.latency = seconds if self.latency is None else 0.9 * self.latency + 0.1 * seconds
+
+    def on_throttle(self):
+        with self._cond:
+            self._decrease("throttled")
+
+
+class GeminiRateLimiter:
+    """
+    Requests/minute and tokens/minute buckets, adaptive concurrency and
+    jittered retries around LLM calls. One instance (`limiter`) is shared by
+    the whole process, so all sessions draw from the same budget.
+
+    Args:
+        rpm, tpm (float): Requests and tokens per `period` (0 = unlimited)
+        max_concurrency (int): Upper bound of the concurrency limit
+        max_retries (int): Retries of a throttled or transient failure
+        period (float): Length of the quota window in seconds
+    """
+
+    def __init__(self, rpm=RPM, tpm=TPM, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_cap=BACKOFF_CAP, period=60.0,
+                 clock=time.monotonic, sleep=time.sleep, seed=None):
+        self.requests = TokenBucket(rpm, period, clock=clock, sleep=sleep) if rpm else None
+        self.tokens = TokenBucket(tpm, period, clock=clock, sleep=sleep) if tpm else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, clock=clock)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.clock = clock
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        # Moving average of the output tokens per call site
+        self._output_tokens = {}
+
+    def backoff(self, attempt):
+        """Full jitter: uniform between 0 and base * 2^attempt (capped)."""
+        return self._rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def call(self, fn, estimated_tokens=0, site="llm"):
+        """Runs `fn()` within the limits, retrying throttled and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            waited = 0.0
+            if self.requests is not None:
+                waited += self.requests.acquire(1)
+            if self.tokens is not None:
+                waited += self.tokens.acquire(estimated_tokens)
+            if waited:
+                metrics.record("rate_limit_wait", waited)
+            self.concurrency.acquire()
+            start = self.clock()
+            try:
+                result = fn()
+            except Exception as e:
+                self.concurrency.release()
+                code = _status_code(e)
+                if code in THROTTLE_CODES:
+                    self.concurrency.on_throttle()
+                    metrics.incr("llm_throttled", site=site)
+                elif code not in TRANSIENT_CODES:
+                    raise
+                if attempt == self.max_retries:
+                    raise
+                metrics.incr("llm_retries", site=site)
+                self.sleep(self.backoff(attempt))
+                continue
+            self.concurrency.release()
+            self.concurrency.on_success(self.clock() - start)
+            return result
+
+    def invoke(self, model, prompt, site="llm"):
+        """model.invoke(prompt) within the limits; the token estimate is corrected with the real usage."""
+        text = prompt if isinstance(prompt, str) else prompt.to_string()
+        # Input: about 4 characters per token, as functions3.estimate_tokens.
+        # Output: the moving average of the call site (unknown before its first answer)
+        estimate = (len(text) + 3) // 4 + int(self._output_tokens.get(site, 0))
+        response = self.call(lambda: model.invoke(prompt), estimate, site)
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage.get("total_tokens"):
+            if self.tokens is not None:
+                self.tokens.debit(usage["total_tokens"] - estimate)
+            output = usage.get("output_tokens", 0)
+            previous = self._output_tokens.get(site)
+            self._output_tokens[site] = output if previous is None else 0.8 * previous + 0.2 * output
+        return response
+
+    def stats(self):
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "requests_available": round(self.requests.tokens, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.tokens) if self.tokens else None,
+        }
+
+
+# Process-wide limiter shared by every thread and Streamlit session
+limiter = GeminiRateLimiter()
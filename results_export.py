@@ -0,0 +1,94 @@
+"""
+In-memory exports of result tables for download: Excel, CSV and (when
+pyarrow or fastparquet is installed) Parquet. Nothing is written to disk, so
+concurrent sessions cannot overwrite each other's files.
+
+Large Excel exports use openpyxl's write-only mode, which streams rows into
+the workbook instead of building a cell object per value:
+
+    data = export_frame(df, "Excel")
+    st.download_button("Download", data, file_name="results" + EXPORT_FORMATS["Excel"][0])
+"""
+import hashlib
+import importlib.util
+import io
+import math
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Rows from which Excel files are written in openpyxl's write-only mode
+WRITE_ONLY_ROWS = 500
+
+
+def available_formats():
+    """Export formats usable here (Parquet needs pyarrow or fastparquet)."""
+    formats = ["Excel", "CSV"]
+    if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+        formats.append("Parquet")
+    return formats
+
+
+def _cell(value):
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        # Control characters from PDF text are not allowed in XLSX
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def excel_bytes(sheets):
+    """
+    XLSX file with one sheet per (sheet name, DataFrame) pair. Workbooks with
+    WRITE_ONLY_ROWS rows or more are streamed with openpyxl's write-only mode.
+    """
+    import pandas as pd
+    buffer = io.BytesIO()
+    if sum(len(frame) for _, frame in sheets) < WRITE_ONLY_ROWS:
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            for name, frame in sheets:
+                text = frame.select_dtypes(include=["object", "string"]).columns
+                frame = frame.assign(**{str(c): frame[c].map(_cell) for c in text})
+                frame.to_excel(writer, sheet_name=name, index=False)
+        return buffer.getvalue()
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for name, frame in sheets:
+        sheet = workbook.create_sheet(title=name)
+        sheet.append([str(column) for column in frame.columns])
+        for row in frame.itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def export_frame(frame, fmt="Excel", sheet_name="Results"):
+    """A DataFrame as the bytes of an Excel, CSV or Parquet file."""
+    if fmt == "Excel":
+        return excel_bytes([(sheet_name, frame)])
+    if fmt == "CSV":
+        # The BOM makes Excel open the file as UTF-8
+        return frame.to_csv(index=False).encode("utf-8-sig")
+    if fmt == "Parquet":
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def frame_signature(frame):
+    """Content hash of a DataFrame (values, index and column names), e.g. as a cache key."""
+    import pandas as pd
+    digest = hashlib.sha256(repr(list(frame.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,302 @@
+"""
+Batched semantic similarity between resumes and a job description.
+
+Resumes are embedded in chunks with `embed_documents` and their vectors kept
+in a memory-mapped matrix on disk (keyed by a hash of the text, so unchanged
+resumes are never embedded twice); the JD is embedded once per text. All
+similarities for a JD are one matrix-vector product. Above ANN_THRESHOLD
+vectors, top_k uses an approximate nearest neighbour index when hnswlib is
+installed.
+
+Backends (TA_BUDDY_EMBEDDINGS): "gemini" (utils.get_embedding_model),
+"sentence" (local sentence-transformers model, TA_BUDDY_SENTENCE_MODEL) or
+"fake" (fake_llm.FakeEmbeddings, offline).
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+from keyword_matcher import SENTENCE_MODEL_PATH, load_sentence_model
+
+DEFAULT_BACKEND = os.getenv("TA_BUDDY_EMBEDDINGS", "gemini")
+
+# Directory of the vector stores (one sub-directory per backend)
+VECTOR_DIR = os.getenv(
+    "TA_BUDDY_VECTOR_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ta_buddy", "vectors"),
+)
+
+# Texts per embed_documents request
+EMBED_CHUNK = int(os.getenv("TA_BUDDY_EMBED_CHUNK", "100"))
+
+# Pool size from which top_k switches to the approximate index (if available)
+ANN_THRESHOLD = int(os.getenv("TA_BUDDY_ANN_THRESHOLD", "100000"))
+
+
+class SentenceTransformerEmbeddings:
+    """`embed_documents` / `embed_query` on a local sentence-transformers model."""
+
+    def __init__(self, model_path=SENTENCE_MODEL_PATH):
+        if not model_path:
+            raise ValueError("Set TA_BUDDY_SENTENCE_MODEL to a local sentence-transformers model")
+        self.model_path = model_path
+
+    def embed_documents(self, texts):
+        return load_sentence_model(self.model_path).encode(texts, normalize_embeddings=True)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def get_embedding_backend(name=DEFAULT_BACKEND):
+    if name == "gemini":
+        from utils import get_embedding_model
+        return get_embedding_model()
+    if name == "sentence":
+        return SentenceTransformerEmbeddings()
+    if name == "fake":
+        from fake_llm import FakeEmbeddings
+        return FakeEmbeddings()
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalized(vectors):
+    import numpy as np
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorStore:
+    """
+    Append-only matrix of L2-normalized float32 vectors in a memory-mapped
+    .npy file, with the row keys in a text file next to it. Vectors are
+    written (and flushed) before their keys, so an interrupted write never
+    leaves a key pointing at an empty row.
+
+    Writers hold an exclusive lock on vectors.lock (POSIX only) and reload the
+    keys and matrix first, so several processes can share one store.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.matrix_path = os.path.join(directory, "vectors.npy")
+        self.keys_path = os.path.join(directory, "keys.txt")
+        self.lock_path = os.path.join(directory, "vectors.lock")
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._loaded = None
+        self.keys = []
+        self.rows = {}
+        with self._lock:
+            self._load()
+
+    def _file_state(self):
+        try:
+            matrix, keys = os.stat(self.matrix_path), os.stat(self.keys_path)
+        except FileNotFoundError:
+            return None
+        return matrix.st_ino, matrix.st_size, keys.st_size
+
+    def _load(self):
+        """(Re)reads the keys and maps the matrix if another process has changed them."""
+        state = self._file_state()
+        if state is None or state == self._loaded:
+            return
+        import numpy as np
+        self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            keys = [line.strip() for line in f if line.strip()]
+        self.keys = keys[:len(self._matrix)]
+        self.rows = {key: i for i, key in enumerate(self.keys)}
+        self._loaded = state
+
+    @contextmanager
+    def _write_lock(self):
+        """Thread lock plus (where fcntl exists) an exclusive lock shared with other processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    @property
+    def dim(self):
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def matrix(self):
+        """The stored vectors (a memory-mapped view, one row per key)."""
+        import numpy as np
+        with self._lock:
+            if self._matrix is None:
+                return np.zeros((0, 0), dtype=np.float32)
+            return self._matrix[:len(self.keys)]
+
+    def _reserve(self, rows, dim):
+        import numpy as np
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if rows <= capacity:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        new_capacity = max(rows, 2 * capacity, 1024)
+        tmp_path = self.matrix_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim))
+        if len(self.keys):
+            grown[:len(self.keys)] = self._matrix[:len(self.keys)]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp_path, self.matrix_path)
+        self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+
+    def add(self, keys, vectors):
+        """Appends vectors for keys that are not stored yet."""
+        vectors = _normalized(vectors)
+        with self._write_lock():
+            self._load()
+            new = [(k, v) for k, v in zip(keys, vectors) if k not in self.rows]
+            if not new:
+                return
+            if self.dim is not None and self.dim != vectors.shape[1]:
+                raise ValueError(f"Vector size {vectors.shape[1]} does not match the store ({self.dim})")
+            start = len(self.keys)
+            self._reserve(start + len(new), vectors.shape[1])
+            for offset, (_, vector) in enumerate(new):
+                self._matrix[start + offset] = vector
+            self._matrix.flush()
+            with open(self.keys_path, "a", encoding="utf-8") as f:
+                f.write("".join(key + "\n" for key, _ in new))
+            for offset, (key, _) in enumerate(new):
+                self.rows[key] = start + offset
+                self.keys.append(key)
+            self._loaded = self._file_state()
+
+    def vectors(self, keys):
+        import numpy as np
+        with self._lock:
+            return np.asarray(self._matrix[[self.rows[k] for k in keys]])
+
+
+class SimilarityIndex:
+    """
+    Resume/JD similarity over a persistent VectorStore.
+
+    Args:
+        backend: Object with `embed_documents` and `embed_query`, or a backend name
+        store_dir (str): Vector store directory (default: VECTOR_DIR/<backend name>)
+        chunk_size (int): Texts per embed_documents request
+    """
+
+    def __init__(self, backend=DEFAULT_BACKEND, store_dir=None, chunk_size=EMBED_CHUNK):
+        name = backend if isinstance(backend, str) else type(backend).__name__
+        self.backend = get_embedding_backend(backend) if isinstance(backend, str) else backend
+        self.store = VectorStore(store_dir or os.path.join(VECTOR_DIR, name))
+        self.chunk_size = max(1, int(chunk_size))
+        self._queries = {}
+        self._ann = None
+        self._ann_size = 0
+
+    def add_texts(self, texts):
+        """Embeds (in chunks) the texts not stored yet; returns their keys."""
+        keys = [text_key(t) for t in texts]
+        todo = list({k: t for k, t in zip(keys, texts) if k not in self.store}.items())
+        for start in range(0, len(todo), self.chunk_size):
+            chunk = todo[start:start + self.chunk_size]
+            vectors = self.backend.embed_documents([t for _, t in chunk])
+            self.store.add([k for k, _ in chunk], vectors)
+        return keys
+
+    def query_vector(self, text):
+        """Embedding of a JD, computed once per text."""
+        key = text_key(text)
+        if key not in self._queries:
+            self._queries[key] = _normalized(self.backend.embed_query(text))
+        return self._queries[key]
+
+    def similarities(self, texts, jd_text):
+        """Cosine similarity of each text with the JD (one matrix-vector product)."""
+        keys = self.add_texts(texts)
+        if not keys:
+            return []
+        return self.store.vectors(keys) @ self.query_vector(jd_text)
+
+    def top_k(self, jd_text, k=10):
+        """The k stored resumes most similar to the JD, as (text key, similarity) pairs."""
+        import numpy as np
+        if not len(self.store):
+            return []
+        query = self.query_vector(jd_text)
+        k = min(k, len(self.store))
+        if len(self.store) >= ANN_THRESHOLD:
+            ann = self._ann_index()
+            if ann is not None:
+                labels, distances = ann.knn_query(query, k=k)
+                return [(self.store.keys[i], float(1 - d)) for i, d in zip(labels[0], distances[0])]
+        scores = self.store.matrix @ query
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.store.keys[i], float(scores[i])) for i in best]
+
+    def _ann_index(self):
+        try:
+            import hnswlib
+        except ImportError:
+            return None
+        if self._ann is None or self._ann_size != len(self.store):
+            index = hnswlib.Index(space="cosine", dim=self.store.dim)
+            index.init_index(max_elements=len(self.store), ef_construction=200, M=16)
+            index.add_items(self.store.matrix, list(range(len(self.store))))
+            index.set_ef(64)
+            self._ann, self._ann_size = index, len(self.store)
+        return self._ann
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(backend=DEFAULT_BACKEND):
+    """Shared SimilarityIndex per backend name."""
+    with _indexes_lock:
+        if backend not in _indexes:
+            _indexes[backend] = SimilarityIndex(backend)
+        return _indexes[backend]
+
+
+def add_semantic_similarity(rows, artifacts, jd_text, backend=DEFAULT_BACKEND):
+    """
+    Adds a "Semantic Similarity" column (resume vs JD embedding cosine) to
+    result rows, embedding all new resumes of the batch in chunks.
+    """
+    ok = [i for i, row in enumerate(rows) if not row["Error"] and row["Artifact Key"] in artifacts]
+    scores = get_similarity_index(backend).similarities(
+        [artifacts[rows[i]["Artifact Key"]]["text"] for i in ok], jd_text
+    )
+    for row in rows:
+        row["Semantic Similarity"] = None
+    for i, score in zip(ok, scores):
+        rows[i]["Semantic Similarity"] = round(float(score), 4)
+    return rows
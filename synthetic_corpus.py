@@ -0,0 +1,243 @@
+"""
+Generates synthetic resumes and job descriptions (PDF and DOCX) for offline
+benchmarks. Documents are deterministic for a given seed and vary in length
+and in how much of their content sits in tables.
+
+Example:
+    python synthetic_corpus.py bench_corpus --resumes 500 --table-density 0.5
+"""
+import argparse
+import os
+import random
+
+SKILLS = [
+    "python", "java", "sql", "machine learning", "deep learning", "natural language processing",
+    "data analysis", "amazon web services", "microsoft azure", "google cloud platform", "docker",
+    "kubernetes", "react", "node.js", "django", "flask", "spark", "hadoop", "tableau", "power bi",
+    "excel", "statistics", "computer vision", "tensorflow", "pytorch", "scikit-learn", "git",
+    "linux", "rest api", "microservices", "agile", "scrum", "project management",
+    "stakeholder management", "communication", "leadership", "etl", "data warehousing",
+    "continuous integration", "unit testing", "javascript", "typescript", "c++", "go",
+    "bachelor degree in computer science", "master degree in data science",
+    "certification in cloud computing", "bachelor of technology", "master of business administration",
+]
+
+# (city, state) pairs; the Telangana / Andhra Pradesh ones get a Location Score
+LOCATIONS = [
+    ("Hyderabad", "Telangana"), ("Warangal", "Telangana"), ("Visakhapatnam", "Andhra Pradesh"),
+    ("Vijayawada", "Andhra Pradesh"), ("Bengaluru", "Karnataka"), ("Chennai", "Tamil Nadu"),
+    ("Pune", "Maharashtra"), ("Mumbai", "Maharashtra"), ("New Delhi", "Delhi"),
+    ("Kolkata", "West Bengal"), ("Noida", "Uttar Pradesh"), ("Ahmedabad", "Gujarat"),
+]
+
+FIRST_NAMES = ["Riya", "Arjun", "Meera", "Karan", "Sneha", "Vikram", "Ananya", "Rahul", "Priya", "Aditya"]
+LAST_NAMES = ["Dubey", "Sharma", "Reddy", "Iyer", "Nair", "Gupta", "Rao", "Patel", "Khan", "Das"]
+COMPANIES = ["Infosys", "TCS", "Wipro", "Accenture", "Deloitte", "Amazon", "Microsoft", "Flipkart"]
+ROLES = ["Data Scientist", "Software Engineer", "ML Engineer", "Data Analyst", "Backend Developer"]
+
+FILLER = (
+    "Worked closely with cross-functional teams to deliver {skill} solutions on time. "
+    "Improved the reliability of {skill} pipelines and reduced processing time by {pct}%. "
+    "Mentored junior engineers and documented best practices for {skill}. "
+    "Designed and reviewed {skill} components used by {n} internal customers. "
+)
+
+# Paragraphs of experience text per length class
+LENGTHS = {"short": 2, "medium": 6, "long": 18}
+
+
+# ----------- Document model: list of ("heading" | "p", text) and ("table", rows) -----------
+
+def _sentences(rng, skills, n):
+    return " ".join(
+        FILLER.format(skill=rng.choice(skills), pct=rng.randint(5, 60), n=rng.randint(2, 40))
+        for _ in range(n)
+    )
+
+
+def make_resume(seed, length="medium", table_density=0.3, n_skills=12):
+    """
+    Builds the content of one synthetic resume.
+
+    Args:
+        seed (int): Seed; the same seed always gives the same resume
+        length (str): "short", "medium" or "long" (or "mixed" for a random one)
+        table_density (float): Share of the sections (0..1) laid out as tables
+        n_skills (int): Number of skills the candidate lists
+
+    Returns:
+        list: Blocks ("heading" | "p", text) and ("table", list of rows)
+    """
+    rng = random.Random(seed)
+    if length == "mixed":
+        length = rng.choice(list(LENGTHS))
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    city, state = rng.choice(LOCATIONS)
+    skills = rng.sample(SKILLS, min(n_skills, len(SKILLS)))
+    as_table = lambda: rng.random() < table_density
+
+    blocks = [
+        ("heading", name),
+        ("p", f"{city}, {state} | {name.lower().replace(' ', '.')}{seed}@example.com | "
+              f"+91 98{rng.randint(10000000, 99999999)}"),
+        ("heading", "Summary"),
+        ("p", f"{rng.choice(ROLES)} with {rng.randint(1, 15)} years of experience in "
+              f"{', '.join(skills[:3])}."),
+        ("heading", "Skills"),
+    ]
+    if as_table():
+        rows = [["Skill", "Years", "Level"]]
+        rows += [[s, str(rng.randint(1, 10)), rng.choice(["Expert", "Advanced", "Intermediate"])]
+                 for s in skills]
+        blocks.append(("table", rows))
+    else:
+        blocks.append(("p", ", ".join(skills)))
+
+    blocks.append(("heading", "Experience"))
+    for _ in range(LENGTHS[length]):
+        company, role = rng.choice(COMPANIES), rng.choice(ROLES)
+        start = rng.randint(2008, 2022)
+        if as_table():
+            blocks.append(("table", [["Company", "Role", "From", "To"],
+                                     [company, role, str(start), str(start + rng.randint(1, 4))]]))
+        else:
+            blocks.append(("p", f"{role}, {company} ({start} - {start + rng.randint(1, 4)})"))
+        blocks.append(("p", _sentences(rng, skills, rng.randint(2, 5))))
+
+    blocks.append(("heading", "Education"))
+    degree = rng.choice([s for s in SKILLS if "degree" in s or "bachelor" in s or "master" in s])
+    if as_table():
+        blocks.append(("table", [["Degree", "Year"], [degree.title(), str(rng.randint(2005, 2020))]]))
+    else:
+        blocks.append(("p", f"{degree.title()}, {rng.randint(2005, 2020)}"))
+    return blocks
+
+
+def make_jd(seed, n_skills=15):
+    """Builds the content of one synthetic job description."""
+    rng = random.Random(seed)
+    role = rng.choice(ROLES)
+    skills = rng.sample(SKILLS, min(n_skills, len(SKILLS)))
+    city, state = rng.choice(LOCATIONS)
+    return [
+        ("heading", f"{role} - {rng.choice(COMPANIES)}"),
+        ("p", f"Location: {city}, {state}"),
+        ("heading", "Responsibilities"),
+        ("p", _sentences(rng, skills, 4)),
+        ("heading", "Requirements"),
+        ("table", [["Requirement", "Priority"]] + [[s, rng.choice(["Must", "Nice to have"])]
+                                                  for s in skills]),
+    ]
+
+
+# ----------- Writers -----------
+
+def write_docx(blocks, path):
+    from docx import Document
+    document = Document()
+    for kind, content in blocks:
+        if kind == "heading":
+            document.add_heading(content, level=1)
+        elif kind == "p":
+            document.add_paragraph(content)
+        else:
+            table = document.add_table(rows=len(content), cols=len(content[0]))
+            for r, row in enumerate(content):
+                for c, value in enumerate(row):
+                    table.cell(r, c).text = value
+    document.save(path)
+
+
+def _pdf_lines(blocks, width=95):
+    import textwrap
+    lines = []
+    for kind, content in blocks:
+        if kind == "table":
+            # A PDF text layer has no tables: lay the cells out in columns
+            widths = [max(len(row[c]) for row in content) for c in range(len(content[0]))]
+            lines += ["  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in content]
+        else:
+            lines += textwrap.wrap(content, width) or [""]
+        lines.append("")
+    return lines
+
+
+def _pdf_escape(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(blocks, path, lines_per_page=60):
+    """Writes a minimal text-only PDF (Helvetica, one text object per page)."""
+    lines = _pdf_lines(blocks)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content stream) per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 770 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in page_lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        page_num = len(objects) + 1
+        kids.append(f"{page_num} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_num + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx}
+
+
+def generate_corpus(out_dir, n_resumes, formats=("pdf", "docx"), length="mixed",
+                    table_density=0.3, seed=0):
+    """
+    Writes `n_resumes` resumes (alternating between `formats`) and one JD per
+    format into `out_dir`. Existing files with the same name are kept, so a
+    corpus can be grown without rewriting it.
+
+    Returns:
+        tuple: (list of resume paths, dict format -> JD path)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jds = {}
+    for fmt in formats:
+        jds[fmt] = os.path.join(out_dir, f"jd_{seed}.{fmt}")
+        if not os.path.exists(jds[fmt]):
+            WRITERS[fmt](make_jd(seed), jds[fmt])
+    paths = []
+    for i in range(n_resumes):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(out_dir, f"resume_{seed}_{i:05d}_{length}_{table_density:g}.{fmt}")
+        if not os.path.exists(path):
+            WRITERS[fmt](make_resume(seed * 1_000_003 + i, length, table_density), path)
+        paths.append(path)
+    return paths, jds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume/JD corpus")
+    parser.add_argument("out_dir")
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--formats", default="pdf,docx", help="Comma-separated: pdf, docx")
+    parser.add_argument("--length", choices=["short", "medium", "long", "mixed"], default="mixed")
+    parser.add_argument("--table-density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths, jds = generate_corpus(args.out_dir, args.resumes, tuple(args.formats.split(",")),
+                                 args.length, args.table_density, args.seed)
+    print(f"{len(paths)} resumes and {len(jds)} job descriptions in {args.out_dir}")
@@ -1,5 +1,45 @@
+import io
 import re
 
+# Table line: at least two '|' and starts/ends with one (to avoid inline code)
+TABLE_LINE = re.compile(r'\s*\|.*\|\s*$')
+# Separator row (---|---) once the outer pipes are stripped
+SEPARATOR_ROW = re.compile(r'^:?-+:?\s*(\|:?-+:?\s*)*$')
+
+
+def flatten_md_lines(lines):
+    """
+    Flattens markdown tables in a stream of lines into plain comma-separated
+    text, one row per line. Lines are consumed lazily, so any iterable (an
+    open file, str.splitlines(), a generator) works without loading it all.
+
+    Args:
+        lines (iterable): Markdown lines, with or without trailing newlines
+
+    Yields:
+        str: Output lines without trailing newlines
+    """
+    in_table = False
+    for line in lines:
+        line = line.rstrip('\n')
+        # A table starts on a header line and continues while lines hold two or more '|'
+        if line.count('|') >= 2 and (in_table or TABLE_LINE.match(line)):
+            in_table = True
+            current = line.strip().strip('|').strip()
+            # Skip separator row (---|---)
+            if not SEPARATOR_ROW.match(current):
+                # Split on |, trim spaces, join with commas
+                yield ', '.join([cell.strip() for cell in current.split('|')])
+        else:
+            in_table = False
+            yield line
+
+
+def flatten_md_text(text):
+    """Flattens all markdown tables in a markdown string (see flatten_md_lines)."""
+    return ''.join(line + '\n' for line in flatten_md_lines(io.StringIO(text)))
+
+
 def flatten_md_tables(input_md_path, output_md_path):
     """
     Flattens all markdown tables in a markdown file into plain comma-separated text.
@@ -8,32 +48,9 @@ def flatten_md_tables(input_md_path, output_md_path):
         input_md_path (str): Path to the input markdown file (with tables)
         output_md_path (str): Path to write the flattened markdown file
     """
-    with open(input_md_path, 'r', encoding='utf-8') as infile:
-        lines = infile.readlines()
-
-    output_lines = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        # Check for table header line: line with at least two '|' (to avoid inline code)
-        if line.count('|') >= 2 and re.match(r'\s*\|.*\|\s*$', line):
-            table_rows = []
-            # Continue collecting table lines
-            while i < len(lines) and lines[i].count('|') >= 2:
-                current = lines[i].strip().strip('|').strip()
-                # Skip separator row (---|---)
-                if not re.match(r'^:?-+:?\s*(\|:?-+:?\s*)*$', current):
-                    # Split on |, trim spaces, join with commas
-                    row = ', '.join([cell.strip() for cell in current.split('|')])
-                    table_rows.append(row)
-                i += 1
-            output_lines.extend(table_rows)
-        else:
-            output_lines.append(line.rstrip('\n'))
-            i += 1
-
-    with open(output_md_path, 'w', encoding='utf-8') as outfile:
-        for l in output_lines:
+    with open(input_md_path, 'r', encoding='utf-8') as infile, \
+            open(output_md_path, 'w', encoding='utf-8') as outfile:
+        for l in flatten_md_lines(infile):
             outfile.write(l + '\n')
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+from candidate_store import CandidateStore
+
+
+def _analysis(keywords, source="gemini"):
+    return {"keywords": keywords, "email_id": "a@example.com", "contact_number": "", "Candidate Location": "Pune",
+            "Location Score": 0, "keyword_source": source}
+
+
+def test_jd_phrase_keywords_do_not_replace_stored_keywords(tmp_path):
+    store = CandidateStore(str(tmp_path / "candidates.sqlite3"))
+    store.add("h1", "resume.pdf", "text", _analysis(["python", "kubernetes", "sql"]))
+    # The same resume analysed again with phrase matching against another JD
+    store.add("h1", "resume.pdf", "text", _analysis(["sql"], source="jd phrases"))
+    assert store.get("h1")["keywords"] == ["kubernetes", "python", "sql"]
+    assert [r["Resume File"] for r in store.search(["kubernetes"], [], [])] == ["resume.pdf"]
+
+
+def test_new_candidate_from_phrase_matching_has_no_keywords(tmp_path):
+    store = CandidateStore(str(tmp_path / "candidates.sqlite3"))
+    store.add("h2", "other.pdf", "text", _analysis(["sql"], source="jd phrases"))
+    assert "h2" in store
+    assert store.get("h2")["keywords"] == []
+    assert store.search(["sql"], [], []) == []
@@ -0,0 +1,42 @@
+import hashlib
+import json
+
+import cli
+
+
+def _fake_iter_process(resume_sources, jd_source, *args, **kwargs):
+    jd_hash = cli.file_hash(jd_source)
+    for i, path in enumerate(resume_sources):
+        with open(path, "rb") as f:
+            key = f"{hashlib.sha256(f.read()).hexdigest()}:{jd_hash}"
+        error = "Conversion timed out after 120s" if path.endswith("broken.pdf") else ""
+        yield i, {"Resume File": path, "Artifact Key": key, "Error": error, "weighted_score": 0 if error else 3}
+
+
+def test_failed_resumes_are_retried_and_done_runs_skip_gemini(tmp_path, monkeypatch):
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    (resumes / "good.pdf").write_bytes(b"good resume")
+    (resumes / "broken.pdf").write_bytes(b"broken resume")
+    jd = tmp_path / "jd.pdf"
+    jd.write_bytes(b"job description")
+    output = tmp_path / "results.jsonl"
+
+    jd_extractions = []
+    monkeypatch.setattr(cli, "extract_jd_keywords", lambda path: jd_extractions.append(path) or ["python"])
+    monkeypatch.setattr(cli, "iter_process", _fake_iter_process)
+    argv = ["--jd", str(jd), "--resumes", str(resumes), "--output", str(output)]
+
+    assert cli.main(argv) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["Error"] != "" for r in rows) == [False, True]
+    checkpoint = (tmp_path / "results.jsonl.checkpoint").read_text().split()
+    assert len(checkpoint) == 1
+
+    # The failed resume is retried; once it succeeds nothing is left to do
+    (resumes / "broken.pdf").rename(resumes / "fixed.pdf")
+    assert cli.main(argv) == 0
+    assert len((tmp_path / "results.jsonl.checkpoint").read_text().split()) == 2
+    assert len(jd_extractions) == 2
+    assert cli.main(argv) == 0
+    assert len(jd_extractions) == 2
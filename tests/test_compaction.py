@@ -0,0 +1,94 @@
+import pipeline
+from compaction import compact_text, prompt_text, prompt_views, split_sections, trim_to_budget
+from functions3 import estimate_tokens
+from instrumentation import metrics
+
+RESUME = """Rahul Sharma
+Hyderabad, Telangana | rahul@example.com
+
+## Summary
+Data engineer building batch and streaming pipelines.
+
+## Experience
+Senior Data Engineer
+Infosys (2021 - 2023)
+Spark, Kafka, Airflow
+Data Engineer
+Infosys (2019 - 2021)
+Python, SQL
+
+## Declaration
+I hereby declare that the above information is true.
+"""
+
+
+def test_lines_repeated_in_different_sections_are_kept():
+    text = compact_text(RESUME)
+    assert text.count("Infosys") == 2
+    # The same title under two roles
+    assert compact_text("Data Engineer\nInfosys\nData Engineer\nWipro").splitlines() == \
+        ["Data Engineer", "Infosys", "Data Engineer", "Wipro"]
+
+
+def test_immediate_repeats_and_repeated_table_text_are_dropped():
+    text = "Skills\nPython, SQL\nPython, SQL\nName, Degree\nRahul, B.Tech\nName, Degree\nRahul, B.Tech\nEnd"
+    assert compact_text(text).splitlines() == ["Skills", "Python, SQL", "Name, Degree", "Rahul, B.Tech", "End"]
+
+
+def test_running_headers_and_footers_are_dropped():
+    pages = [
+        "Rahul Sharma - Resume\nExperience\nInfosys\nConfidential\n1",
+        "Rahul Sharma - Resume\nProjects\nInfosys\nConfidential\n2",
+        "Rahul Sharma - Resume\nEducation\nB.Tech\nConfidential\n3",
+    ]
+    lines = compact_text("\f".join(pages)).splitlines()
+    assert "Rahul Sharma - Resume" not in lines and "Confidential" not in lines
+    assert lines == ["Experience", "Infosys", "Projects", "Infosys", "Education", "B.Tech"]
+
+
+def test_boilerplate_and_images_are_removed():
+    text = "Evaluation Warning: The document was created with Spire.Doc\n![logo](img.png)Rahul\nPage 1 of 2\n-----\nPython"
+    assert compact_text(text).splitlines() == ["Rahul", "Python"]
+
+
+def test_sections_are_selected_per_prompt():
+    views = prompt_views(RESUME, ("location", "keywords", "letter"))
+    assert views["location"].splitlines() == ["Rahul Sharma", "Hyderabad, Telangana | rahul@example.com"]
+    assert "Rahul Sharma" not in views["keywords"] and "Spark, Kafka, Airflow" in views["keywords"]
+    # The declaration is dropped from every prompt
+    assert all("hereby declare" not in view for view in views.values())
+    # Without any known heading everything is used
+    assert prompt_text("Python developer\nBased in Pune", "location") == "Python developer\nBased in Pune"
+
+
+def test_budget_keeps_small_sections_whole_and_fits_the_rest():
+    sections = [("summary", ["Short summary"]),
+                ("experience", [f"Line {i} " + "word " * 20 for i in range(50)])]
+    trimmed = trim_to_budget(sections, 200)
+    assert trimmed[0] == sections[0]
+    assert estimate_tokens("\n".join(line for _, lines in trimmed for line in lines)) <= 200
+    assert trim_to_budget(sections, 0) is sections
+
+
+def test_truncation_is_counted():
+    long_text = "## Experience\n" + "\n".join(f"Project {i}: " + "detail " * 30 for i in range(100))
+    with metrics.scope() as recorded:
+        prompt_text(long_text, "keywords", budget=100)
+        prompt_text("## Skills\nPython", "keywords", budget=100)
+    assert recorded.counter_total("prompt_truncated", prompt="keywords") == 1
+
+
+def test_jd_keyword_extraction_reads_the_whole_jd(monkeypatch):
+    jd = "Requirements\n" + "\n".join(f"Requirement {i}: " + "experience " * 20 for i in range(200))
+    jd += "\nMust know Kubernetes"
+    seen = []
+    monkeypatch.setattr(pipeline, "file_to_text", lambda source: jd)
+    monkeypatch.setattr(pipeline, "extract_keywords_from_text", lambda text: seen.append(text) or [])
+    pipeline.extract_jd_keywords("jd.pdf")
+    assert estimate_tokens(jd) > 1500
+    assert seen[0].endswith("Must know Kubernetes")
+
+
+def test_split_sections_starts_with_the_header():
+    assert [name for name, _ in split_sections(compact_text(RESUME))] == \
+        ["header", "summary", "experience", "declaration"]
@@ -0,0 +1,35 @@
+import os
+import time
+
+import utils
+from fake_llm import FakeChatModel
+from llm_cache import LLMResponseCache
+from pipeline import process
+from synthetic_corpus import generate_corpus
+
+N_RESUMES = 6
+
+
+def _run(tmp_path, monkeypatch, paths, jd, max_workers):
+    # A fresh response cache per run, so every resume reaches the (fake) API
+    monkeypatch.setattr(utils, "llm_cache", LLMResponseCache(str(tmp_path / f"llm_{max_workers}.sqlite3")))
+    start = time.perf_counter()
+    rows = process(paths, jd, None, ["python"], ["sql"], ["docker"],
+                   max_workers=max_workers, convert_workers=2, include_letters=False)
+    return rows, time.perf_counter() - start
+
+
+def test_parallel_resumes_are_faster_and_keep_input_order(tmp_path, monkeypatch):
+    paths, jds = generate_corpus(str(tmp_path / "corpus"), N_RESUMES)
+    # Jitter makes resumes finish out of input order
+    utils.set_llm_model(FakeChatModel(latency=0.15, jitter=0.1))
+    try:
+        serial, serial_time = _run(tmp_path, monkeypatch, paths, jds["pdf"], max_workers=1)
+        parallel, parallel_time = _run(tmp_path, monkeypatch, paths, jds["pdf"], max_workers=N_RESUMES)
+    finally:
+        utils._models.pop("llm", None)
+
+    assert [row["Resume File"] for row in parallel] == [os.path.basename(p) for p in paths]
+    assert all(row["Error"] == "" for row in parallel)
+    assert [row["weighted_score"] for row in parallel] == [row["weighted_score"] for row in serial]
+    assert parallel_time < serial_time / 2
@@ -0,0 +1,36 @@
+import os
+import time
+
+from conversion_pool import convert_documents
+from text_cache import TextCache
+
+
+def _convert(name, data, backend):
+    # Runs in the worker processes: "hang" sleeps past the deadline, "crash" kills the worker
+    if name == "hang.pdf":
+        time.sleep(30)
+    if name == "crash.pdf":
+        os._exit(1)
+    return data.decode("utf-8").upper(), None
+
+
+def _convert_batch(tmp_path, names, timeout=5):
+    documents = [(name, name.encode("utf-8")) for name in names]
+    return convert_documents(documents, max_workers=2, timeout=timeout,
+                             cache=TextCache(str(tmp_path / "text")), convert=_convert)
+
+
+def test_hanging_document_times_out_alone(tmp_path):
+    start = time.monotonic()
+    results = _convert_batch(tmp_path, ["a.pdf", "hang.pdf", "b.pdf", "c.pdf"], timeout=2)
+    assert time.monotonic() - start < 20
+    assert results[1] == {"name": "hang.pdf", "text": "", "error": "Conversion timed out after 2s"}
+    assert [r["text"] for i, r in enumerate(results) if i != 1] == ["A.PDF", "B.PDF", "C.PDF"]
+    assert all(r["error"] == "" for i, r in enumerate(results) if i != 1)
+
+
+def test_crashing_document_fails_alone(tmp_path):
+    results = _convert_batch(tmp_path, ["a.pdf", "crash.pdf", "b.pdf", "c.pdf", "d.pdf"])
+    assert results[1] == {"name": "crash.pdf", "text": "", "error": "Conversion crashed the worker process"}
+    assert [r["text"] for i, r in enumerate(results) if i != 1] == ["A.PDF", "B.PDF", "C.PDF", "D.PDF"]
+    assert all(r["error"] == "" for i, r in enumerate(results) if i != 1)
@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+import extractors
+from extractors import ConversionLimitExceeded, degraded_text, extract_text, run_limited
+from instrumentation import metrics
+from synthetic_corpus import write_pdf
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+def _allocate(mb):
+    data = b"\x01" * (mb * 1024 * 1024)
+    time.sleep(10)
+    return len(data)
+
+
+def _fail():
+    raise ValueError("broken document")
+
+
+def test_run_limited_returns_the_result():
+    assert run_limited(_sleep, 0, timeout=10, max_rss_mb=0) == "done"
+
+
+def test_run_limited_kills_a_child_past_its_time_limit():
+    start = time.monotonic()
+    with pytest.raises(ConversionLimitExceeded) as error:
+        run_limited(_sleep, 30, timeout=0.5, max_rss_mb=0)
+    assert error.value.reason == "timeout"
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.skipif(extractors._rss_mb(os.getpid()) is None, reason="the memory limit needs /proc")
+def test_run_limited_kills_a_child_past_its_memory_limit():
+    start = time.monotonic()
+    with pytest.raises(ConversionLimitExceeded) as error:
+        run_limited(_allocate, 400, timeout=30, max_rss_mb=200)
+    assert error.value.reason == "memory"
+    assert time.monotonic() - start < 10
+
+
+def test_run_limited_raises_errors_of_the_child():
+    with pytest.raises(RuntimeError, match="ValueError: broken document"):
+        run_limited(_fail, timeout=10, max_rss_mb=0)
+
+
+def test_degraded_text_falls_back_to_the_text_only_extraction(tmp_path):
+    write_pdf([("p", "Python developer based in Pune")], str(tmp_path / "cv.pdf"))
+    data = (tmp_path / "cv.pdf").read_bytes()
+    error = ConversionLimitExceeded("memory", "Layout conversion used more than 1 MB")
+    with metrics.scope() as recorded:
+        # Text the fast path already produced is reused
+        assert degraded_text("cv.pdf", data, error, text="already extracted") == "already extracted"
+        assert "Python developer based in Pune" in degraded_text("cv.pdf", data, error)
+        assert degraded_text("cv.pdf", b"not a pdf", error) == ""
+    assert recorded.counter_total("conversion_degraded", reason="memory") == 3
+    assert recorded.counter_total("fast_extract_failed") == 1
+
+
+def test_fast_path_reads_every_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(extractors, "MAX_PAGES", 2)
+    blocks = [("p", f"Paragraph {i}") for i in range(60)]
+    write_pdf(blocks, str(tmp_path / "long.pdf"), lines_per_page=10)
+    text = extract_text("long.pdf", (tmp_path / "long.pdf").read_bytes(), backend="fast")
+    assert "Paragraph 0" in text and "Paragraph 59" in text
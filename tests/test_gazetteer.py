@@ -0,0 +1,24 @@
+from gazetteer import find_location
+
+EXPERIENCE = "Experience\nData Engineer, Infosys (2019 - 2023)\n"
+
+
+def test_surname_matching_a_city_is_not_a_location():
+    # "Kota" is the candidate's surname; no other place is named
+    assert find_location("Rahul Kota\nrahul@example.com\n" + EXPERIENCE) == (None, "no match")
+
+
+def test_ambiguous_name_in_the_experience_section_needs_a_cue():
+    text = "Priya Sharma\npriya@example.com\n" + EXPERIENCE + "Worked with the Gaya Foundation\n"
+    assert find_location(text)[0] is None
+    text = "Priya Sharma\npriya@example.com\n" + EXPERIENCE + "Worked at the office in Gaya\n"
+    assert find_location(text)[0] == "Gaya, Bihar"
+
+
+def test_ambiguous_name_in_the_header_or_on_a_labelled_line_counts():
+    assert find_location("Rahul Sharma\nKota, Rajasthan\n" + EXPERIENCE)[0] == "Kota, Rajasthan"
+    assert find_location("Rahul Sharma\n" + EXPERIENCE + "Address: Station Road, Gaya\n")[0] == "Gaya, Bihar"
+
+
+def test_unambiguous_names_need_no_cue():
+    assert find_location("Rahul Kota\n" + EXPERIENCE + "Pune office, analytics team\n")[0] == "Pune, Maharashtra"
@@ -0,0 +1,50 @@
+from keyword_matcher import PRIORITY_WEIGHTS, KeywordMatcher
+
+HIGH = ["machine learning", "python"]
+MEDIUM = ["amazon web services"]
+LOW = ["sql", "docker"]
+RESUMES = [
+    ["machine learning engineer", "machine-learning", "python 3", "aws", "sql databases"],
+    ["cooking", "gardening"],
+    ["python", "python programming", "docker compose", "structured query language"],
+    [],
+]
+
+
+def _weight(jd_keyword):
+    priority = "high" if jd_keyword in HIGH else "medium" if jd_keyword in MEDIUM else "low"
+    return PRIORITY_WEIGHTS[priority]
+
+
+def test_matches_account_for_the_score():
+    matcher = KeywordMatcher(HIGH, MEDIUM, LOW, threshold=0.5)
+    scores, matches = matcher.score_batch(RESUMES)
+    assert scores[0] > 0
+    for score, matched in zip(scores, matches):
+        jd_keywords = [jd_kw for _, jd_kw, _ in matched]
+        # One triple per JD keyword that counts, and together they make up the score
+        assert len(jd_keywords) == len(set(jd_keywords))
+        assert sum(_weight(kw) for kw in jd_keywords) == score
+        assert all(sim >= 0.5 for _, _, sim in matched)
+
+
+def test_matches_agree_with_matched_keywords():
+    matcher = KeywordMatcher(HIGH, MEDIUM, LOW, threshold=0.5)
+    _, matches = matcher.score_batch(RESUMES)
+    expected = matcher.matched_keywords(RESUMES)
+    assert [sorted(jd_kw for _, jd_kw, _ in matched) for matched in matches] == [sorted(m) for m in expected]
+
+
+def test_best_resume_keyword_is_reported():
+    matcher = KeywordMatcher(["python"], [], [], threshold=0.5)
+    _, matches = matcher.score_batch([["python programming", "python"]])
+    assert matches == [[("python", "python", 1.0)]]
+
+
+def test_score_does_not_depend_on_the_other_resumes():
+    matcher = KeywordMatcher(HIGH, MEDIUM, LOW)
+    alone_scores, alone_matches = matcher.score_batch(RESUMES[:1])
+    scores, matches = matcher.score_batch(RESUMES + [["machine learning"] * 3, ["sql server", "mysql", "sqlite"]])
+    assert scores[0] == alone_scores[0]
+    assert matches[0] == alone_matches[0]
+    assert KeywordMatcher(HIGH, MEDIUM, LOW).matched_keywords(RESUMES[:1])[0] == matcher.matched_keywords(RESUMES)[0]
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+from fake_llm import FakeChatModel
+from instrumentation import in_current_scope, metrics
+from llm_cache import LLMResponseCache
+
+N_CALLS = 4
+
+
+def _invoke_concurrently(use_cache):
+    # The pool threads record into the caller's metrics scope
+    invoke = in_current_scope(lambda _: utils.invoke_llm("Write an outreach email", use_cache, site="test"))
+    with ThreadPoolExecutor(max_workers=N_CALLS) as pool:
+        return list(pool.map(invoke, range(N_CALLS)))
+
+
+def _run(tmp_path, monkeypatch, use_cache):
+    fake = FakeChatModel(latency=0.3)
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(utils, "llm_cache", cache)
+    utils.set_llm_model(fake)
+    try:
+        with metrics.scope() as recorded:
+            _invoke_concurrently(use_cache)
+    finally:
+        utils._models.pop("llm", None)
+    return fake, cache, recorded
+
+
+def test_coalesced_calls_are_hits_in_cache_stats_and_metrics(tmp_path, monkeypatch):
+    fake, cache, recorded = _run(tmp_path, monkeypatch, use_cache=True)
+    assert fake.calls == 1
+    assert cache.stats()["misses"] == recorded.counter_total("llm_calls", cache="miss") == 1
+    assert cache.stats()["hits"] == recorded.counter_total("llm_calls", cache="hit") == N_CALLS - 1
+
+
+def test_uncached_calls_are_not_coalesced(tmp_path, monkeypatch):
+    fake, cache, recorded = _run(tmp_path, monkeypatch, use_cache=False)
+    assert fake.calls == N_CALLS
+    assert cache.stats()["misses"] == recorded.counter_total("llm_calls", cache="miss") == N_CALLS
+    assert cache.stats()["hits"] == recorded.counter_total("llm_calls", cache="hit") == 0
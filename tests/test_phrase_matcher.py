@@ -0,0 +1,61 @@
+from keyword_matcher import PhraseKeywordMatcher, expand_keyword
+from phrase_matcher import PhraseMatcher, normalize_phrase
+
+
+def _phrases(matches):
+    return [phrase for _, _, phrase, _ in matches]
+
+
+def test_overlapping_matches_keep_the_leftmost_longest():
+    matcher = PhraseMatcher(["new delhi", "delhi", "delhi ncr"])
+    assert _phrases(matcher.find("Based in New Delhi NCR")) == ["new delhi"]
+    assert sorted(_phrases(matcher.find("Based in New Delhi NCR", overlapping=True))) == \
+        ["delhi", "delhi ncr", "new delhi"]
+
+
+def test_adjacent_phrases_are_all_found():
+    matcher = PhraseMatcher(["python", "sql", "machine learning"])
+    assert _phrases(matcher.find("Python SQL machine learning,python")) == \
+        ["python", "sql", "machine learning", "python"]
+
+
+def test_failed_longer_phrase_falls_back_to_a_shorter_one():
+    # "machine learning engineer" is started but not completed; "learning platform" starts inside it
+    matcher = PhraseMatcher(["machine learning engineer", "learning platform"])
+    assert _phrases(matcher.find("machine learning platform")) == ["learning platform"]
+
+
+def test_matches_start_and_end_on_token_boundaries():
+    matcher = PhraseMatcher(["java", "c", "react"])
+    assert matcher.find("JavaScript, C++ and Reactive streams") == []
+    assert _phrases(matcher.find("Java, C and React")) == ["java", "c", "react"]
+
+
+def test_offsets_slice_the_original_text():
+    matcher = PhraseMatcher(["machine learning", "node.js", "c++"])
+    text = "Skills:  Machine\tLearning | Node.js / C++ (5 yrs)"
+    matches = matcher.find(text)
+    assert _phrases(matches) == ["machine learning", "node.js", "c++"]
+    for start, end, phrase, _ in matches:
+        assert normalize_phrase(text[start:end]) == phrase
+
+
+def test_synonym_expansion_from_the_table():
+    assert "natural language processing" in expand_keyword("NLP")
+    assert {"bachelor of technology", "btech", "b tech"} <= set(expand_keyword("B.Tech"))
+    # Phrases inside a longer keyword are replaced in place
+    assert "natural language processing engineer" in expand_keyword("nlp engineer")
+
+
+def test_jd_keywords_are_found_through_their_synonyms_with_positions():
+    matcher = PhraseKeywordMatcher(["natural language processing"], ["b.tech"], ["kubernetes"])
+    text = "B Tech graduate. Built NLP pipelines on K8s; no kubernetes-free setups"
+    hits = matcher.hits(text)
+    assert [(kw, spelling) for kw, spelling, _, _ in hits] == [
+        ("b.tech", "b tech"), ("natural language processing", "nlp"),
+        ("kubernetes", "k8s"), ("kubernetes", "kubernetes"),
+    ]
+    for _, spelling, start, end in hits:
+        assert normalize_phrase(text[start:end]) == spelling
+    scores, _, _ = matcher.score_batch([text, "Cooking"])
+    assert list(scores) == [6, 0]
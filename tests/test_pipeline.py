@@ -0,0 +1,157 @@
+import os
+
+import pytest
+
+import pipeline
+import utils
+from fake_llm import FakeChatModel
+from instrumentation import metrics
+from llm_cache import LLMResponseCache
+from pipeline import analyse_resume, compute_weighted_score, process_roles, role_column, role_shortlist
+from synthetic_corpus import generate_corpus
+
+RESUME = """Rahul Sharma
+Location: Warangal, Telangana
+rahul@example.com
+
+Experience
+Data Engineer, Infosys Hyderabad office (2019 - 2023)
+Python, SQL and Spark pipelines
+"""
+
+
+@pytest.fixture
+def fake_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "llm_cache", LLMResponseCache(str(tmp_path / "llm.sqlite3")))
+    utils.set_llm_model(FakeChatModel())
+    yield
+    utils._models.pop("llm", None)
+
+
+@pytest.mark.parametrize("combined", [False, True])
+def test_location_comes_from_the_gazetteer_in_both_modes(fake_model, combined):
+    with metrics.scope() as recorded:
+        analysis = analyse_resume(RESUME, "Data engineer, Python", combined=combined, include_letters=False)
+    # The fake model would answer the first city it knows (Hyderabad)
+    assert analysis["Candidate Location"] == "Warangal, Telangana"
+    assert recorded.counter_total("location_lookups", method="gazetteer") == 1
+    assert recorded.counter_total("location_lookups", method="llm") == 0
+    assert recorded.counter_total("llm_calls", site="location") == 0
+
+
+def test_combined_call_answers_when_the_gazetteer_finds_nothing(fake_model):
+    # Two regions equally supported: the gazetteer leaves the decision to Gemini
+    resume = RESUME.replace("Location: Warangal, Telangana\n", "").replace("Hyderabad office", "Pune and Chennai")
+    with metrics.scope() as recorded:
+        analysis = analyse_resume(resume, "Data engineer, Python", combined=True, include_letters=False)
+    assert recorded.counter_total("location_lookups", method="llm") == 1
+    assert recorded.counter_total("llm_calls", site="location") == 0
+    assert analysis["Candidate Location"] == "Chennai, Tamil Nadu"
+
+
+def test_concurrent_scopes_only_see_their_own_calls(fake_model):
+    import threading
+    recorded = {}
+
+    def session(name, resume):
+        with metrics.scope() as batch:
+            analyse_resume(resume, "Data engineer, Python", include_letters=False)
+        recorded[name] = batch
+
+    other = RESUME.replace("Warangal", "Pune").replace("Telangana", "Maharashtra")
+    sessions = [threading.Thread(target=session, args=(name, resume))
+                for name, resume in (("a", RESUME), ("b", other))]
+    for t in sessions:
+        t.start()
+    for t in sessions:
+        t.join()
+    # Keywords are extracted in a pool thread of each session
+    for batch in recorded.values():
+        assert batch.counter_total("llm_calls", site="keywords") == 1
+        assert batch.counter_total("location_lookups") == 1
+
+
+class ProfileReply(FakeChatModel):
+    """Answers the combined resume_profile prompt with a fixed reply."""
+
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+
+    def _answer(self, text, rng):
+        if text.startswith("You are an expert recruiter extracting structured information"):
+            return self.reply
+        return super()._answer(text, rng)
+
+
+@pytest.mark.parametrize("reply, fallback", [
+    # Cut off mid-answer: nothing can be used
+    ('{"location": "Pune, Maharashtra", "keywords": ["python", ', {"location", "keywords"}),
+    # Valid JSON with some fields missing or invalid
+    ('{"keywords": ["Python", "SQL"], "email_id": "not an email", "phone": "12"}', {"location"}),
+])
+def test_combined_profile_falls_back_per_field(tmp_path, monkeypatch, reply, fallback):
+    monkeypatch.setattr(utils, "llm_cache", LLMResponseCache(str(tmp_path / "llm.sqlite3")))
+    utils.set_llm_model(ProfileReply(reply))
+    # Pune and Chennai equally supported: the location is left to Gemini
+    resume = RESUME.replace("Location: Warangal, Telangana\n", "").replace("Hyderabad office", "Pune and Chennai")
+    try:
+        with metrics.scope() as recorded:
+            analysis = analyse_resume(resume, "Data engineer, Python", combined=True, include_letters=False)
+    finally:
+        utils._models.pop("llm", None)
+
+    assert set(analysis["Fallback Fields"].split(", ")) == fallback
+    for site in ("location", "keywords"):
+        assert recorded.counter_total("llm_calls", site=site) == (site in fallback)
+    if "keywords" not in fallback:
+        assert analysis["keywords"] == ["python", "sql"]
+    # Email and phone fall back to the regular expressions
+    assert analysis["email_id"] == "rahul@example.com"
+
+
+ROLES = [
+    {"name": "Data Engineer", "high": ["python", "sql", "spark"], "medium": ["etl", "hadoop"], "low": ["docker"]},
+    {"name": "Frontend Developer", "high": ["javascript", "react"], "medium": ["typescript", "node.js"],
+     "low": ["git", "agile"]},
+]
+
+
+def test_process_roles_analyses_each_resume_once_for_all_roles(tmp_path, monkeypatch, fake_model):
+    paths, _ = generate_corpus(str(tmp_path / "corpus"), 6)
+    converted = []
+
+    def counting_convert(documents, **kwargs):
+        documents = list(documents)
+        converted.extend(name for name, _ in documents)
+        return convert(documents, **kwargs)
+
+    convert = pipeline.iter_convert_documents
+    monkeypatch.setattr(pipeline, "iter_convert_documents", counting_convert)
+    artifacts = {}
+    with metrics.scope() as recorded:
+        rows, matrix = process_roles(paths, ROLES, convert_workers=2, artifacts=artifacts)
+
+    names = [os.path.basename(p) for p in paths]
+    assert sorted(converted) == sorted(names)
+    assert recorded.snapshot()["stages"]["analyse_resume"]["count"] == len(paths)
+    assert recorded.counter_total("llm_calls", site="keywords") == len(paths)
+    assert [row["Resume File"] for row in rows] == names
+    assert matrix.shape == (len(paths), len(ROLES))
+
+    # Every resume is scored against every role with that role's priorities
+    for i, row in enumerate(rows):
+        keywords = artifacts[row["Artifact Key"]]["keywords"]
+        for j, role in enumerate(ROLES):
+            expected = compute_weighted_score(keywords, role["high"], role["medium"], role["low"])
+            assert matrix[i, j] == row[role_column(role["name"])] == expected
+        assert row["Best Role Score"] == matrix[i].max()
+    assert matrix[:, 0].tolist() != matrix[:, 1].tolist()
+
+    # Each shortlist follows its own role's scores
+    for j, role in enumerate(ROLES):
+        shortlist = role_shortlist(rows, matrix, j)
+        scores = [row["weighted_score"] for row in shortlist]
+        assert scores == sorted(matrix[:, j].tolist(), reverse=True)
+        assert [row[role_column(role["name"])] for row in shortlist] == scores
+        assert role_shortlist(rows, matrix, j, top_n=2) == shortlist[:2]
@@ -0,0 +1,24 @@
+from pipeline import _score_fields, score_resumes
+from ranking import RankingEngine
+
+HIGH = ["machine learning", "python"]
+MEDIUM = ["amazon web services"]
+LOW = ["sql", "docker"]
+RESUMES = [
+    ["machine learning engineer", "machine-learning", "python 3", "aws", "sql databases"],
+    ["cooking", "gardening"],
+]
+
+
+def test_ranking_engine_reproduces_fuzzy_scores():
+    scores, matches, _ = score_resumes(RESUMES, HIGH, MEDIUM, LOW, match_mode="fuzzy", threshold=0.5)
+    column = [_score_fields(score, matched)["Matched JD Keywords"] for score, matched in zip(scores, matches)]
+    engine = RankingEngine.from_column(column)
+    assert list(engine.scores(HIGH, MEDIUM, LOW)) == list(scores)
+
+
+def test_ranking_engine_reproduces_exact_scores():
+    resumes = [["python", "sql", "java"], ["docker"]]
+    scores, matches, _ = score_resumes(resumes, HIGH, MEDIUM, LOW, match_mode="exact")
+    column = [_score_fields(score, matched)["Matched JD Keywords"] for score, matched in zip(scores, matches)]
+    assert list(RankingEngine.from_column(column).scores(HIGH, MEDIUM, LOW)) == [4, 1]
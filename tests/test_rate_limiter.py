@@ -0,0 +1,84 @@
+import threading
+import time
+
+from fake_llm import FakeChatModel, FakeRateLimitError
+from instrumentation import in_current_scope, metrics
+from rate_limiter import GeminiRateLimiter, _status_code
+
+QUOTA = 100  # requests per PERIOD, enforced by the fake and configured in the limiter
+PERIOD = 2.0
+DURATION = 6.0
+CALLERS = 16
+
+
+class _StatusError(Exception):
+    def __init__(self, message, **attrs):
+        super().__init__(message)
+        self.__dict__.update(attrs)
+
+
+def test_status_comes_from_attributes_before_text():
+    assert _status_code(FakeRateLimitError("quota exceeded")) == 429
+    assert _status_code(_StatusError("backend went away", code=503)) == 503
+    assert _status_code(_StatusError("Bad request", status_code=400)) == 400
+    # Digits in an unrelated message are not a status
+    assert _status_code(ValueError("Candidate 429 has 503 keywords")) is None
+
+
+def test_status_follows_the_cause_chain_and_falls_back_to_text():
+    try:
+        try:
+            raise _StatusError("Service unavailable", code=503)
+        except Exception as e:
+            raise RuntimeError("Invoking the model failed") from e
+    except RuntimeError as wrapped:
+        assert _status_code(wrapped) == 503
+    assert _status_code(RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded")) == 429
+    assert _status_code(RuntimeError("503 UNAVAILABLE")) == 503
+
+
+def test_throttling_fake_backs_off_recovers_and_uses_the_quota():
+    # The fake also answers 429 beyond 4 concurrent calls, so the limiter has to back off
+    fake = FakeChatModel(latency=0.05, rpm_limit=QUOTA, max_concurrent=4, quota_period=PERIOD)
+    limiter = GeminiRateLimiter(rpm=QUOTA, tpm=0, max_concurrency=16, period=PERIOD,
+                                backoff_base=0.05, backoff_cap=PERIOD, seed=0)
+    initial_limit = limiter.concurrency.limit
+    done, failed, limits = [], [], []
+    deadline = time.monotonic() + DURATION
+
+    def caller(n):
+        i = 0
+        while time.monotonic() < deadline:
+            try:
+                limiter.invoke(fake, f"Extract the current city or state location. Caller {n}, call {i}.")
+                done.append(time.monotonic())
+            except Exception as e:
+                failed.append(e)
+            i += 1
+
+    def monitor():
+        while time.monotonic() < deadline:
+            limits.append(limiter.concurrency.limit)
+            time.sleep(0.01)
+
+    with metrics.scope() as recorded:
+        start = time.monotonic()
+        threads = [threading.Thread(target=in_current_scope(caller), args=(n,)) for n in range(CALLERS)]
+        threads.append(threading.Thread(target=monitor))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+    assert failed == []
+    assert fake.throttled > 0
+    assert recorded.counter_total("llm_concurrency_decreases", reason="throttled") >= 1
+    # Backed off below the starting limit, then grew again
+    lowest = min(limits)
+    assert lowest < initial_limit
+    assert max(limits[limits.index(lowest):]) > lowest
+    # Steady state (second half of the run) close to the quota, never above it
+    half = start + elapsed / 2
+    per_period = sum(1 for t in done if t >= half) / (elapsed / 2) * PERIOD
+    assert 0.7 * QUOTA <= per_period <= 1.05 * QUOTA
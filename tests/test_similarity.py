@@ -0,0 +1,115 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from fake_llm import FakeEmbeddings
+from similarity import SimilarityIndex, VectorStore
+
+RESUMES = [
+    "python sql spark data engineer",
+    "java spring backend engineer",
+    "python machine learning pandas sql",
+    "sales manager retail with sql reporting",
+    "python sql airflow data pipelines",
+]
+JD = "data engineer python sql"
+
+
+def _vector(i):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[i % 8] = 1
+    vector[(i + 3) % 8] = i
+    return vector
+
+
+def _add_range(directory, first, count):
+    store = VectorStore(directory)
+    for i in range(first, first + count):
+        store.add([f"k{i}"], [_vector(i)])
+
+
+def test_stores_opened_before_a_write_see_each_others_rows(tmp_path):
+    a, b = VectorStore(str(tmp_path)), VectorStore(str(tmp_path))
+    a.add(["k0", "k1"], [_vector(0), _vector(1)])
+    b.add(["k1", "k2"], [_vector(1), _vector(2)])
+    assert b.keys == ["k0", "k1", "k2"]
+    a.add(["k3"], [_vector(3)])
+    assert a.keys == ["k0", "k1", "k2", "k3"]
+    np.testing.assert_allclose(a.vectors(["k2"]), b.vectors(["k2"]))
+
+
+def test_concurrent_processes_append_without_losing_rows(tmp_path):
+    directory = str(tmp_path)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_add_range, args=(directory, w * 700, 700)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    store = VectorStore(directory)
+    assert sorted(store.keys) == sorted(f"k{i}" for i in range(2800))
+    expected = np.stack([_vector(i) for i in range(2800)])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(store.vectors([f"k{i}" for i in range(2800)]), expected, rtol=1e-6)
+
+
+class RecordingEmbeddings(FakeEmbeddings):
+    """FakeEmbeddings that keeps the texts of every embed_documents request."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return super().embed_documents(texts)
+
+
+def _cosine(a, b):
+    a, b = np.asarray(a), np.asarray(b)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_add_texts_embeds_only_unseen_texts_in_chunks(tmp_path):
+    backend = RecordingEmbeddings()
+    index = SimilarityIndex(backend, store_dir=str(tmp_path), chunk_size=2)
+    index.add_texts(RESUMES[:3] + [RESUMES[0]])
+    assert backend.requests == [RESUMES[:2], RESUMES[2:3]]
+
+    keys = index.add_texts(RESUMES)
+    assert backend.requests[2:] == [RESUMES[3:5]]
+    assert backend.calls == 3
+    assert len(index.store) == len(RESUMES) and list(index.store.keys) == keys
+
+    # A new index on the same directory embeds nothing again
+    reopened = SimilarityIndex(backend, store_dir=str(tmp_path), chunk_size=2)
+    reopened.add_texts(RESUMES)
+    assert backend.calls == 3
+
+
+def test_similarities_are_cosines_in_input_order(tmp_path):
+    backend = FakeEmbeddings()
+    index = SimilarityIndex(backend, store_dir=str(tmp_path), chunk_size=2)
+    texts = list(reversed(RESUMES))
+    scores = index.similarities(texts, JD)
+    expected = [_cosine(backend._vector(t), backend._vector(JD)) for t in texts]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+    assert index.similarities([], JD) == []
+
+
+@pytest.mark.parametrize("k", [1, 3, 5, 50])
+def test_top_k_is_ordered_and_clamped_to_the_store(tmp_path, k):
+    backend = FakeEmbeddings()
+    index = SimilarityIndex(backend, store_dir=str(tmp_path))
+    assert index.top_k(JD, k) == []
+    keys = index.add_texts(RESUMES)
+    scores = dict(zip(keys, index.similarities(RESUMES, JD)))
+
+    top = index.top_k(JD, k)
+    assert len(top) == min(k, len(RESUMES))
+    assert [s for _, s in top] == sorted((s for _, s in top), reverse=True)
+    expected = sorted(scores, key=scores.get, reverse=True)[:len(top)]
+    assert [key for key, _ in top] == expected
+    for key, score in top:
+        assert score == pytest.approx(scores[key], abs=1e-6)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+
+# Where converted document text is kept between runs, and how big it may grow
+DEFAULT_CACHE_DIR = os.getenv(
+    "TA_BUDDY_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ta_buddy", "text"),
+)
+DEFAULT_MAX_BYTES = int(float(os.getenv("TA_BUDDY_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+
+class TextCache:
+    """
+    Disk-backed cache of flattened document text, keyed by a hash of the
+    uploaded file bytes. Least recently used entries are evicted once the
+    cache directory grows beyond `max_bytes`.
+
+    Args:
+        cache_dir (str): Directory holding one `<key>.txt` file per document
+        max_bytes (int): Size limit of the cache directory in bytes
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(data, variant=""):
+        """Returns the cache key for the given file bytes."""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}_{variant}" if variant else digest
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".txt")
+
+    def get(self, key):
+        """Returns the cached text for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # Bump the modification time so eviction sees this entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Stores `text` under `key` and evicts old entries if needed."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Deletes every cached entry."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".txt"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def stats(self, include_size=True):
+        """
+        Returns hit/miss counters and the current size of the cache. Without
+        `include_size` the cache directory is not scanned (entries and bytes are None).
+        """
+        entries = size = None
+        if include_size:
+            entries = size = 0
+            try:
+                for name in os.listdir(self.cache_dir):
+                    if name.endswith(".txt"):
+                        entries += 1
+                        size += os.path.getsize(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+# Shared instance used by the app
+text_cache = TextCache()
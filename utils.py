@@ -1,36 +1,110 @@
 import os
-from dotenv import load_dotenv
-from sklearn.metrics.pairwise import cosine_similarity
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-
-# Load environment variables
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-
-#Initialize models
-# embedding_model = GoogleGenerativeAIEmbeddings(
-#     model="models/gemini-embedding-exp-03-07", google_api_key=api_key
-# )
-
-# embedding_model = GoogleGenerativeAIEmbeddings(
-#     model="models/embedding-001", google_api_key=api_key
-# )
-
-embedding_model = GoogleGenerativeAIEmbeddings(
-    model="models/text-embedding-004", google_api_key=api_key
-)
-
-llm_model = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    google_api_key=api_key,
-    temperature=0.4,
-    max_tokens=2000,
-    max_retries=2,
-)
+import threading
+
+from instrumentation import metrics, set_llm_site
+from llm_cache import LLMResponseCache
+from rate_limiter import limiter
+
+# Models are built on first use: importing this module must stay cheap
+_models = {}
+_models_lock = threading.Lock()
+
+def _api_key():
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("GOOGLE_API_KEY")
+
+def _build_llm_model():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        google_api_key=_api_key(),
+        temperature=0.4,
+        max_tokens=2000,
+        # No retries in the SDK (1 = single attempt): rate_limiter.limiter retries with backoff
+        max_retries=1,
+    )
+
+def _build_embedding_model():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    # embedding_model = GoogleGenerativeAIEmbeddings(
+    #     model="models/gemini-embedding-exp-03-07", google_api_key=api_key
+    # )
+
+    # embedding_model = GoogleGenerativeAIEmbeddings(
+    #     model="models/embedding-001", google_api_key=api_key
+    # )
+    return GoogleGenerativeAIEmbeddings(
+        model="models/text-embedding-004", google_api_key=_api_key()
+    )
+
+def _get_model(name, build):
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                model = _models[name] = build()
+    return model
+
+def get_llm_model():
+    """Returns the shared Gemini chat model, built on first use (thread-safe)."""
+    return _get_model("llm", _build_llm_model)
+
+def get_embedding_model():
+    """Returns the shared Gemini embedding model, built on first use (thread-safe)."""
+    return _get_model("embedding", _build_embedding_model)
+
+def set_llm_model(model):
+    """Replaces the shared chat model (e.g. with a fake for offline benchmarks)."""
+    with _models_lock:
+        _models["llm"] = model
+
+def __getattr__(name):
+    # Keeps `from utils import llm_model` working without building models at import time
+    if name == "llm_model":
+        return get_llm_model()
+    if name == "embedding_model":
+        return get_embedding_model()
+    if name == "cover_letter_prompt":
+        return get_cover_letter_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Shared response cache in front of llm_model
+llm_cache = LLMResponseCache()
+
+def invoke_llm(prompt, use_cache=True, site="llm"):
+    """
+    Sends a prompt (string or LangChain prompt value) to llm_model and returns
+    the response text. Responses are cached on model, temperature and prompt;
+    pass use_cache=False to force a fresh generation. Calls that reach the API
+    go through the process-wide rate limiter. `site` names the call site in
+    the metrics (call counts, cache hits, tokens, time).
+    """
+    llm_model = get_llm_model()
+    prompt_text = prompt if isinstance(prompt, str) else prompt.to_string()
+    key = llm_cache.key_for(llm_model.model, llm_model.temperature, prompt_text)
+    called = False
+
+    def call():
+        nonlocal called
+        called = True
+        set_llm_site(site)
+        with metrics.span("llm:" + site):
+            response = limiter.invoke(llm_model, prompt, site)
+        usage = getattr(response, "usage_metadata", None) or {}
+        metrics.incr("llm_tokens", usage.get("input_tokens", 0), site=site, direction="input")
+        metrics.incr("llm_tokens", usage.get("output_tokens", 0), site=site, direction="output")
+        return response.content
+
+    response = llm_cache.get_or_call(key, call, use_cache)
+    # Coalesced duplicates count as cache hits (as in llm_cache.stats()): they did not reach the API either
+    metrics.incr("llm_calls", site=site, cache="miss" if called else "hit")
+    return response
 
 # LangChain Prompt Template for cover letter
-cover_letter_prompt = ChatPromptTemplate.from_template("""
+COVER_LETTER_TEMPLATE = """
 You are a helpful assistant that writes professional cover letters.
 
 Write a tailored cover letter using the following resume (in markdown format):
@@ -63,22 +137,29 @@ Laxmi Nagar, Delhi
 riya@gmail.com
 
 Make it concise, relevant, and formal in tone. Begin with a compelling intro, and end with a thank you and a call to action.
-""".strip())
+""".strip()
+
+def get_cover_letter_prompt():
+    def build():
+        from langchain_core.prompts import ChatPromptTemplate
+        return ChatPromptTemplate.from_template(COVER_LETTER_TEMPLATE)
+    return _get_model("cover_letter_prompt", build)
 
 # === Function to compute similarity ===
 def compute_similarity(resume_text, job_text):
-    resume_vector = embedding_model.embed_query(resume_text)
-    jd_vector = embedding_model.embed_query(job_text)
-    similarity_score = cosine_similarity([resume_vector], [jd_vector])[0][0]
-    return round(similarity_score, 2)
+    # One pair of the batched API: the JD vector and stored resume vectors are reused
+    from similarity import get_similarity_index
+    similarity_score = get_similarity_index("gemini").similarities([resume_text], job_text)[0]
+    return round(float(similarity_score), 2)
 
 # === Updated Function to generate cover letter ===
-def generate_cover_letter(resume, job_description):
+def cover_letter_prompt_value(resume, job_description):
     jd_section = (
         f"The job description is:\n----------------\n{job_description}\n----------------"
         if job_description.strip()
         else "There is no job description provided."
     )
-    chain = cover_letter_prompt | llm_model
-    response = chain.invoke({"resume": resume, "jd_section": jd_section})
-    return response.content
+    return get_cover_letter_prompt().format_prompt(resume=resume, jd_section=jd_section)
+
+def generate_cover_letter(resume, job_description, use_cache=True):
+    return invoke_llm(cover_letter_prompt_value(resume, job_description), use_cache, site="cover_letter")